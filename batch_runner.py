@@ -0,0 +1,391 @@
+import argparse
+import math
+import os
+import random
+import shutil
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from constants import (
+    GRADE_THRESHOLDS,
+    SIMULATION_TICK_RATE,
+    WAVE_CONFIGS,
+    WINDOW_HEIGHT,
+    WINDOW_WIDTH,
+)
+from headless import HeadlessSimulation, full_run_ticks
+from OpenGL.GLUT import GLUT_DOWN, GLUT_LEFT_BUTTON
+
+# Screen-space band holding the restart, pause and quit buttons; policies
+# never click inside it
+BUTTON_BAND = 60
+
+_MOVEMENT_KEYS = {"up": b"w", "down": b"s", "left": b"a", "right": b"d"}
+
+# Per-game result columns and their dtypes; lives_lost has one entry per wave
+COLUMNS = {
+    "seed": np.int64,
+    "map_seed": np.int64,
+    "ticks": np.int32,
+    "score": np.int64,
+    "grade": "<U2",
+    "gpa": np.float32,
+    "final_wave": np.int16,
+    "lives": np.int16,
+    "game_over": bool,
+    "completed": bool,
+    "lives_lost": np.int16,
+    "peak_enemies": np.int32,
+    "peak_enemy_bullets": np.int32,
+    "peak_player_bullets": np.int32,
+    "wall_seconds": np.float64,
+}
+
+
+class Policy(ABC):
+    """Plays a HeadlessSimulation through the same input handlers as a player"""
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self.held = {direction: False for direction in _MOVEMENT_KEYS}
+
+    @abstractmethod
+    def act(self, simulation: HeadlessSimulation, tick: int) -> None:
+        """Press keys and click for this tick through simulation.controls"""
+
+    def hold(self, simulation: HeadlessSimulation, directions: Sequence[str]) -> None:
+        controls = simulation.controls
+        for direction, key in _MOVEMENT_KEYS.items():
+            wanted = direction in directions
+            if wanted and not self.held[direction]:
+                controls.handle_keyboard(key, 0, 0)
+            elif not wanted and self.held[direction]:
+                controls.handle_keyboard_up(key, 0, 0)
+            self.held[direction] = wanted
+
+    def shoot(self, simulation: HeadlessSimulation, x: float, y: float) -> None:
+        # handle_mouse takes window coordinates, with y growing downwards
+        screen_x = int(x)
+        screen_y = int(WINDOW_HEIGHT - y)
+        if screen_y < BUTTON_BAND:
+            return
+        simulation.controls.handle_mouse(GLUT_LEFT_BUTTON, GLUT_DOWN, screen_x, screen_y)
+
+
+class RandomPolicy(Policy):
+    """Holds a random set of movement keys for a while and fires at random
+    points on the screen"""
+
+    hold_ticks = 15
+    fire_chance = 0.1
+
+    def act(self, simulation: HeadlessSimulation, tick: int) -> None:
+        rng = self.rng
+        if tick % self.hold_ticks == 0:
+            self.hold(simulation, [d for d in _MOVEMENT_KEYS if rng.random() < 0.3])
+        if rng.random() < self.fire_chance:
+            self.shoot(
+                simulation,
+                rng.uniform(0, WINDOW_WIDTH),
+                rng.uniform(0, WINDOW_HEIGHT - BUTTON_BAND),
+            )
+
+
+class ScriptedPolicy(Policy):
+    """Backs away from the nearest enemy when it gets close, drifts back to
+    the middle of the screen otherwise, and fires at the nearest enemy"""
+
+    fire_interval = 8
+    danger_radius = 180.0
+    centre_slack = 120.0
+
+    def act(self, simulation: HeadlessSimulation, tick: int) -> None:
+        game_state = simulation.game_state
+        player_x, player_y = game_state.player_x, game_state.player_y
+        enemies = game_state.enemies
+
+        directions: List[str] = []
+        if len(enemies):
+            dx = enemies["x"] - player_x
+            dy = enemies["y"] - player_y
+            distance = dx * dx + dy * dy
+            nearest = int(np.argmin(distance))
+            if distance[nearest] < self.danger_radius * self.danger_radius:
+                directions = self._towards(-dx[nearest], -dy[nearest])
+            if tick % self.fire_interval == 0:
+                self.shoot(simulation, dx[nearest] + player_x, dy[nearest] + player_y)
+        if not directions:
+            centre_x = WINDOW_WIDTH / 2 - player_x
+            centre_y = WINDOW_HEIGHT / 2 - player_y
+            if math.hypot(centre_x, centre_y) > self.centre_slack:
+                directions = self._towards(centre_x, centre_y)
+        self.hold(simulation, directions)
+
+    @staticmethod
+    def _towards(dx: float, dy: float) -> List[str]:
+        directions = []
+        if abs(dx) > 1:
+            directions.append("right" if dx > 0 else "left")
+        if abs(dy) > 1:
+            directions.append("up" if dy > 0 else "down")
+        return directions
+
+
+class IdlePolicy(Policy):
+    """Never moves or fires; the baseline for how hard a seed is"""
+
+    def act(self, simulation: HeadlessSimulation, tick: int) -> None:
+        pass
+
+
+POLICIES = {"random": RandomPolicy, "scripted": ScriptedPolicy, "idle": IdlePolicy}
+
+
+def play_game(seed: int, policy_name: str, max_ticks: int, delta_time: float) -> Dict:
+    """Play one seeded game to the end (or max_ticks) and summarise it"""
+    start = time.perf_counter()
+    simulation = HeadlessSimulation(delta_time, seed=seed)
+    # The quit button is never clicked, but a headless game has no main loop
+    simulation.controls.on_quit = lambda: None
+    policy = POLICIES[policy_name](random.Random(seed))
+    game_state = simulation.game_state
+
+    lives_lost = np.zeros(len(WAVE_CONFIGS), dtype=np.int16)
+    peak_enemies = peak_enemy_bullets = peak_player_bullets = 0
+    lives = game_state.lives
+    with simulation.output():
+        while simulation.ticks < max_ticks and not game_state.game_over:
+            policy.act(simulation, simulation.ticks)
+            simulation.tick()
+
+            if game_state.lives < lives:
+                # Charged to the wave the hit happened in, which may have
+                # started on this very tick
+                wave = game_state.current_wave
+                lives_lost[min(wave, len(WAVE_CONFIGS)) - 1] += lives - game_state.lives
+            lives = game_state.lives
+            peak_enemies = max(peak_enemies, len(game_state.enemies))
+            peak_enemy_bullets = max(peak_enemy_bullets, len(game_state.enemy_bullets))
+            peak_player_bullets = max(peak_player_bullets, len(game_state.player_bullets))
+
+        grade_info = simulation.game_loop._calculate_grade()
+
+    return {
+        "seed": seed,
+        "map_seed": simulation.map_generator.seed,
+        "ticks": simulation.ticks,
+        "score": game_state.score,
+        "grade": grade_info["grade"],
+        "gpa": grade_info["gpa"],
+        "final_wave": min(game_state.current_wave, len(WAVE_CONFIGS)),
+        "lives": game_state.lives,
+        "game_over": game_state.game_over,
+        "completed": game_state.current_wave > len(WAVE_CONFIGS),
+        "lives_lost": lives_lost,
+        "peak_enemies": peak_enemies,
+        "peak_enemy_bullets": peak_enemy_bullets,
+        "peak_player_bullets": peak_player_bullets,
+        "wall_seconds": time.perf_counter() - start,
+    }
+
+
+def play_games(
+    seeds: Sequence[int], policy_name: str, max_ticks: int, delta_time: float
+) -> Dict[str, np.ndarray]:
+    """Worker task: play a chunk of games and return their results as columns,
+    which pickle far smaller than one dict per game"""
+    results = [play_game(seed, policy_name, max_ticks, delta_time) for seed in seeds]
+    return {
+        name: np.array([result[name] for result in results], dtype=dtype)
+        for name, dtype in COLUMNS.items()
+    }
+
+
+class ResultWriter:
+    """Collects column chunks as they arrive and periodically writes the ones
+    not yet on disk to a numbered part file in path + ".parts", so an
+    interrupted batch still leaves its results behind without any flush
+    rewriting earlier rows. close() writes every row to one compressed .npz
+    and removes the parts."""
+
+    def __init__(self, path: str, flush_every: int = 1000) -> None:
+        self.path = path
+        self.parts_dir = f"{path}.parts"
+        self.flush_every = flush_every
+        self.chunks: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        self.rows: int = 0
+        self.parts: int = 0
+        self._flushed_rows: int = 0
+        self._flushed_chunks: int = 0
+
+    def append(self, chunk: Dict[str, np.ndarray]) -> None:
+        for name, column in chunk.items():
+            self.chunks[name].append(column)
+        self.rows += len(chunk["seed"])
+        if self.rows - self._flushed_rows >= self.flush_every:
+            self.flush()
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            if self.chunks[name]:
+                columns[name] = np.concatenate(self.chunks[name])
+            else:
+                columns[name] = np.zeros(0, dtype=dtype)
+        # Chunks finish out of order
+        order = np.argsort(columns["seed"], kind="stable")
+        return {name: column[order] for name, column in columns.items()}
+
+    def flush(self) -> None:
+        if self.rows == self._flushed_rows:
+            return
+        os.makedirs(self.parts_dir, exist_ok=True)
+        part = {
+            name: np.concatenate(chunks[self._flushed_chunks :])
+            for name, chunks in self.chunks.items()
+        }
+        np.savez(os.path.join(self.parts_dir, f"part-{self.parts:05d}.npz"), **part)
+        self.parts += 1
+        self._flushed_rows = self.rows
+        self._flushed_chunks = len(self.chunks["seed"])
+
+    def close(self) -> None:
+        # np.savez adds .npz to names without it, so give the temp file one
+        temp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temp_path, **self.columns())
+        os.replace(temp_path, self.path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+def run_batch(
+    seeds: Sequence[int],
+    policy_name: str,
+    max_ticks: int,
+    delta_time: float,
+    writer: ResultWriter,
+    workers: Optional[int] = None,
+    progress: bool = True,
+) -> float:
+    """Play every seed in a process pool; returns the wall time taken"""
+    workers = workers or os.cpu_count() or 1
+    # Several chunks per worker keeps every core busy to the end, since game
+    # lengths vary a lot; one task per game would spend too long in IPC
+    chunksize = max(1, min(32, len(seeds) // (8 * workers)))
+    chunks = [seeds[i : i + chunksize] for i in range(0, len(seeds), chunksize)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(play_games, chunk, policy_name, max_ticks, delta_time)
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            writer.append(future.result())
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(
+                    f"\r{writer.rows}/{len(seeds)} games, {writer.rows / elapsed:.1f} games/s",
+                    end="",
+                    file=sys.stderr,
+                )
+    if progress:
+        print(file=sys.stderr)
+    writer.close()
+    return time.perf_counter() - start
+
+
+def format_summary(columns: Dict[str, np.ndarray]) -> str:
+    games = len(columns["seed"])
+    if games == 0:
+        return "No games played"
+
+    lines = [f"{games} games"]
+    header = f"{'':<20}{'mean':>10}{'p5':>10}{'p50':>10}{'p95':>10}{'max':>10}"
+    lines.append(header)
+    for name in (
+        "score",
+        "ticks",
+        "final_wave",
+        "peak_enemies",
+        "peak_enemy_bullets",
+        "peak_player_bullets",
+    ):
+        values = columns[name].astype(np.float64)
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        lines.append(
+            f"{name:<20}{values.mean():>10.1f}{p5:>10.1f}{p50:>10.1f}{p95:>10.1f}"
+            f"{values.max():>10.0f}"
+        )
+
+    lives_lost = columns["lives_lost"].mean(axis=0)
+    lines.append(
+        "lives lost per wave "
+        + "  ".join(f"{wave}: {lost:.2f}" for wave, lost in enumerate(lives_lost, start=1))
+    )
+    lines.append(f"completed all waves  {columns['completed'].mean() * 100:.1f}%")
+
+    lines.append("grades")
+    grades, counts = np.unique(columns["grade"], return_counts=True)
+    frequency = dict(zip(grades.tolist(), counts.tolist()))
+    for _, grade_info in sorted(GRADE_THRESHOLDS.items(), reverse=True):
+        count = frequency.get(grade_info["grade"], 0)
+        if count:
+            lines.append(f"  {grade_info['grade']:<3}{count:>8}  {count / games * 100:5.1f}%")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Play many seeded headless games in parallel")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--start-seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scripted")
+    parser.add_argument(
+        "--dt", type=float, default=1.0 / SIMULATION_TICK_RATE, help="fixed delta_time"
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=None,
+        help="max ticks per game (default: a full run of every semester)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--output", default="batch_results.npz")
+    parser.add_argument(
+        "--flush-every", type=int, default=1000, help="write a part file every N games"
+    )
+    parser.add_argument("--quiet", action="store_true", help="no progress line")
+    args = parser.parse_args(argv)
+
+    max_ticks = args.ticks
+    if max_ticks is None:
+        max_ticks = full_run_ticks(args.dt)
+
+    seeds = list(range(args.start_seed, args.start_seed + args.games))
+    writer = ResultWriter(args.output, args.flush_every)
+    elapsed = run_batch(
+        seeds,
+        args.policy,
+        max_ticks,
+        args.dt,
+        writer,
+        workers=args.workers,
+        progress=not args.quiet,
+    )
+
+    columns = writer.columns()
+    game_seconds = columns["wall_seconds"].sum()
+    print(format_summary(columns))
+    print(
+        f"Played {len(seeds)} games in {elapsed:.2f}s ({len(seeds) / elapsed:.1f} games/s, "
+        f"{game_seconds / elapsed:.1f}x parallel speedup); results in {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
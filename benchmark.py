@@ -0,0 +1,431 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from constants import (
+    SPAWN_EXCLUSION_RADIUS,
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+)
+from headless import HeadlessSimulation
+from map_cache import MapCache
+from physics import TileCollider
+from registry import ENEMIES, POWERUPS, WAVES
+import game_loop
+import map_generator
+import player
+import render
+import render_target
+import ui
+
+# Each scenario seeds GameState directly; every key except name is optional
+SCENARIOS: List[Dict] = [
+    {
+        "name": "wave1_light",
+        "wave": 1,
+        "enemies": 5,
+        "enemy_bullets": 20,
+        "player_bullets": 10,
+    },
+    {
+        "name": "wave4_300_enemies_5000_bullets_spread",
+        "wave": 4,
+        "enemies": 300,
+        "enemy_bullets": 5000,
+        "player_bullets": 400,
+        "powerups": ["CHEGG"],
+    },
+    {
+        "name": "bullet_hell",
+        "wave": 4,
+        "enemies": 60,
+        "enemy_bullets": 8000,
+        "player_bullets": 2000,
+        "powerups": ["CHEGG", "QUILLBOT"],
+    },
+]
+
+DEFAULT_RESULTS_PATH = "benchmark_results.json"
+GL_MODULES = (render_target, render, game_loop, player, map_generator, ui)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    # Game events are printed; keep them out of the timings and the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class StubGL:
+    """Replaces every gl*/glu*/glut* function the drawing modules imported with
+    a call counter, so draw paths run without a GL context"""
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self._originals: List = []
+
+    def __enter__(self) -> "StubGL":
+        for module in GL_MODULES:
+            for name, value in list(vars(module).items()):
+                if name.startswith("gl") and callable(value):
+                    self._originals.append((module, name, value))
+                    setattr(module, name, self._counter(name))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for module, name, value in self._originals:
+            setattr(module, name, value)
+        self._originals = []
+
+    def _counter(self, name: str) -> Callable:
+        calls = self.calls
+
+        def stub(*args, **kwargs) -> int:
+            calls[name] = calls.get(name, 0) + 1
+            return 1
+
+        return stub
+
+
+def build_simulation(scenario: Dict) -> HeadlessSimulation:
+    seed = scenario.get("seed", 0)
+    simulation = HeadlessSimulation(seed=seed)
+    seed_game_state(simulation, scenario, np.random.default_rng(seed))
+    return simulation
+
+
+def seed_game_state(
+    simulation: HeadlessSimulation, scenario: Dict, rng: np.random.Generator
+) -> None:
+    game_state = simulation.game_state
+    wave = scenario.get("wave", 1)
+
+    # Keep the run going for as long as we measure
+    game_state.current_wave = wave
+    game_state.wave_timer = math.inf
+    game_state.lives = sys.maxsize
+
+    enemy_types = WAVES.enemy_ids[wave]
+    spawn_positions = game_state.map_generator.get_random_floor_positions(
+        scenario.get("enemies", 0),
+        exclude=(game_state.player_x, game_state.player_y),
+        radius=SPAWN_EXCLUSION_RADIUS,
+        rng=game_state.rng,
+    )
+    for x, y in spawn_positions.tolist():
+        type_id = enemy_types[int(rng.integers(len(enemy_types)))]
+        game_state.enemies.add(
+            type_id=type_id,
+            x=x,
+            y=y,
+            hp=ENEMIES.hp[type_id],
+            attack_cooldown=rng.uniform(0, ENEMIES.attack_cooldown[type_id]),
+        )
+
+    shooters = [type_id for type_id in enemy_types if ENEMIES.attack_count[type_id]]
+    count = scenario.get("enemy_bullets", 0)
+    if count and shooters:
+        sources = rng.integers(len(shooters), size=count)
+        type_ids = np.array(shooters)[sources]
+        speeds = ENEMIES.bullet_speed[type_ids]
+        angles = rng.uniform(0, 2 * math.pi, count)
+        game_state.enemy_bullets.add_many(
+            count,
+            x=rng.uniform(0, WINDOW_WIDTH, count),
+            y=rng.uniform(0, WINDOW_HEIGHT, count),
+            vx=np.cos(angles) * speeds,
+            vy=np.sin(angles) * speeds,
+            type_id=type_ids,
+        )
+
+    count = scenario.get("player_bullets", 0)
+    if count:
+        angles = rng.uniform(0, 2 * math.pi, count)
+        game_state.player_bullets.add_many(
+            count,
+            x=rng.uniform(0, WINDOW_WIDTH, count),
+            y=rng.uniform(0, WINDOW_HEIGHT, count),
+            vx=np.cos(angles) * 300.0,
+            vy=np.sin(angles) * 300.0,
+        )
+
+    for powerup_type in scenario.get("powerups", []):
+        game_state.active_powerups.activate(POWERUPS.ids[powerup_type])
+
+
+def _timing_stats(samples_ns: List[int]) -> Dict[str, float]:
+    samples_ms = np.array(samples_ns, dtype=np.float64) / 1e6
+    p50, p95 = np.percentile(samples_ms, [50, 95])
+    return {
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "samples": int(len(samples_ms)),
+    }
+
+
+def measure_ticks(scenario: Dict, ticks: int) -> Dict[str, float]:
+    simulation = build_simulation(scenario)
+    samples = []
+    with _quiet():
+        for _ in range(ticks):
+            start = time.perf_counter_ns()
+            simulation.tick()
+            samples.append(time.perf_counter_ns() - start)
+    return _timing_stats(samples)
+
+
+def measure_collisions(scenario: Dict, repeat: int) -> Dict[str, float]:
+    # Collisions consume bullets and enemies, so each sample gets a fresh state
+    samples = []
+    for _ in range(repeat):
+        simulation = build_simulation(scenario)
+        with _quiet():
+            start = time.perf_counter_ns()
+            simulation.collision_manager.check_all_collisions()
+            samples.append(time.perf_counter_ns() - start)
+    return _timing_stats(samples)
+
+
+def measure_map_generation(scenario: Dict, repeat: int) -> Dict[str, float]:
+    random.seed(scenario.get("seed", 0))
+    generator = map_generator.MapGenerator(render.Render())
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        generator.generate_map()
+        samples.append(time.perf_counter_ns() - start)
+    return _timing_stats(samples)
+
+
+def measure_map_load(scenario: Dict, repeat: int) -> Dict[str, float]:
+    """generate_map for a seed that is already in the map cache"""
+    seed = scenario.get("seed", 0)
+    with tempfile.TemporaryDirectory() as directory:
+        generator = map_generator.MapGenerator(render.Render(), seed=seed, cache=MapCache(directory))
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            generator.generate_map(seed)
+            samples.append(time.perf_counter_ns() - start)
+    return _timing_stats(samples)
+
+
+def legacy_probe_move(
+    map_generator: map_generator.MapGenerator,
+    x: float,
+    y: float,
+    half_width: float,
+    half_height: float,
+    dx: float,
+    dy: float,
+) -> tuple:
+    """The corner-probing movement Controls used before TileCollider, kept as
+    the baseline for measure_movement"""
+    new_x = x + dx
+    if not any(
+        map_generator.is_wall(new_x + sx * half_width, y + sy * half_height)
+        for sx, sy in ((-1, -1), (1, -1), (-1, 1), (1, 1))
+    ):
+        x = new_x
+    new_y = y + dy
+    if not any(
+        map_generator.is_wall(x + sx * half_width, new_y + sy * half_height)
+        for sx, sy in ((-1, -1), (1, -1), (-1, 1), (1, 1))
+    ):
+        y = new_y
+    return x, y
+
+
+def measure_movement(scenario: Dict, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Wall-resolved movement of the player plus every enemy, one tick's worth:
+    per-body corner probes vs one batched TileCollider.move"""
+    simulation = build_simulation(scenario)
+    game_state = simulation.game_state
+    enemies = game_state.enemies
+    collider = TileCollider(game_state.map_generator)
+
+    x = np.concatenate(([game_state.player_x], enemies["x"]))
+    y = np.concatenate(([game_state.player_y], enemies["y"]))
+    half = np.concatenate(([10.0], ENEMIES.half_size[enemies["type_id"]]))
+    angles = np.random.default_rng(scenario.get("seed", 0)).uniform(0, 2 * math.pi, len(x))
+    # Speed-boosted player speed for one tick
+    dx = np.cos(angles) * 400.0 / 60
+    dy = np.sin(angles) * 400.0 / 60
+
+    bodies = list(zip(x.tolist(), y.tolist(), half.tolist(), dx.tolist(), dy.tolist()))
+    player_x, player_y, player_half, player_dx, player_dy = bodies[0]
+    probe_samples = []
+    swept_samples = []
+    player_samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for body_x, body_y, body_half, body_dx, body_dy in bodies:
+            legacy_probe_move(
+                game_state.map_generator, body_x, body_y, body_half, body_half, body_dx, body_dy
+            )
+        probe_samples.append(time.perf_counter_ns() - start)
+
+        start = time.perf_counter_ns()
+        collider.move(x, y, half, half, dx, dy)
+        swept_samples.append(time.perf_counter_ns() - start)
+
+        start = time.perf_counter_ns()
+        collider.move_one(player_x, player_y, player_half, player_half, player_dx, player_dy)
+        player_samples.append(time.perf_counter_ns() - start)
+
+    return {
+        "movement_probe": _timing_stats(probe_samples),
+        "movement_swept": _timing_stats(swept_samples),
+        "movement_swept_player": _timing_stats(player_samples),
+    }
+
+
+def measure_display(scenario: Dict, frames: int) -> Dict:
+    simulation = build_simulation(scenario)
+    samples = []
+    with StubGL() as stub:
+        for _ in range(frames):
+            start = time.perf_counter_ns()
+            simulation.game_loop.display()
+            samples.append(time.perf_counter_ns() - start)
+
+    result = _timing_stats(samples)
+    result["gl_calls_per_frame"] = {
+        name: count / frames for name, count in sorted(stub.calls.items())
+    }
+    return result
+
+
+def measure_framebuffer(scenario: Dict, frames: int) -> Dict:
+    """display() rasterized into the NumPy framebuffer target"""
+    simulation = build_simulation(scenario)
+    target = render_target.FramebufferTarget()
+    simulation.render.target = target
+
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter_ns()
+        simulation.game_loop.display()
+        samples.append(time.perf_counter_ns() - start)
+
+    result = _timing_stats(samples)
+    result["points_per_frame"] = target.points_drawn / frames
+    result["points_per_second"] = target.points_drawn / (sum(samples) / 1e9)
+    return result
+
+
+def run_scenario(scenario: Dict, repeat: int) -> Dict:
+    return {
+        **measure_movement(scenario, repeat),
+        "tick": measure_ticks(scenario, repeat),
+        "collision": measure_collisions(scenario, max(1, repeat // 4)),
+        "map_generation": measure_map_generation(scenario, repeat),
+        "map_load": measure_map_load(scenario, repeat),
+        "display": measure_display(scenario, max(1, repeat // 4)),
+        "framebuffer": measure_framebuffer(scenario, max(1, repeat // 4)),
+    }
+
+
+def run(scenarios: List[Dict], repeat: int) -> Dict:
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "scenarios": {},
+    }
+    for scenario in scenarios:
+        print(f"Running {scenario['name']}...")
+        results["scenarios"][scenario["name"]] = run_scenario(scenario, repeat)
+    return results
+
+
+def compare(
+    baseline: Dict, current: Dict, threshold: float, min_delta_ms: float = 0.0
+) -> List[str]:
+    """Metrics whose p50 grew by more than threshold (a fraction) and by more
+    than min_delta_ms vs baseline"""
+    regressions = []
+    for name, metrics in current["scenarios"].items():
+        baseline_metrics = baseline["scenarios"].get(name)
+        if baseline_metrics is None:
+            continue
+        for metric, stats in metrics.items():
+            before = baseline_metrics.get(metric, {}).get("p50_ms")
+            after = stats["p50_ms"]
+            if not before:
+                continue
+            change = (after - before) / before
+            regressed = change > threshold and after - before > min_delta_ms
+            marker = "REGRESSION" if regressed else "ok"
+            print(
+                f"{name:<40}{metric:<16}{before:>10.3f}{after:>10.3f}"
+                f"{change * 100:>+9.1f}%  {marker}"
+            )
+            if regressed:
+                regressions.append(f"{name}/{metric}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulation and rendering benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark scenarios")
+    run_parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    run_parser.add_argument("--scenario", action="append", help="only run these")
+    run_parser.add_argument("--repeat", type=int, default=60)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", default=DEFAULT_RESULTS_PATH)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="allowed p50 slowdown fraction"
+    )
+    compare_parser.add_argument(
+        "--min-delta-ms", type=float, default=0.05, help="ignore smaller p50 changes"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        scenarios = [
+            scenario
+            for scenario in SCENARIOS
+            if not args.scenario or scenario["name"] in args.scenario
+        ]
+        results = run(scenarios, args.repeat)
+        with open(args.output, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.current) as current_file:
+        current = json.load(current_file)
+
+    regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,92 +1,198 @@
-import math
-from typing import Dict
-from constants import ENEMY_TYPES, POWERUP_TYPES
+from typing import Dict, Tuple
+import numpy as np
+from constants import MAP_TILE_SIZE
+from registry import ENEMIES, POWERUPS
+from spatial_hash import SpatialHash
+
+PLAYER_BULLET_RADIUS = 3
+
+
+def broadphase_cell_size() -> int:
+    """Broadphase cell size; cells must cover the widest bullet/enemy
+    overlap distance"""
+    return max(MAP_TILE_SIZE, PLAYER_BULLET_RADIUS + int(ENEMIES.size.max()))
+
+
+def circles_rect_hits(
+    circle_x: np.ndarray, circle_y: np.ndarray, circle_r,
+    rect_x, rect_y, rect_w: float, rect_h: float
+) -> np.ndarray:
+    """Hit mask of circles overlapping a rectangle; the radius and the
+    rectangle's corner may be per-circle arrays"""
+    closest_x = np.maximum(rect_x, np.minimum(circle_x, rect_x + rect_w))
+    closest_y = np.maximum(rect_y, np.minimum(circle_y, rect_y + rect_h))
+
+    dx = circle_x - closest_x
+    dy = circle_y - closest_y
+
+    return (dx * dx + dy * dy) < (circle_r * circle_r)
+
+
+def resolve_player_bullet_hits(
+    broadphase: SpatialHash, bullets, enemies, bullet_offset=0.0, enemy_offset=0.0
+) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """Damage the enemies hit by player bullets, one enemy per bullet.
+
+    bullet_offset and enemy_offset are added to x before the broadphase, so
+    several games can share one grid. Returns the mask of bullets that hit,
+    the rows of the enemies killed in the order they died, and the candidate
+    and hit pair counts. Removing the rows is left to the caller.
+    """
+    bullet_x = bullets["x"] + bullet_offset
+    enemy_x = enemies["x"] + enemy_offset
+    enemy_sizes = ENEMIES.size[enemies["type_id"]]
+
+    # Broadphase: only pairs sharing a neighbourhood of grid cells
+    broadphase.build(enemy_x, enemies["y"])
+    bullet_index, enemy_index = broadphase.query_pairs(bullet_x, bullets["y"])
+
+    dx = bullet_x[bullet_index] - enemy_x[enemy_index]
+    dy = bullets["y"][bullet_index] - enemies["y"][enemy_index]
+    hits = np.sqrt(dx * dx + dy * dy) < (PLAYER_BULLET_RADIUS + enemy_sizes[enemy_index])
+
+    # Walk hits in bullet order, then enemy order, so earlier bullets
+    # still claim kills first and each bullet hits its first live enemy
+    bullet_index = bullet_index[hits]
+    enemy_index = enemy_index[hits]
+    order = np.lexsort((enemy_index, bullet_index))
+
+    bullet_hit = np.zeros(len(bullets), dtype=bool)
+    enemy_alive = np.ones(len(enemies), dtype=bool)
+    enemy_hp = enemies["hp"]
+    kills = []
+
+    for bullet, enemy in zip(bullet_index[order].tolist(), enemy_index[order].tolist()):
+        if bullet_hit[bullet] or not enemy_alive[enemy]:
+            continue
+
+        # Remove bullet
+        bullet_hit[bullet] = True
+
+        # Damage enemy
+        enemy_hp[enemy] -= 1
+        if enemy_hp[enemy] <= 0:
+            enemy_alive[enemy] = False
+            kills.append(enemy)
+
+    return bullet_hit, np.array(kills, dtype=np.intp), len(hits), len(bullet_index)
 
 
 class CollisionManager:
     def __init__(self, game_state) -> None:
         self.game_state = game_state
+        self.broadphase = SpatialHash(broadphase_cell_size())
+
+        self.broadphase_stats: Dict[str, int] = {
+            "ticks": 0,
+            "brute_force_pairs": 0,
+            "candidate_pairs": 0,
+            "hit_pairs": 0,
+        }
 
     def check_all_collisions(self) -> None:
         self._check_player_bullet_collisions()
-        self._check_enemy_bullet_collisions()
-        self._check_enemy_melee_collisions()
-        self._check_powerup_collisions()
+
+        # The player does not move during collision handling, so one hitbox
+        # serves every player-hit check this tick
+        player_rect = self._get_player_rect()
+        self._check_enemy_bullet_collisions(player_rect)
+        self._check_enemy_melee_collisions(player_rect)
+        self._check_powerup_collisions(player_rect)
 
     def _check_player_bullet_collisions(self) -> None:
-        for bullet in self.game_state.player_bullets[:]:
-            for enemy in self.game_state.enemies[:]:
-                if self._check_circle_collision(
-                    bullet["x"], bullet["y"], 3,
-                    enemy["x"], enemy["y"], 
-                    ENEMY_TYPES[enemy["type"]]["size"]
-                ):
-                    # Remove bullet
-                    if bullet in self.game_state.player_bullets:
-                        self.game_state.player_bullets.remove(bullet)
-                    
-                    # Damage enemy
-                    enemy["hp"] -= 1
-                    if enemy["hp"] <= 0:
-                        self.game_state.enemies.remove(enemy)
-                        self.game_state.score += ENEMY_TYPES[enemy["type"]]["points"]
-                        print(f"Defeated {enemy['type']}! Score: {self.game_state.score}")
-                    break
-
-    def _check_enemy_bullet_collisions(self) -> None:
-        for bullet in self.game_state.enemy_bullets[:]:
-            player_hitbox = self.game_state.player.get_hitbox(
-                self.game_state.player_x,
-                self.game_state.player_y
-            )
-            
-            if self._check_circle_rect_collision(
-                bullet["x"], bullet["y"], 2,
-                player_hitbox["x"] - player_hitbox["width"] // 2,
-                player_hitbox["y"] - player_hitbox["height"] // 2,
-                player_hitbox["width"],
-                player_hitbox["height"]
-            ):
-                self.game_state.enemy_bullets.remove(bullet)
-                self._handle_player_hit()
-
-    def _check_enemy_melee_collisions(self) -> None:
-        for enemy in self.game_state.enemies:
-            if ENEMY_TYPES[enemy["type"]]["attack_type"] != "melee":
-                continue
-                
-            player_hitbox = self.game_state.player.get_hitbox(
-                self.game_state.player_x,
-                self.game_state.player_y
-            )
-            
-            if self._check_circle_rect_collision(
-                enemy["x"], enemy["y"],
-                ENEMY_TYPES[enemy["type"]]["attack_range"],
-                player_hitbox["x"] - player_hitbox["width"] // 2,
-                player_hitbox["y"] - player_hitbox["height"] // 2,
-                player_hitbox["width"],
-                player_hitbox["height"]
-            ):
-                self._handle_player_hit()
-
-    def _check_powerup_collisions(self) -> None:
-        for powerup in self.game_state.available_powerups[:]:
-            player_hitbox = self.game_state.player.get_hitbox(
-                self.game_state.player_x,
-                self.game_state.player_y
-            )
-            
-            if self._check_circle_rect_collision(
-                powerup["x"], powerup["y"],
-                POWERUP_TYPES[powerup["type"]]["size"],
-                player_hitbox["x"] - player_hitbox["width"] // 2,
-                player_hitbox["y"] - player_hitbox["height"] // 2,
-                player_hitbox["width"],
-                player_hitbox["height"]
-            ):
-                self._activate_powerup(powerup)
-                self.game_state.available_powerups.remove(powerup)
+        bullets = self.game_state.player_bullets
+        enemies = self.game_state.enemies
+        if not len(bullets) or not len(enemies):
+            return
+
+        bullet_hit, kills, candidate_pairs, hit_pairs = resolve_player_bullet_hits(
+            self.broadphase, bullets, enemies
+        )
+        self._record_broadphase_pairs(
+            len(bullets) * len(enemies), candidate_pairs, hit_pairs
+        )
+
+        for type_id in enemies["type_id"][kills].tolist():
+            self.game_state.score += ENEMIES.points[type_id].item()
+            print(f"Defeated {ENEMIES.names[type_id]}! Score: {self.game_state.score}")
+
+        killed = np.zeros(len(enemies), dtype=bool)
+        killed[kills] = True
+        bullets.remove(bullet_hit)
+        enemies.remove(killed)
+
+    def _record_broadphase_pairs(
+        self, brute_force_pairs: int, candidate_pairs: int, hit_pairs: int
+    ) -> None:
+        stats = self.broadphase_stats
+        stats["ticks"] += 1
+        stats["brute_force_pairs"] += brute_force_pairs
+        stats["candidate_pairs"] += candidate_pairs
+        stats["hit_pairs"] += hit_pairs
+
+    def get_broadphase_stats(self) -> Dict[str, float]:
+        """Cumulative pair counts and the fraction the broadphase pruned"""
+        stats = dict(self.broadphase_stats)
+        brute_force = stats["brute_force_pairs"]
+        stats["pruned_fraction"] = (
+            1.0 - stats["candidate_pairs"] / brute_force if brute_force else 0.0
+        )
+        return stats
+
+    def _check_enemy_bullet_collisions(self, player_rect: Tuple[float, ...]) -> None:
+        bullets = self.game_state.enemy_bullets
+        if not len(bullets):
+            return
+
+        hits = circles_rect_hits(bullets["x"], bullets["y"], 2, *player_rect)
+        for _ in range(int(hits.sum())):
+            self._handle_player_hit()
+        bullets.remove(hits)
+
+    def _check_enemy_melee_collisions(self, player_rect: Tuple[float, ...]) -> None:
+        enemies = self.game_state.enemies
+        if not len(enemies):
+            return
+
+        # Non-melee types have a zero range and can never register a hit
+        hits = circles_rect_hits(
+            enemies["x"], enemies["y"], ENEMIES.melee_range[enemies["type_id"]],
+            *player_rect
+        )
+        for _ in range(int(hits.sum())):
+            self._handle_player_hit()
+
+    def _check_powerup_collisions(self, player_rect: Tuple[float, ...]) -> None:
+        powerups = self.game_state.available_powerups
+        if not powerups:
+            return
+
+        hits = circles_rect_hits(
+            np.array([powerup["x"] for powerup in powerups], dtype=np.float64),
+            np.array([powerup["y"] for powerup in powerups], dtype=np.float64),
+            POWERUPS.size[[powerup["type_id"] for powerup in powerups]],
+            *player_rect
+        )
+        if not hits.any():
+            return
+
+        for index in np.flatnonzero(hits).tolist():
+            self._activate_powerup(powerups[index])
+        self.game_state.available_powerups = [
+            powerup for powerup, hit in zip(powerups, hits.tolist()) if not hit
+        ]
+
+    def _get_player_rect(self) -> Tuple[float, float, float, float]:
+        player_hitbox = self.game_state.player.get_hitbox(
+            self.game_state.player_x,
+            self.game_state.player_y
+        )
+        return (
+            player_hitbox["x"] - player_hitbox["width"] // 2,
+            player_hitbox["y"] - player_hitbox["height"] // 2,
+            player_hitbox["width"],
+            player_hitbox["height"],
+        )
 
     def _handle_player_hit(self) -> None:
         self.game_state.lives -= 1
@@ -97,38 +203,6 @@ class CollisionManager:
             print("Game Over! Failed the semester.")
 
     def _activate_powerup(self, powerup: Dict) -> None:
-        powerup_type = powerup["type"]
-        powerup_data = POWERUP_TYPES[powerup_type].copy()
-        powerup_data["type"] = powerup_type
-        
-        # Remove any existing powerup of the same type
-        self.game_state.active_powerups = [
-            p for p in self.game_state.active_powerups 
-            if p["type"] != powerup_type
-        ]
-        
-        self.game_state.active_powerups.append(powerup_data)
-        print(f"Activated {powerup_type}!")
-
-    def _check_circle_collision(
-        self, x1: float, y1: float, r1: float,
-        x2: float, y2: float, r2: float
-    ) -> bool:
-        dx = x1 - x2
-        dy = y1 - y2
-        distance = math.sqrt(dx * dx + dy * dy)
-        return distance < (r1 + r2)
-
-    def _check_circle_rect_collision(
-        self, circle_x: float, circle_y: float, circle_r: float,
-        rect_x: float, rect_y: float, rect_w: float, rect_h: float
-    ) -> bool:
-        # Find closest point on rectangle to circle
-        closest_x = max(rect_x, min(circle_x, rect_x + rect_w))
-        closest_y = max(rect_y, min(circle_y, rect_y + rect_h))
-        
-        # Calculate distance between closest point and circle center
-        dx = circle_x - closest_x
-        dy = circle_y - closest_y
-        
-        return (dx * dx + dy * dy) < (circle_r * circle_r)
\ No newline at end of file
+        # Replaces any active powerup with the same effect
+        powerup_data = self.game_state.active_powerups.activate(powerup["type_id"])
+        print(f"Activated {powerup_data['type']}!")
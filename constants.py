@@ -2,6 +2,10 @@
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 
+# Simulation Settings
+SIMULATION_TICK_RATE = 60  # Fixed simulation ticks per second
+MAX_CATCH_UP_TICKS = 5  # Ticks run per frame before the remaining backlog is dropped
+
 # Colors (RGB)
 BLACK = (0.0, 0.0, 0.0)
 WHITE = (1.0, 1.0, 1.0)
@@ -21,6 +25,9 @@ PLAYER_SPEED = 200.0
 PLAYER_BULLET_COLOR = BLUE
 PLAYER_BULLET_SPEED = 300.0
 PLAYER_BULLET_SIZE = 5
+MAX_PLAYER_BULLETS = 2048  # Preallocated bullet pool sizes
+MAX_ENEMY_BULLETS = 8192
+BULLET_OVERFLOW_POLICY = "drop_oldest"  # or "refuse"
 INITIAL_LIVES = 3
 
 # Enemy Settings
@@ -141,6 +148,13 @@ MAP_COLORS = {
     "FLOOR": (0.1, 0.1, 0.1),
     "CORRIDOR": (0.15, 0.15, 0.15),
 }
+MAP_SEED_COUNT = 4096  # Random maps are drawn from seeds 0..MAP_SEED_COUNT-1
+MAP_CACHE_DIR = "map_cache"  # Pre-generated maps; see map_cache.py
+SPAWN_EXCLUSION_RADIUS = 160  # Enemies never spawn closer than this to the player
+
+# Render Settings
+RENDER_BATCHED = True  # False falls back to immediate-mode glVertex2f calls
+SHAPE_CACHE_SIZE = 64  # Max rasterized shapes kept by the LRU shape cache
 
 # UI Settings
 BUTTON_SIZE = 20
@@ -148,6 +162,25 @@ RESTART_BUTTON_COLOR = GREEN
 PAUSE_PLAY_BUTTON_COLOR = YELLOW
 CROSS_BUTTON_COLOR = RED
 
+# Terminal Status Settings
+STATUS_MAX_RATE = 10.0  # Max terminal status redraws per second
+STATUS_EVENT_LINES = 8  # Recent game messages shown under the status panel
+
+# Profiler Settings
+PROFILER_ENABLED = False  # Phase timing stays compiled in but costs ~nothing when off
+PROFILER_CAPACITY = 65536  # Samples kept in the profiler ring buffer
+PROFILER_TRACE_PATH = "frame_trace.json"
+
+# Replay Settings
+REPLAY_RECORD_PATH = None  # e.g. "last_run.rec" to record every session for replay.py
+REPLAY_HASH_EVERY_TICK = True  # Store a state hash per tick so replays can be verified
+
+# Rewind Settings
+REWIND_KEY = "r"  # Each press goes back REWIND_STEP_SECONDS, also after a game over
+REWIND_STEP_SECONDS = 2.0
+REWIND_INTERVAL_TICKS = 6  # Ticks between rewind snapshots
+REWIND_CAPACITY = 100  # Snapshots kept: 10s of game time at 60 ticks/s; 0 disables rewind
+
 # Game Status
 GRADE_THRESHOLDS = {
     90: {"grade": "A", "gpa": 4.0, "description": "Excellent"},
@@ -1,19 +1,29 @@
 from OpenGL.GLUT import *
-from constants import WINDOW_WIDTH, WINDOW_HEIGHT, PLAYER_BULLET_SPEED
+from typing import Callable, Optional
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT, PLAYER_BULLET_SPEED, REWIND_KEY
+from physics import TileCollider
 import math
 
 
 class Controls:
-    def __init__(self, game_state, ui) -> None:
+    def __init__(
+        self, game_state, ui, on_quit: Optional[Callable[[], None]] = None
+    ) -> None:
         self.game_state = game_state
         self.ui = ui
+        # Called by the quit button; main passes glutLeaveMainLoop
+        self.on_quit = on_quit
+        # Set by InputRecorder.attach; sees every input event first
+        self.recorder = None
+        # Set by GameLoop when it keeps a rewind buffer
+        self.on_rewind: Optional[Callable[[], None]] = None
+        self.collider = TileCollider(game_state.map_generator)
 
     def update_movement(self, delta_time: float) -> None:
         if self.game_state.game_over or self.game_state.is_paused:
             return
 
-        speed_powerup = self.game_state.get_active_powerup("speed_boost")
-        speed_multiplier = speed_powerup["multiplier"] if speed_powerup else 1.0
+        speed_multiplier = self.game_state.active_powerups.movement_multiplier
 
         movement_x = movement_y = 0
         if self.game_state.movement["up"]:
@@ -34,58 +44,30 @@ class Controls:
         half_width = hitbox["width"] // 2
         half_height = hitbox["height"] // 2
 
-        new_x = self.game_state.player_x + movement_x
-        can_move_x = True
-
-        test_points = [
-            (new_x - half_width, self.game_state.player_y - half_height),  # Bottom left
-            (
-                new_x + half_width,
-                self.game_state.player_y - half_height,
-            ),  # Bottom right
-            (new_x - half_width, self.game_state.player_y + half_height),  # Top left
-            (new_x + half_width, self.game_state.player_y + half_height),  # Top right
-        ]
-
-        for test_x, test_y in test_points:
-            if self.game_state.map_generator.is_wall(test_x, test_y):
-                can_move_x = False
-                break
-
-        if can_move_x:
-            self.game_state.player_x = max(
-                half_width, min(WINDOW_WIDTH - half_width, new_x)
-            )
-
-        new_y = self.game_state.player_y + movement_y
-        can_move_y = True
-
-        test_points = [
-            (self.game_state.player_x - half_width, new_y - half_height),  # Bottom left
-            (
-                self.game_state.player_x + half_width,
-                new_y - half_height,
-            ),  # Bottom right
-            (self.game_state.player_x - half_width, new_y + half_height),  # Top left
-            (self.game_state.player_x + half_width, new_y + half_height),  # Top right
-        ]
-
-        for test_x, test_y in test_points:
-            if self.game_state.map_generator.is_wall(test_x, test_y):
-                can_move_y = False
-                break
-
-        if can_move_y:
-            self.game_state.player_y = max(
-                half_height, min(WINDOW_HEIGHT - half_height, new_y)
-            )
+        new_x, new_y = self.collider.move_one(
+            self.game_state.player_x,
+            self.game_state.player_y,
+            half_width,
+            half_height,
+            movement_x,
+            movement_y,
+        )
+
+        self.game_state.player_x = max(half_width, min(WINDOW_WIDTH - half_width, new_x))
+        self.game_state.player_y = max(half_height, min(WINDOW_HEIGHT - half_height, new_y))
 
     def handle_keyboard(self, key: GLubyte, x: int, y: int) -> None:
+        if self.recorder is not None:
+            self.recorder.key_down(key, x, y)
+        key = key.decode("utf-8").lower()
+
+        if key == REWIND_KEY:
+            if self.on_rewind is not None:
+                self.on_rewind()
+            return
         if self.game_state.game_over or self.game_state.is_paused:
             return
 
-        key = key.decode("utf-8").lower()
-
         if key == "w":
             self.game_state.movement["up"] = True
         elif key == "s":
@@ -96,6 +78,8 @@ class Controls:
             self.game_state.movement["right"] = True
 
     def handle_keyboard_up(self, key: GLubyte, x: int, y: int) -> None:
+        if self.recorder is not None:
+            self.recorder.key_up(key, x, y)
         key = key.decode("utf-8").lower()
 
         if key == "w":
@@ -108,6 +92,8 @@ class Controls:
             self.game_state.movement["right"] = False
 
     def handle_mouse(self, button: int, state: int, x: int, y: int) -> None:
+        if self.recorder is not None:
+            self.recorder.mouse(button, state, x, y)
         # Convert mouse coordinates to OpenGL coordinates
         y = WINDOW_HEIGHT - y
 
@@ -133,7 +119,8 @@ class Controls:
                     f"Final Grade: {grade_info['grade']} (GPA: {grade_info['gpa']})\n"
                     f"Performance: {grade_info['description']}"
                 )
-                glutLeaveMainLoop()
+                if self.on_quit is not None:
+                    self.on_quit()
                 return
 
             # Handle shooting only when not paused
@@ -155,26 +142,23 @@ class Controls:
             angle = math.atan2(dy, dx)
 
             # Check for spread shot power-up
-            spread_powerup = self.game_state.get_active_powerup("spread_shot")
+            spread_bullets = self.game_state.active_powerups.spread_bullets
 
-            if spread_powerup:
-                self._create_spread_shot(angle, spread_powerup["bullets"])
+            if spread_bullets:
+                self._create_spread_shot(angle, spread_bullets)
             else:
                 self._create_single_bullet(angle)
 
     def _create_single_bullet(self, angle: float) -> None:
-        speed_powerup = self.game_state.get_active_powerup("bullet_speed")
-        bullet_speed = PLAYER_BULLET_SPEED * (
-            speed_powerup["multiplier"] if speed_powerup else 1.0
+        bullet_speed = (
+            PLAYER_BULLET_SPEED * self.game_state.active_powerups.bullet_speed_multiplier
         )
 
-        self.game_state.player_bullets.append(
-            {
-                "x": self.game_state.player_x,
-                "y": self.game_state.player_y,
-                "direction": angle,
-                "speed": bullet_speed,
-            }
+        self.game_state.player_bullets.add(
+            x=self.game_state.player_x,
+            y=self.game_state.player_y,
+            vx=math.cos(angle) * bullet_speed,
+            vy=math.sin(angle) * bullet_speed,
         )
 
     def _create_spread_shot(self, center_angle: float, num_bullets: int) -> None:
@@ -0,0 +1,285 @@
+import struct
+from typing import Dict, Tuple
+import numpy as np
+from constants import BULLET_OVERFLOW_POLICY
+
+
+class EntityStore:
+    """Structure-of-arrays storage: one NumPy column per field"""
+
+    FIELDS: Dict[str, type] = {}
+    # Fields that default to another field's value when a row is added
+    MIRRORED_FIELDS: Dict[str, str] = {"prev_x": "x", "prev_y": "y"}
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.count: int = 0
+        self.capacity: int = capacity
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()
+        }
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        # Views over the live rows, so in-place updates write through
+        return self._columns[field][: self.count]
+
+    def __setitem__(self, field: str, values) -> None:
+        self._columns[field][: self.count] = values
+
+    def add(self, **values) -> int:
+        self._mirror_fields(values)
+        self._ensure_capacity(self.count + 1)
+        index = self.count
+        for name, column in self._columns.items():
+            column[index] = values.get(name, 0)
+        self.count += 1
+        return index
+
+    def add_many(self, n: int, **values) -> None:
+        """Append n rows; each value may be a scalar or a length-n array"""
+        if n <= 0:
+            return
+        self._mirror_fields(values)
+        self._ensure_capacity(self.count + n)
+        rows = slice(self.count, self.count + n)
+        for name, column in self._columns.items():
+            column[rows] = values.get(name, 0)
+        self.count += n
+
+    def remove(self, mask: np.ndarray) -> int:
+        """Drop rows where mask is True, keeping the order of the survivors"""
+        if not mask.any():
+            return 0
+        keep = ~mask
+        remaining = int(keep.sum())
+        for column in self._columns.values():
+            column[:remaining] = column[: self.count][keep]
+        removed = self.count - remaining
+        self.count = remaining
+        return removed
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def pack(self) -> bytes:
+        """Row count followed by the raw live rows of each column, in FIELDS order"""
+        parts = [struct.pack("<I", self.count)]
+        parts.extend(self._columns[name][: self.count].tobytes() for name in self.FIELDS)
+        return b"".join(parts)
+
+    def unpack(self, data: bytes, offset: int = 0) -> int:
+        """Replace every row with a pack() result; returns the end offset"""
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        self.count = 0
+        self._ensure_capacity(count)
+        for name, dtype in self.FIELDS.items():
+            self._columns[name][:count] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += count * np.dtype(dtype).itemsize
+        self.count = count
+        return offset
+
+    def store_previous_positions(self) -> None:
+        """Remember this tick's positions for render interpolation"""
+        self["prev_x"] = self["x"]
+        self["prev_y"] = self["y"]
+
+    def interpolated_positions(self, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+        prev_x = self["prev_x"]
+        prev_y = self["prev_y"]
+        return (
+            prev_x + (self["x"] - prev_x) * alpha,
+            prev_y + (self["y"] - prev_y) * alpha,
+        )
+
+    def _mirror_fields(self, values: Dict) -> None:
+        for field, source in self.MIRRORED_FIELDS.items():
+            if field in self._columns and field not in values:
+                values[field] = values.get(source, 0)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(self.capacity * 2, needed)
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.count] = column[: self.count]
+            self._columns[name] = grown
+        self.capacity = capacity
+
+
+class BulletStore(EntityStore):
+    """Fixed-capacity bullet pool with swap-with-last removal.
+
+    Rows are preallocated, so spawning never allocates. When the pool is full
+    the overflow policy either overwrites the oldest live bullet
+    ("drop_oldest") or refuses the new one ("refuse").
+    """
+
+    # type_id is the registry.ENEMIES id of an enemy bullet's source, unused
+    # for the player
+    FIELDS = {
+        "x": np.float64,
+        "y": np.float64,
+        "prev_x": np.float64,
+        "prev_y": np.float64,
+        "vx": np.float64,
+        "vy": np.float64,
+        "type_id": np.int16,
+        "spawn_serial": np.int64,
+    }
+
+    OVERFLOW_POLICIES = ("drop_oldest", "refuse")
+
+    def __init__(
+        self, capacity: int, overflow_policy: str = BULLET_OVERFLOW_POLICY
+    ) -> None:
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown bullet overflow policy: {overflow_policy}")
+        super().__init__(capacity)
+        self.overflow_policy = overflow_policy
+
+        self._next_serial: int = 0
+        self.high_water: int = 0
+        self.dropped: int = 0
+        self.refused: int = 0
+
+    def add(
+        self,
+        x: float = 0.0,
+        y: float = 0.0,
+        vx: float = 0.0,
+        vy: float = 0.0,
+        type_id: int = 0,
+    ) -> int:
+        """Acquire a row in O(1); returns its index, or -1 if refused"""
+        if self.count < self.capacity:
+            index = self.count
+            self.count += 1
+            if self.count > self.high_water:
+                self.high_water = self.count
+        elif self.overflow_policy == "refuse":
+            self.refused += 1
+            return -1
+        else:
+            index = int(np.argmin(self["spawn_serial"]))
+            self.dropped += 1
+
+        columns = self._columns
+        columns["x"][index] = x
+        columns["y"][index] = y
+        columns["prev_x"][index] = x
+        columns["prev_y"][index] = y
+        columns["vx"][index] = vx
+        columns["vy"][index] = vy
+        columns["type_id"][index] = type_id
+        columns["spawn_serial"][index] = self._next_serial
+        self._next_serial += 1
+        return index
+
+    def add_many(self, n: int, **values) -> None:
+        if n <= 0:
+            return
+
+        overflow = self.count + n - self.capacity
+        if overflow > 0:
+            if self.overflow_policy == "refuse":
+                self.refused += overflow
+                n -= overflow
+                values = {
+                    name: value[:n] if np.ndim(value) else value
+                    for name, value in values.items()
+                }
+            else:
+                evicted = min(overflow, self.count)
+                if evicted:
+                    oldest = np.argpartition(self["spawn_serial"], evicted - 1)[:evicted]
+                    mask = np.zeros(self.count, dtype=bool)
+                    mask[oldest] = True
+                    self.remove(mask)
+                # More new rows than the pool holds: the earliest are dropped too
+                skipped = n - self.capacity if n > self.capacity else 0
+                if skipped:
+                    n -= skipped
+                    values = {
+                        name: value[skipped:] if np.ndim(value) else value
+                        for name, value in values.items()
+                    }
+                self.dropped += evicted + skipped
+            if n <= 0:
+                return
+        self._append(n, values)
+
+    def _append(self, n: int, values: Dict) -> None:
+        """Add n rows that are known to fit, stamping their spawn serials"""
+        values["spawn_serial"] = np.arange(self._next_serial, self._next_serial + n)
+        self._next_serial += n
+        EntityStore.add_many(self, n, **values)
+        self.high_water = max(self.high_water, self.count)
+
+    def release(self, index: int) -> None:
+        """Free one row in O(1) by moving the last live row into it"""
+        last = self.count - 1
+        if index != last:
+            for column in self._columns.values():
+                column[index] = column[last]
+        self.count = last
+
+    def remove(self, mask: np.ndarray) -> int:
+        """Bulk swap-remove: survivors from the tail fill the freed rows"""
+        removed = int(np.count_nonzero(mask))
+        if not removed:
+            return 0
+        remaining = self.count - removed
+        holes = np.flatnonzero(mask[:remaining])
+        movers = np.flatnonzero(~mask[remaining:]) + remaining
+        if len(holes):
+            for column in self._columns.values():
+                column[holes] = column[movers]
+        self.count = remaining
+        return removed
+
+    def pack(self) -> bytes:
+        # The serial counter decides which bullets drop_oldest evicts later
+        return struct.pack("<q", self._next_serial) + super().pack()
+
+    def unpack(self, data: bytes, offset: int = 0) -> int:
+        (self._next_serial,) = struct.unpack_from("<q", data, offset)
+        return super().unpack(data, offset + 8)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "live": self.count,
+            "capacity": self.capacity,
+            "high_water": self.high_water,
+            "dropped": self.dropped,
+            "refused": self.refused,
+        }
+
+    def _ensure_capacity(self, needed: int) -> None:
+        # The pool never grows; add/add_many apply the overflow policy instead
+        if needed > self.capacity:
+            raise OverflowError("Bullet pool capacity exceeded")
+
+    def integrate(self, delta_time: float) -> None:
+        self["x"] += self["vx"] * delta_time
+        self["y"] += self["vy"] * delta_time
+
+    def out_of_bounds(self, width: float, height: float) -> np.ndarray:
+        x = self["x"]
+        y = self["y"]
+        return (x < 0) | (x > width) | (y < 0) | (y > height)
+
+
+class EnemyStore(EntityStore):
+    FIELDS = {
+        "x": np.float64,
+        "y": np.float64,
+        "prev_x": np.float64,
+        "prev_y": np.float64,
+        "hp": np.int32,
+        "type_id": np.int16,
+        "attack_cooldown": np.float64,
+    }
@@ -0,0 +1,169 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from constants import MAP_TILE_SIZE
+from map_generator import MapGenerator, TILE_WALL
+
+UNREACHABLE = 1 << 30
+
+# Orthogonal steps first, so a diagonal only wins when it is strictly closer
+_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class FlowField:
+    """Tile distances to the player shared by every enemy.
+
+    The field is a breadth-first search over the walkable tiles from the
+    player's tile. It is only recomputed when the player moves to another tile
+    or the map changes, so per-tick cost does not depend on the enemy count;
+    enemies just look up the next tile to head for.
+    """
+
+    def __init__(self, map_generator: MapGenerator) -> None:
+        self.map_generator = map_generator
+        height, width = map_generator.grid.shape
+
+        self.distance = np.full((height, width), UNREACHABLE, dtype=np.int32)
+        # Pixel centre of the neighbouring tile one step closer to the target
+        self.next_x = np.zeros((height, width), dtype=np.float64)
+        self.next_y = np.zeros((height, width), dtype=np.float64)
+        # Tiles with no closer neighbour: the target tile and cut-off regions
+        self.direct = np.ones((height, width), dtype=bool)
+
+        self.recomputes: int = 0
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._map_version: Optional[int] = None
+        self._neighbours: List[List[int]] = []
+
+    def update(self, target_x: float, target_y: float) -> bool:
+        """Recompute the field if the target changed tiles; True if it did"""
+        tile_x, tile_y = self.map_generator.pixel_to_tile(target_x, target_y)
+        height, width = self.distance.shape
+        tile_x = min(max(tile_x, 0), width - 1)
+        tile_y = min(max(tile_y, 0), height - 1)
+
+        key = (self.map_generator.layer_version, tile_x, tile_y)
+        if key == self._key:
+            return False
+
+        if self._map_version != self.map_generator.layer_version:
+            self._build_neighbours()
+            self._map_version = self.map_generator.layer_version
+        self._search(tile_y * width + tile_x)
+        self._build_steps()
+        self._key = key
+        self.recomputes += 1
+        return True
+
+    def steer(
+        self, xs: np.ndarray, ys: np.ndarray, target_x: float, target_y: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Point each position should move toward to reach the target"""
+        self.update(target_x, target_y)
+        height, width = self.distance.shape
+        tile_x = np.clip((xs / MAP_TILE_SIZE).astype(np.intp), 0, width - 1)
+        tile_y = np.clip((ys / MAP_TILE_SIZE).astype(np.intp), 0, height - 1)
+
+        # In the target's tile, or with no path, head straight for the target
+        direct = self.direct[tile_y, tile_x]
+        goal_x = np.where(direct, target_x, self.next_x[tile_y, tile_x])
+        goal_y = np.where(direct, target_y, self.next_y[tile_y, tile_x])
+        return goal_x, goal_y
+
+    def _build_neighbours(self) -> None:
+        grid = self.map_generator.grid
+        height, width = grid.shape
+        walkable = (grid != TILE_WALL).ravel().tolist()
+
+        neighbours: List[List[int]] = []
+        for index in range(height * width):
+            x, y = index % width, index // width
+            neighbours.append(
+                [
+                    (y + step_y) * width + x + step_x
+                    for step_x, step_y in _STEPS[:4]
+                    if 0 <= x + step_x < width
+                    and 0 <= y + step_y < height
+                    and walkable[(y + step_y) * width + x + step_x]
+                ]
+            )
+        self._neighbours = neighbours
+
+    def _search(self, start: int) -> None:
+        neighbours = self._neighbours
+        distance = [UNREACHABLE] * len(neighbours)
+        distance[start] = 0
+
+        frontier = [start]
+        step = 0
+        while frontier:
+            step += 1
+            next_frontier = []
+            for index in frontier:
+                for neighbour in neighbours[index]:
+                    if distance[neighbour] == UNREACHABLE:
+                        distance[neighbour] = step
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        self.distance[:] = np.array(distance, dtype=np.int32).reshape(self.distance.shape)
+
+    def _build_steps(self) -> None:
+        walkable = self.map_generator.grid != TILE_WALL
+        self.next_x[:], self.next_y[:], self.direct[:] = flow_steps(walkable, self.distance)
+
+
+def search_stacked(
+    walkable: np.ndarray, target_x: np.ndarray, target_y: np.ndarray
+) -> np.ndarray:
+    """Tile distances to one target per map for a stack of maps at once.
+
+    The search grows every frontier by one ring per iteration, so it finds
+    the same distances as FlowField._search does for each map on its own.
+    """
+    layers = np.arange(len(walkable))
+    distance = np.full(walkable.shape, UNREACHABLE, dtype=np.int32)
+    distance[layers, target_y, target_x] = 0
+    frontier = np.zeros(walkable.shape, dtype=bool)
+    frontier[layers, target_y, target_x] = True
+
+    step = 0
+    while frontier.any():
+        step += 1
+        grown = np.zeros_like(frontier)
+        grown[:, 1:, :] |= frontier[:, :-1, :]
+        grown[:, :-1, :] |= frontier[:, 1:, :]
+        grown[:, :, 1:] |= frontier[:, :, :-1]
+        grown[:, :, :-1] |= frontier[:, :, 1:]
+        frontier = grown & walkable & (distance == UNREACHABLE)
+        distance[frontier] = step
+    return distance
+
+
+def flow_steps(
+    walkable: np.ndarray, distance: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pixel centre of the closest neighbouring tile and the direct flags, for
+    one (height, width) map or a stack of them"""
+    height, width = distance.shape[-2:]
+    padding = [(0, 0)] * (distance.ndim - 2) + [(1, 1), (1, 1)]
+    walkable = np.pad(walkable, padding, constant_values=False)
+    padded = np.pad(distance, padding, constant_values=UNREACHABLE)
+
+    best = distance.copy()
+    best_x = np.zeros(distance.shape, dtype=np.intp)
+    best_y = np.zeros(distance.shape, dtype=np.intp)
+    for step_x, step_y in _STEPS:
+        candidate = padded[..., 1 + step_y : 1 + step_y + height, 1 + step_x : 1 + step_x + width]
+        better = candidate < best
+        if step_x and step_y:
+            # No cutting corners past a wall
+            better &= walkable[..., 1 : 1 + height, 1 + step_x : 1 + step_x + width]
+            better &= walkable[..., 1 + step_y : 1 + step_y + height, 1 : 1 + width]
+        best = np.where(better, candidate, best)
+        best_x[better] = step_x
+        best_y[better] = step_y
+
+    tile_y, tile_x = np.indices((height, width))
+    next_x = (tile_x + best_x) * MAP_TILE_SIZE + MAP_TILE_SIZE / 2
+    next_y = (tile_y + best_y) * MAP_TILE_SIZE + MAP_TILE_SIZE / 2
+    return next_x, next_y, (best_x == 0) & (best_y == 0)
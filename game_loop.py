@@ -1,17 +1,17 @@
-import random
 import time
-import math
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Sequence
+import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from constants import (
     WINDOW_WIDTH,
     WINDOW_HEIGHT,
+    SIMULATION_TICK_RATE,
+    MAX_CATCH_UP_TICKS,
     WAVE_DURATION,
-    WAVE_CONFIGS,
-    ENEMY_TYPES,
-    POWERUP_TYPES,
     PLAYER_BULLET_COLOR,
+    SPAWN_EXCLUSION_RADIUS,
+    REWIND_STEP_SECONDS,
 )
 from game_state import GameState
 from player import Player
@@ -20,6 +20,55 @@ from ui import UI
 from collision_manager import CollisionManager
 from controls import Controls
 from map_generator import MapGenerator
+from status_writer import StatusWriter
+from profiler import FrameProfiler
+from flow_field import FlowField
+from physics import TileCollider
+from snapshot import RewindBuffer
+from registry import ENEMIES, POWERUPS, WAVES
+
+# Power-ups spawn every uniform(*POWERUP_SPAWN_INTERVAL) seconds while fewer
+# than MAX_AVAILABLE_POWERUPS are waiting to be picked up
+POWERUP_SPAWN_INTERVAL = (10.0, 20.0)
+MAX_AVAILABLE_POWERUPS = 3
+
+
+def update_enemy_attacks(
+    enemies, enemy_bullets, delta_time: float, columns: Sequence[str] = ()
+) -> None:
+    """Count down attack cooldowns and fire every bullet of the attack
+    pattern of each enemy that is ready, enemy by enemy. Melee attacks are
+    handled in collision detection. The enemy columns named in columns are
+    copied to each of its bullets."""
+    cooldowns = enemies["attack_cooldown"]
+    cooldowns -= delta_time
+    attacking = np.flatnonzero(cooldowns <= 0)
+    if not len(attacking):
+        return
+    attack_types = enemies["type_id"][attacking]
+    cooldowns[attacking] = ENEMIES.attack_cooldown[attack_types]
+
+    counts = ENEMIES.attack_count[attack_types]
+    shooters = np.repeat(attacking, counts)
+    if not len(shooters):
+        return
+
+    # Position of each bullet within its enemy's run of angles
+    run_offsets = np.arange(len(shooters)) - np.repeat(np.cumsum(counts) - counts, counts)
+    angles = ENEMIES.attack_angles[
+        np.repeat(ENEMIES.attack_start[attack_types], counts) + run_offsets
+    ]
+    type_ids = enemies["type_id"][shooters]
+    speed = ENEMIES.bullet_speed[type_ids]
+    enemy_bullets.add_many(
+        len(shooters),
+        x=enemies["x"][shooters],
+        y=enemies["y"][shooters],
+        vx=np.cos(angles) * speed,
+        vy=np.sin(angles) * speed,
+        type_id=type_ids,
+        **{name: enemies[name][shooters] for name in columns},
+    )
 
 
 class GameLoop:
@@ -31,6 +80,10 @@ class GameLoop:
         ui: UI,
         collision_manager: CollisionManager,
         controls: Controls,
+        clock: Callable[[], float] = time.time,
+        status_writer: Optional[StatusWriter] = None,
+        profiler: Optional[FrameProfiler] = None,
+        rewind_buffer: Optional[RewindBuffer] = None,
     ) -> None:
         self.game_state = game_state
         self.player = player
@@ -38,201 +91,288 @@ class GameLoop:
         self.ui = ui
         self.collision_manager = collision_manager
         self.controls = controls
-
-        self.enemy_spawn_timer = 0.0
-        self.powerup_spawn_timer = 0.0
+        self.clock = clock
+        # Without a writer the terminal status panel is not built at all
+        self.status_writer = status_writer
+        # Set by InputRecorder.attach; sees every completed tick
+        self.recorder = None
+        self.rewind_buffer = rewind_buffer
+        if rewind_buffer is not None:
+            controls.on_rewind = lambda: self.rewind(REWIND_STEP_SECONDS)
+        self.tick_count = 0
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        # Enemies path around walls along one shared field toward the player
+        self.flow_field = FlowField(game_state.map_generator)
+        self.collider = TileCollider(game_state.map_generator)
+
+        self.game_state.last_frame_time = self.clock()
+
+        # Fixed timestep: real time accumulates and is consumed in whole ticks;
+        # display() blends the last two ticks by the leftover fraction
+        self.fixed_delta_time = 1.0 / SIMULATION_TICK_RATE
+        self.accumulator = 0.0
+        self.interpolation_alpha = 1.0
+
+        self.frame_ticks_run = 0
+        self.frame_ticks_dropped = 0
+        self.timestep_stats: Dict[str, int] = {
+            "frames": 0,
+            "ticks_run": 0,
+            "ticks_dropped": 0,
+        }
 
         self._update_terminal_status()
 
     def display(self) -> None:
-        glClear(GL_COLOR_BUFFER_BIT)
-
-        self.game_state.map_generator.draw()
+        profiler = self.profiler
+        with profiler.section("display"):
+            self.render.clear()
 
-        if not self.game_state.game_over:
-            self.player.draw(self.game_state.player_x, self.game_state.player_y)
+            with profiler.section("MapGenerator.draw"):
+                self.game_state.map_generator.draw()
 
-            glColor3f(*PLAYER_BULLET_COLOR)
-            for bullet in self.game_state.player_bullets:
-                self.render.draw_circle(bullet["x"], bullet["y"], 3)
+            if not self.game_state.game_over:
+                with profiler.section("draw_entities"):
+                    self._draw_entities()
 
-            for enemy in self.game_state.enemies:
-                glColor3f(*ENEMY_TYPES[enemy["type"]]["color"])
-                self.render.draw_circle(
-                    enemy["x"], enemy["y"], ENEMY_TYPES[enemy["type"]]["size"]
+            with profiler.section("draw_ui_chrome"):
+                self.render.draw_layer(
+                    "ui_chrome", self.game_state.is_paused, self._draw_ui_chrome
                 )
 
-            for bullet in self.game_state.enemy_bullets:
-                glColor3f(*ENEMY_TYPES[bullet["source"]]["color"])
-                self.render.draw_circle(bullet["x"], bullet["y"], 2)
+            with profiler.section("Render.flush"):
+                self.render.flush()
+            with profiler.section("Render.present"):
+                self.render.present()
+
+    def _draw_entities(self) -> None:
+        alpha = self.interpolation_alpha
+        prev_x = self.game_state.prev_player_x
+        prev_y = self.game_state.prev_player_y
+        self.player.draw(
+            prev_x + (self.game_state.player_x - prev_x) * alpha,
+            prev_y + (self.game_state.player_y - prev_y) * alpha,
+        )
 
-            for powerup in self.game_state.available_powerups:
-                glColor3f(*POWERUP_TYPES[powerup["type"]]["color"])
-                self.render.draw_circle(
-                    powerup["x"], powerup["y"], POWERUP_TYPES[powerup["type"]]["size"]
-                )
+        self.render.set_color(*PLAYER_BULLET_COLOR)
+        xs, ys = self.game_state.player_bullets.interpolated_positions(alpha)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.render.draw_circle(x, y, 3)
+
+        enemies = self.game_state.enemies
+        colors = ENEMIES.colors
+        sizes = ENEMIES.size.tolist()
+        xs, ys = enemies.interpolated_positions(alpha)
+        for x, y, type_id in zip(
+            xs.tolist(), ys.tolist(), enemies["type_id"].tolist()
+        ):
+            self.render.set_color(*colors[type_id])
+            self.render.draw_circle(x, y, sizes[type_id])
+
+        bullets = self.game_state.enemy_bullets
+        xs, ys = bullets.interpolated_positions(alpha)
+        for x, y, type_id in zip(
+            xs.tolist(), ys.tolist(), bullets["type_id"].tolist()
+        ):
+            self.render.set_color(*colors[type_id])
+            self.render.draw_circle(x, y, 2)
+
+        sizes = POWERUPS.size.tolist()
+        for powerup in self.game_state.available_powerups:
+            type_id = powerup["type_id"]
+            self.render.set_color(*POWERUPS.colors[type_id])
+            self.render.draw_circle(powerup["x"], powerup["y"], sizes[type_id])
 
+    def _draw_ui_chrome(self) -> None:
         self.ui.draw_restart_button(30, WINDOW_HEIGHT - 30)
         self.ui.draw_pause_play_button(
             WINDOW_WIDTH // 2 - 10, WINDOW_HEIGHT - 30, self.game_state.is_paused
         )
         self.ui.draw_cross_button(WINDOW_WIDTH - 50, WINDOW_HEIGHT - 30)
 
-        glutSwapBuffers()
-
     def update(self, value: int) -> None:
-        current_time = time.time()
+        current_time = self.clock()
+
+        with self.profiler.section("update"):
+            if not self.game_state.game_over:
+                if not self.game_state.is_paused:
+                    # Only update game logic when not paused
+                    self.accumulator += current_time - self.game_state.last_frame_time
+                    self._run_fixed_ticks()
+                    self.game_state.last_frame_time = current_time
+                else:
+                    # When unpausing, update the last frame time to prevent large delta
+                    self.game_state.last_frame_time = current_time
+
+                with self.profiler.section("update_terminal_status"):
+                    self._update_terminal_status()
+
+        glutPostRedisplay()
+        glutTimerFunc(16, self.update, 0)
+
+    def _run_fixed_ticks(self) -> None:
+        ticks_run = 0
+        while (
+            self.accumulator >= self.fixed_delta_time
+            and ticks_run < MAX_CATCH_UP_TICKS
+            and not self.game_state.game_over
+        ):
+            self.step(self.fixed_delta_time)
+            self.accumulator -= self.fixed_delta_time
+            ticks_run += 1
+
+        # Drop whole ticks we could not catch up on instead of spiralling
+        ticks_dropped = int(self.accumulator // self.fixed_delta_time)
+        self.accumulator -= ticks_dropped * self.fixed_delta_time
+
+        self.interpolation_alpha = self.accumulator / self.fixed_delta_time
 
-        if not self.game_state.game_over:
-            if not self.game_state.is_paused:
-                # Only update game logic when not paused
-                delta_time = current_time - self.game_state.last_frame_time
+        self.frame_ticks_run = ticks_run
+        self.frame_ticks_dropped = ticks_dropped
+        self.timestep_stats["frames"] += 1
+        self.timestep_stats["ticks_run"] += ticks_run
+        self.timestep_stats["ticks_dropped"] += ticks_dropped
 
-                self.game_state.wave_timer -= delta_time
-                if self.game_state.wave_timer <= 0:
-                    self._advance_wave()
+    def step(self, delta_time: float) -> None:
+        """Advance the simulation by delta_time seconds without touching GL"""
+        profiler = self.profiler
+        with profiler.section("step"):
+            self._store_previous_positions()
 
+            self.game_state.wave_timer -= delta_time
+            if self.game_state.wave_timer <= 0:
+                self._advance_wave()
+
+            with profiler.section("Controls.update_movement"):
                 self.controls.update_movement(delta_time)
 
+            with profiler.section("_update_bullets"):
                 self._update_bullets(delta_time)
 
+            with profiler.section("_update_enemies"):
                 self._update_enemies(delta_time)
 
+            with profiler.section("_handle_enemy_spawning"):
                 self._handle_enemy_spawning(delta_time)
 
+            with profiler.section("_update_powerups"):
                 self._update_powerups(delta_time)
 
+            with profiler.section("CollisionManager.check_all_collisions"):
                 self.collision_manager.check_all_collisions()
 
-                self.game_state.last_frame_time = current_time
-            else:
-                # When unpausing, update the last frame time to prevent large delta
-                self.game_state.last_frame_time = current_time
-
-            self._update_terminal_status()
-
-        glutPostRedisplay()
-        glutTimerFunc(16, self.update, 0)
+        self.tick_count += 1
+        if self.recorder is not None:
+            self.recorder.on_tick(self.tick_count, self.game_state)
+        if self.rewind_buffer is not None:
+            self.rewind_buffer.on_tick(self.tick_count)
+
+    def rewind(self, seconds: float) -> bool:
+        """Go back to the latest snapshot at least seconds of game time ago"""
+        if self.rewind_buffer is None:
+            return False
+        target = self.tick_count - int(round(seconds / self.fixed_delta_time))
+        restored = self.rewind_buffer.rewind(target)
+        if restored is None:
+            return False
+        self.tick_count = restored
+        self.accumulator = 0.0
+        self.interpolation_alpha = 1.0
+        return True
+
+    def _store_previous_positions(self) -> None:
+        self.game_state.prev_player_x = self.game_state.player_x
+        self.game_state.prev_player_y = self.game_state.player_y
+        self.game_state.player_bullets.store_previous_positions()
+        self.game_state.enemy_bullets.store_previous_positions()
+        self.game_state.enemies.store_previous_positions()
 
     def _update_bullets(self, delta_time: float) -> None:
-        for bullet in self.game_state.player_bullets[:]:
-            bullet["x"] += math.cos(bullet["direction"]) * bullet["speed"] * delta_time
-            bullet["y"] += math.sin(bullet["direction"]) * bullet["speed"] * delta_time
-
-            # Remove bullets that are out of window bounds
-            is_player_bullet_out_of_bounds = (
-                bullet["x"] < 0
-                or bullet["x"] > WINDOW_WIDTH
-                or bullet["y"] < 0
-                or bullet["y"] > WINDOW_HEIGHT
-            )
-            if is_player_bullet_out_of_bounds:
-                self.game_state.player_bullets.remove(bullet)
-
-        for bullet in self.game_state.enemy_bullets[:]:
-            bullet["x"] += math.cos(bullet["direction"]) * bullet["speed"] * delta_time
-            bullet["y"] += math.sin(bullet["direction"]) * bullet["speed"] * delta_time
-
-            is_enemy_bullet_out_of_bounds = (
-                bullet["x"] < 0
-                or bullet["x"] > WINDOW_WIDTH
-                or bullet["y"] < 0
-                or bullet["y"] > WINDOW_HEIGHT
+        map_generator = self.game_state.map_generator
+        for bullets in (self.game_state.player_bullets, self.game_state.enemy_bullets):
+            start_x = bullets["x"].copy()
+            start_y = bullets["y"].copy()
+            bullets.integrate(delta_time)
+
+            # Remove bullets that left the window or flew into a wall this tick
+            blocked = map_generator.segment_hits_wall(
+                start_x, start_y, bullets["x"], bullets["y"]
             )
-
-            if is_enemy_bullet_out_of_bounds:
-                self.game_state.enemy_bullets.remove(bullet)
+            bullets.remove(blocked | bullets.out_of_bounds(WINDOW_WIDTH, WINDOW_HEIGHT))
 
     def _update_enemies(self, delta_time: float) -> None:
-        for enemy in self.game_state.enemies[:]:
-            dx = self.game_state.player_x - enemy["x"]
-            dy = self.game_state.player_y - enemy["y"]
-            distance = math.sqrt(dx * dx + dy * dy)
-
-            if distance > 0:
-                speed = ENEMY_TYPES[enemy["type"]]["speed"]
-                speed *= WAVE_CONFIGS[self.game_state.current_wave]["speed_multiplier"]
-
-                enemy["x"] += (dx / distance) * speed * delta_time
-                enemy["y"] += (dy / distance) * speed * delta_time
-
-            enemy["attack_cooldown"] -= delta_time
-            if enemy["attack_cooldown"] <= 0:
-                self._handle_enemy_attack(enemy)
-                enemy["attack_cooldown"] = ENEMY_TYPES[enemy["type"]]["attack_cooldown"]
-
-    def _handle_enemy_attack(self, enemy: Dict) -> None:
-        attack_type = ENEMY_TYPES[enemy["type"]]["attack_type"]
-
-        if attack_type == "melee":
-            # Melee attacks are handled in collision detection
-            pass
-        elif attack_type == "single_shot":
-            self._create_enemy_bullet(enemy, 0)
-        elif attack_type == "double_shot":
-            self._create_enemy_bullet(enemy, 0)
-            self._create_enemy_bullet(enemy, math.pi)
-        elif attack_type == "quad_shot":
-            for i in range(4):
-                angle = i * math.pi / 2
-                self._create_enemy_bullet(enemy, angle)
-        elif attack_type == "burst_shot":
-            for i in range(8):
-                angle = i * math.pi / 4
-                self._create_enemy_bullet(enemy, angle)
-
-    def _create_enemy_bullet(self, enemy: Dict, angle: float) -> None:
-        self.game_state.enemy_bullets.append(
-            {
-                "x": enemy["x"],
-                "y": enemy["y"],
-                "direction": angle,
-                "speed": ENEMY_TYPES[enemy["type"]]["bullet_speed"],
-                "source": enemy["type"],
-            }
+        enemies = self.game_state.enemies
+        if not len(enemies):
+            return
+
+        goal_x, goal_y = self.flow_field.steer(
+            enemies["x"], enemies["y"], self.game_state.player_x, self.game_state.player_y
         )
+        dx = goal_x - enemies["x"]
+        dy = goal_y - enemies["y"]
+        distance = np.sqrt(dx * dx + dy * dy)
+
+        type_ids = enemies["type_id"]
+        speed = ENEMIES.speed[type_ids] * WAVES.speed_multiplier[self.game_state.current_wave]
+
+        moving = distance > 0
+        distance[~moving] = 1.0
+        half_sizes = ENEMIES.half_size[type_ids]
+        enemies["x"], enemies["y"], _, _ = self.collider.move(
+            enemies["x"],
+            enemies["y"],
+            half_sizes,
+            half_sizes,
+            np.where(moving, (dx / distance) * speed * delta_time, 0.0),
+            np.where(moving, (dy / distance) * speed * delta_time, 0.0),
+        )
+
+        update_enemy_attacks(enemies, self.game_state.enemy_bullets, delta_time)
 
     def _handle_enemy_spawning(self, delta_time: float) -> None:
-        self.enemy_spawn_timer -= delta_time
-        if self.enemy_spawn_timer <= 0:
-            wave_config = WAVE_CONFIGS[self.game_state.current_wave]
-            self.enemy_spawn_timer = wave_config["spawn_rate"]
-
-            enemy_type = random.choice(wave_config["enemies"])
-            spawn_pos = self.game_state.map_generator.get_random_floor_position()
-
-            self.game_state.enemies.append(
-                {
-                    "type": enemy_type,
-                    "x": spawn_pos[0],
-                    "y": spawn_pos[1],
-                    "hp": ENEMY_TYPES[enemy_type]["hp"],
-                    "attack_cooldown": 0,
-                }
+        self.game_state.enemy_spawn_timer -= delta_time
+        if self.game_state.enemy_spawn_timer <= 0:
+            wave = self.game_state.current_wave
+            self.game_state.enemy_spawn_timer = WAVES.spawn_rate[wave].item()
+
+            type_id = self.game_state.rng.choice(WAVES.enemy_ids[wave])
+            spawn_pos = self.game_state.map_generator.get_random_floor_position(
+                exclude=(self.game_state.player_x, self.game_state.player_y),
+                radius=SPAWN_EXCLUSION_RADIUS,
+                rng=self.game_state.rng,
+            )
+
+            self.game_state.enemies.add(
+                type_id=type_id,
+                x=spawn_pos[0],
+                y=spawn_pos[1],
+                hp=ENEMIES.hp[type_id],
+                attack_cooldown=0,
             )
 
     def _update_powerups(self, delta_time: float) -> None:
-        for powerup in self.game_state.active_powerups[:]:
-            powerup["duration"] -= delta_time
-            if powerup["duration"] <= 0:
-                self.game_state.active_powerups.remove(powerup)
+        self.game_state.active_powerups.update(delta_time)
 
         # Spawn new powerups
-        self.powerup_spawn_timer -= delta_time
-        if self.powerup_spawn_timer <= 0:
-            self.powerup_spawn_timer = random.uniform(10.0, 20.0)
+        self.game_state.powerup_spawn_timer -= delta_time
+        if self.game_state.powerup_spawn_timer <= 0:
+            self.game_state.powerup_spawn_timer = self.game_state.rng.uniform(
+                *POWERUP_SPAWN_INTERVAL
+            )
 
-            if len(self.game_state.available_powerups) < 3:
-                powerup_type = random.choice(list(POWERUP_TYPES.keys()))
-                spawn_pos = self.game_state.map_generator.get_random_floor_position()
+            if len(self.game_state.available_powerups) < MAX_AVAILABLE_POWERUPS:
+                type_id = self.game_state.rng.randrange(len(POWERUPS))
+                spawn_pos = self.game_state.map_generator.get_random_floor_position(
+                    rng=self.game_state.rng
+                )
 
                 self.game_state.available_powerups.append(
-                    {"type": powerup_type, "x": spawn_pos[0], "y": spawn_pos[1]}
+                    {"type_id": type_id, "x": spawn_pos[0], "y": spawn_pos[1]}
                 )
 
     def _advance_wave(self) -> None:
         self.game_state.current_wave += 1
-        if self.game_state.current_wave > 4:
+        if self.game_state.current_wave > WAVES.count:
             self.game_state.game_over = True
             grade_info = self._calculate_grade()
             print(
@@ -255,9 +395,11 @@ class GameLoop:
         return GRADE_THRESHOLDS[0]  # Return F if below all thresholds
 
     def _update_terminal_status(self) -> None:
-        """Update terminal display only when game state changes"""
+        """Hand the status panel to the background writer"""
+        if self.status_writer is None:
+            return
+
         status = (
-            f"\033[2J\033[H"  # Clear screen and move cursor to top
             f"Academic Status:\n"
             f"================\n"
             f"Academic Comebacks (Lives): {self.game_state.lives}\n"
@@ -268,9 +410,11 @@ class GameLoop:
             f"Active Power-ups:\n"
         )
 
-        if self.game_state.active_powerups:
-            for powerup in self.game_state.active_powerups:
-                status += f"- {powerup['type']}: {powerup['duration']:.1f}s remaining\n"
+        active_powerups = self.game_state.active_powerups
+        if active_powerups:
+            for powerup in active_powerups:
+                remaining = active_powerups.remaining(powerup)
+                status += f"- {powerup['type']}: {remaining:.1f}s remaining\n"
         else:
             status += "- None\n"
 
@@ -282,4 +426,4 @@ class GameLoop:
                 f"Performance: {grade_info['description']}\n"
             )
 
-        print(status, end="")
+        self.status_writer.submit(status)
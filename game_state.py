@@ -1,16 +1,25 @@
+import random
 from typing import List, Dict, Optional
 from constants import (
     WINDOW_WIDTH, WINDOW_HEIGHT, INITIAL_LIVES, 
-    PLAYER_SPEED, PLAYER_SIZE, WAVE_DURATION
+    PLAYER_SPEED, PLAYER_SIZE, WAVE_DURATION,
+    MAX_PLAYER_BULLETS, MAX_ENEMY_BULLETS
 )
+from entity_store import BulletStore, EnemyStore
+from powerup_manager import PowerupManager
 import time
 
 
 class GameState:
-    def __init__(self, player=None, map_generator=None) -> None:
+    def __init__(self, player=None, map_generator=None, seed: Optional[int] = None) -> None:
         # Instances
         self.player = player
         self.map_generator = map_generator
+
+        # All gameplay randomness comes from this seeded generator, so a run
+        # is reproducible from the seed and the player's input
+        self.seed: int = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
         
         # Game status
         self.score: int = 0
@@ -28,17 +37,20 @@ class GameState:
         # Player state
         self.player_x: float = WINDOW_WIDTH // 2
         self.player_y: float = WINDOW_HEIGHT // 2
+        self.prev_player_x: float = self.player_x
+        self.prev_player_y: float = self.player_y
         self.player_speed: float = PLAYER_SPEED
         self.player_size: int = PLAYER_SIZE
-        self.player_bullets: List[Dict[str, float]] = []
+        self.player_bullets: BulletStore = BulletStore(MAX_PLAYER_BULLETS)
 
         # Enemy state
-        self.enemies: List[Dict] = []
-        self.enemy_bullets: List[Dict] = []
+        self.enemies: EnemyStore = EnemyStore()
+        self.enemy_bullets: BulletStore = BulletStore(MAX_ENEMY_BULLETS)
         self.enemy_spawn_timer: float = 0
+        self.powerup_spawn_timer: float = 0
 
         # Power-ups
-        self.active_powerups: List[Dict] = []
+        self.active_powerups: PowerupManager = PowerupManager()
         self.available_powerups: List[Dict] = []
         
         # Movement state
@@ -53,7 +65,10 @@ class GameState:
         # Keep both player and map_generator instances when resetting
         player = self.player
         map_generator = self.map_generator
-        self.__init__(player, map_generator)
+        seed, rng = self.seed, self.rng
+        self.__init__(player, map_generator, seed)
+        # Carry on with the same random stream rather than restarting it
+        self.rng = rng
 
     def update_pause_time(self, raw_current_time: float) -> None:
         if self.is_paused:
@@ -66,9 +81,3 @@ class GameState:
                 self.pause_start_time = 0
                 self.last_frame_time = raw_current_time  # Reset frame time
                 print("Game Resumed")
-
-    def get_active_powerup(self, effect_type: str) -> Optional[Dict]:
-        return next(
-            (p for p in self.active_powerups if p["effect"] == effect_type),
-            None
-        )
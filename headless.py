@@ -0,0 +1,220 @@
+import argparse
+import contextlib
+import cProfile
+import math
+import os
+import pstats
+import random
+import sys
+import time
+from typing import Dict, Iterator, Optional
+
+from constants import (
+    SIMULATION_TICK_RATE,
+    WAVE_CONFIGS,
+    WAVE_DURATION,
+    REWIND_CAPACITY,
+    REWIND_INTERVAL_TICKS,
+)
+from game_state import GameState
+from player import Player
+from render import Render
+from ui import UI
+from controls import Controls
+from collision_manager import CollisionManager
+from game_loop import GameLoop
+from map_generator import MapGenerator
+from profiler import FrameProfiler
+from render_target import FramebufferTarget, load_ppm
+from snapshot import RewindBuffer, load_snapshot, save_snapshot
+
+
+def full_run_ticks(delta_time: float) -> int:
+    """A tick budget long enough for a surviving player to finish every wave.
+
+    Each wave runs until its timer drops to zero or below, and the fractional
+    tick at the end of one wave is not carried into the next, so a wave takes
+    ceil(WAVE_DURATION / delta_time) ticks, plus one when rounding leaves the
+    timer just above zero. One more tick per wave is slack."""
+    return len(WAVE_CONFIGS) * (math.ceil(WAVE_DURATION / delta_time) + 2)
+
+
+class HeadlessSimulation:
+    """Runs GameLoop.step on a simulated clock without a window or GL context"""
+
+    def __init__(
+        self,
+        delta_time: float = 1.0 / SIMULATION_TICK_RATE,
+        seed: Optional[int] = None,
+        map_seed: Optional[int] = None,
+        verbose: bool = False,
+        profiler: Optional[FrameProfiler] = None,
+        render_target=None,
+        rewind: bool = False,
+    ) -> None:
+        if seed is not None:
+            random.seed(seed)
+
+        self.delta_time = delta_time
+        self.verbose = verbose
+        self.sim_time: float = 0.0
+        self.ticks: int = 0
+
+        # Nothing below issues GL calls until something is drawn, and nothing
+        # at all with a FramebufferTarget
+        self.render = Render(target=render_target)
+        self.player = Player(self.render)
+        self.map_generator = MapGenerator(self.render, seed=map_seed)
+        self.game_state = GameState(self.player, self.map_generator, seed)
+        self.ui = UI(self.render)
+        self.controls = Controls(self.game_state, self.ui)
+        self.collision_manager = CollisionManager(self.game_state)
+        # Only needed when something presses the rewind key, as a replay may
+        rewind_buffer = None
+        if rewind and REWIND_CAPACITY:
+            rewind_buffer = RewindBuffer(self.game_state, REWIND_CAPACITY, REWIND_INTERVAL_TICKS)
+
+        with self.output():
+            self.game_loop = GameLoop(
+                self.game_state,
+                self.player,
+                self.render,
+                self.ui,
+                self.collision_manager,
+                self.controls,
+                clock=self.clock,
+                profiler=profiler,
+                rewind_buffer=rewind_buffer,
+            )
+
+    def clock(self) -> float:
+        return self.sim_time
+
+    def tick(self) -> None:
+        self.game_loop.step(self.delta_time)
+        self.sim_time += self.delta_time
+        self.game_state.last_frame_time = self.sim_time
+        self.ticks += 1
+
+    def run(self, max_ticks: int) -> Dict:
+        start = time.perf_counter()
+        with self.output():
+            while self.ticks < max_ticks and not self.game_state.game_over:
+                self.tick()
+        elapsed = time.perf_counter() - start
+
+        return {
+            "ticks": self.ticks,
+            "sim_seconds": self.sim_time,
+            "wall_seconds": elapsed,
+            "ticks_per_second": self.ticks / elapsed if elapsed > 0 else float("inf"),
+            "score": self.game_state.score,
+            "lives": self.game_state.lives,
+            "wave": self.game_state.current_wave,
+            "game_over": self.game_state.game_over,
+            "player_bullet_pool": self.game_state.player_bullets.get_stats(),
+            "enemy_bullet_pool": self.game_state.enemy_bullets.get_stats(),
+        }
+
+    @contextlib.contextmanager
+    def output(self) -> Iterator[None]:
+        # Game events are printed; silence them unless asked for
+        if self.verbose:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the game simulation headless")
+    parser.add_argument(
+        "--dt", type=float, default=1.0 / SIMULATION_TICK_RATE, help="fixed delta_time"
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=None,
+        help="max ticks to run (default: a full run of every semester)",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--map-seed", type=int, default=None, help="default: drawn from --seed"
+    )
+    parser.add_argument("--verbose", action="store_true", help="show game events")
+    parser.add_argument("--profile", action="store_true", help="print cProfile stats")
+    parser.add_argument(
+        "--trace", default=None, help="write a per-phase Chrome trace to this path"
+    )
+    parser.add_argument(
+        "--snapshot", default=None, help="render the final frame to this PPM file"
+    )
+    parser.add_argument(
+        "--golden", default=None, help="compare the final frame with this PPM file"
+    )
+    parser.add_argument(
+        "--resume", default=None, help="start from a game state checkpoint file"
+    )
+    parser.add_argument(
+        "--checkpoint", default=None, help="save the final game state to this file"
+    )
+    args = parser.parse_args()
+
+    max_ticks = args.ticks
+    if max_ticks is None:
+        max_ticks = full_run_ticks(args.dt)
+
+    frame_profiler = FrameProfiler(enabled=args.trace is not None)
+    framebuffer = FramebufferTarget() if args.snapshot or args.golden else None
+    simulation = HeadlessSimulation(
+        args.dt,
+        seed=args.seed,
+        map_seed=args.map_seed,
+        verbose=args.verbose,
+        profiler=frame_profiler,
+        render_target=framebuffer,
+    )
+    if args.resume:
+        load_snapshot(simulation.game_state, args.resume)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    result = simulation.run(max_ticks)
+    if profiler:
+        profiler.disable()
+
+    print(
+        f"Simulated {result['ticks']} ticks ({result['sim_seconds']:.1f}s game time) "
+        f"in {result['wall_seconds']:.3f}s: {result['ticks_per_second']:.0f} ticks/s\n"
+        f"Score: {result['score']}  Lives: {result['lives']}  "
+        f"Semester: {result['wave']}  Game over: {result['game_over']}\n"
+        f"Player bullet pool: {result['player_bullet_pool']}\n"
+        f"Enemy bullet pool: {result['enemy_bullet_pool']}"
+    )
+
+    if args.checkpoint:
+        save_snapshot(simulation.game_state, args.checkpoint)
+        print(f"Game state written to {args.checkpoint}")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+    if frame_profiler.enabled:
+        frame_profiler.export_chrome_trace(args.trace)
+        print(frame_profiler.format_summary())
+
+    if framebuffer is not None:
+        simulation.game_loop.display()
+        if args.snapshot:
+            framebuffer.save_ppm(args.snapshot)
+            print(f"Final frame written to {args.snapshot}")
+        if args.golden:
+            mismatched = framebuffer.diff(load_ppm(args.golden))
+            print(f"{mismatched} pixel(s) differ from {args.golden}")
+            if mismatched:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,10 @@ class Initializer:
     @staticmethod
     def init_game(game_loop: GameLoop, controls: Controls) -> None:
         glutInit()
+        # freeglut's default is to exit() on glutLeaveMainLoop or window close,
+        # which would skip the shutdown code after glutMainLoop in main
+        if bool(glutSetOption):
+            glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
         glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB)
         glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
         glutCreateWindow(b"Versity'r Pera")
@@ -1,3 +1,5 @@
+import contextlib
+
 from OpenGL.GLUT import *
 
 from game_state import GameState
@@ -9,26 +11,68 @@ from collision_manager import CollisionManager
 from game_loop import GameLoop
 from initializer import Initializer
 from map_generator import MapGenerator
+from map_cache import MapCache
+from status_writer import StatusWriter
+from profiler import FrameProfiler
+from replay import InputRecorder
+from snapshot import RewindBuffer
+from constants import (
+    PROFILER_TRACE_PATH,
+    REPLAY_RECORD_PATH,
+    REPLAY_HASH_EVERY_TICK,
+    REWIND_CAPACITY,
+    REWIND_INTERVAL_TICKS,
+)
 
 
 def main() -> None:
     render = Render()
     player = Player(render)
-    map_generator = MapGenerator(render)
+    map_generator = MapGenerator(render, cache=MapCache())
     
     game_state = GameState(player, map_generator)
-    ui = UI()
+    ui = UI(render)
 
-    controls = Controls(game_state, ui)
+    controls = Controls(game_state, ui, on_quit=glutLeaveMainLoop)
     collision_manager = CollisionManager(game_state)
+    status_writer = StatusWriter().start()
+    profiler = FrameProfiler()
+    rewind_buffer = None
+    if REWIND_CAPACITY:
+        rewind_buffer = RewindBuffer(game_state, REWIND_CAPACITY, REWIND_INTERVAL_TICKS)
 
     game_loop = GameLoop(
         game_state, player, render, ui, 
-        collision_manager, controls
+        collision_manager, controls,
+        status_writer=status_writer,
+        profiler=profiler,
+        rewind_buffer=rewind_buffer
     )
 
+    recorder = None
+    if REPLAY_RECORD_PATH:
+        recorder = InputRecorder(
+            REPLAY_RECORD_PATH,
+            game_state.seed,
+            map_generator.seed,
+            game_loop.fixed_delta_time,
+            REPLAY_HASH_EVERY_TICK,
+        ).attach(game_loop)
+
     Initializer.init_game(game_loop, controls)
-    glutMainLoop()
+    try:
+        # Game messages are printed; keep them inside the status panel so
+        # they never scroll it
+        with contextlib.redirect_stdout(status_writer.events):
+            glutMainLoop()
+    finally:
+        if recorder is not None:
+            recorder.close()
+        # Flushes the last status panel and joins the writer thread
+        status_writer.stop()
+        if profiler.enabled:
+            profiler.export_chrome_trace(PROFILER_TRACE_PATH)
+            print(profiler.format_summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from constants import (
+    MAP_TILE_SIZE,
+    MAP_MIN_ROOMS,
+    MAP_MAX_ROOMS,
+    MAP_MIN_ROOM_SIZE,
+    MAP_MAX_ROOM_SIZE,
+    MAP_SEED_COUNT,
+    MAP_CACHE_DIR,
+)
+from map_generator import MapGenerator, Room
+from render import Render
+
+# Bump whenever MapGenerator changes what a seed produces
+GENERATOR_VERSION = 1
+
+MAGIC = b"VMAP"
+FORMAT_VERSION = 1
+# magic, format version, config hash, seed, width, height, room count
+_HEADER = struct.Struct("<4sH8sQHHH")
+# x, y, width, height
+_ROOM = struct.Struct("<4H")
+
+
+def config_hash() -> bytes:
+    """Fingerprint of everything that decides which map a seed produces"""
+    params = (
+        GENERATOR_VERSION,
+        MAP_TILE_SIZE,
+        MAP_MIN_ROOMS,
+        MAP_MAX_ROOMS,
+        MAP_MIN_ROOM_SIZE,
+        MAP_MAX_ROOM_SIZE,
+    )
+    return hashlib.sha1(repr(params).encode("ascii")).digest()[:8]
+
+
+def encode_map(seed: int, grid: np.ndarray, rooms: List[Room]) -> bytes:
+    height, width = grid.shape
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, config_hash(), seed, width, height, len(rooms))]
+    parts.append(np.ascontiguousarray(grid, dtype=np.uint8).tobytes())
+    parts.extend(_ROOM.pack(room.x, room.y, room.width, room.height) for room in rooms)
+    return b"".join(parts)
+
+
+def decode_map(data: bytes) -> Tuple[int, np.ndarray, List[Room]]:
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated map header")
+    magic, version, fingerprint, seed, width, height, room_count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a map file of this format version")
+    if fingerprint != config_hash():
+        raise ValueError("Map was generated with different MAP_* settings")
+
+    grid_end = _HEADER.size + width * height
+    if len(data) != grid_end + room_count * _ROOM.size:
+        raise ValueError("Map file size does not match its header")
+
+    grid = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=_HEADER.size)
+    rooms = [
+        Room(*_ROOM.unpack_from(data, grid_end + index * _ROOM.size))
+        for index in range(room_count)
+    ]
+    return seed, grid.reshape(height, width), rooms
+
+
+class MapCache:
+    """Generated maps on disk, one small binary file per seed.
+
+    Files live in a subdirectory named after config_hash(), so changing any
+    generation setting starts an empty cache instead of serving stale maps.
+    """
+
+    def __init__(self, directory: str = MAP_CACHE_DIR, write_through: bool = True) -> None:
+        self.directory = os.path.join(directory, config_hash().hex())
+        self.write_through = write_through
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def path(self, seed: int) -> str:
+        return os.path.join(self.directory, f"{seed}.map")
+
+    def seeds(self) -> Set[int]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return set()
+        return {int(name[:-4]) for name in names if name.endswith(".map")}
+
+    def load(self, seed: int) -> Optional[Tuple[np.ndarray, List[Room]]]:
+        try:
+            with open(self.path(seed), "rb") as map_file:
+                stored_seed, grid, rooms = decode_map(map_file.read())
+        except (OSError, ValueError, struct.error):
+            # Missing or unreadable; the caller generates the map instead
+            self.misses += 1
+            return None
+        if stored_seed != seed:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return grid, rooms
+
+    def store(self, seed: int, grid: np.ndarray, rooms: List[Room]) -> None:
+        if self.write_through:
+            self.write(seed, encode_map(seed, grid, rooms))
+
+    def write(self, seed: int, data: bytes) -> None:
+        # Write then rename, so a reader never sees a half-written map
+        temp_path = f"{self.path(seed)}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as map_file:
+                map_file.write(data)
+            os.replace(temp_path, self.path(seed))
+        except OSError:
+            # A read-only or full disk only costs the cache, not the game
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def _generate_encoded(seed: int) -> Tuple[int, bytes]:
+    generator = MapGenerator(Render(), seed=seed)
+    return seed, encode_map(seed, generator.grid, generator.rooms)
+
+
+def pregenerate(
+    cache: MapCache, seeds: List[int], workers: Optional[int] = None
+) -> int:
+    """Generate seeds in a process pool and write them into cache"""
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(seeds) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for seed, data in executor.map(_generate_encoded, seeds, chunksize=chunksize):
+            cache.write(seed, data)
+    return len(seeds)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate maps into the map cache")
+    parser.add_argument("--directory", default=MAP_CACHE_DIR)
+    parser.add_argument("--start", type=int, default=0, help="first seed")
+    parser.add_argument("--count", type=int, default=MAP_SEED_COUNT)
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--force", action="store_true", help="regenerate cached seeds")
+    args = parser.parse_args(argv)
+
+    cache = MapCache(args.directory)
+    seeds = range(args.start, args.start + args.count)
+    if not args.force:
+        cached = cache.seeds()
+        seeds = [seed for seed in seeds if seed not in cached]
+
+    start = time.perf_counter()
+    generated = pregenerate(cache, list(seeds), args.workers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Generated {generated} map(s) into {cache.directory} in {elapsed:.2f}s "
+        f"({args.count - generated} already cached)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
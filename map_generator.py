@@ -1,5 +1,7 @@
+import math
 import random
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+import numpy as np
 from OpenGL.GL import *
 from render import Render
 from constants import (
@@ -9,8 +11,52 @@ from constants import (
     MAP_MIN_ROOM_SIZE,
     MAP_MAX_ROOM_SIZE,
     MAP_COLORS,
+    MAP_SEED_COUNT,
 )
 
+TILE_FLOOR = 0
+TILE_WALL = 1
+
+# Indexed by tile id
+TILE_NAMES = ("FLOOR", "WALL")
+TILE_IDS = {name: tile_id for tile_id, name in enumerate(TILE_NAMES)}
+
+
+class TileRow:
+    __slots__ = ("_row",)
+
+    def __init__(self, row: np.ndarray) -> None:
+        self._row = row
+
+    def __getitem__(self, x: int) -> str:
+        return TILE_NAMES[self._row.item(x)]
+
+    def __setitem__(self, x: int, name: str) -> None:
+        self._row[x] = TILE_IDS[name]
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __iter__(self) -> Iterator[str]:
+        return (TILE_NAMES[tile_id] for tile_id in self._row.tolist())
+
+
+class TileView:
+    """String view over the uint8 tile grid, so tiles[y][x] reads and writes
+    tile names as before"""
+
+    def __init__(self, grid: np.ndarray) -> None:
+        self._grid = grid
+
+    def __getitem__(self, y: int) -> TileRow:
+        return TileRow(self._grid[y])
+
+    def __len__(self) -> int:
+        return len(self._grid)
+
+    def __iter__(self) -> Iterator[TileRow]:
+        return (TileRow(row) for row in self._grid)
+
 
 class Room:
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -29,38 +75,167 @@ class Room:
         )
 
 
+def lookup_tiles(
+    grid: np.ndarray,
+    tile_x: np.ndarray,
+    tile_y: np.ndarray,
+    layer: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Tile ids at tile coordinates; out of bounds reads as WALL. grid is one
+    (height, width) map, or a stack of maps with layer picking each lookup's"""
+    height, width = grid.shape[-2:]
+    inside = (tile_x >= 0) & (tile_x < width) & (tile_y >= 0) & (tile_y < height)
+    tiles = np.full(tile_x.shape, TILE_WALL, dtype=np.uint8)
+    if layer is None:
+        tiles[inside] = grid[tile_y[inside], tile_x[inside]]
+    else:
+        tiles[inside] = grid[layer[inside], tile_y[inside], tile_x[inside]]
+    return tiles
+
+
+def trace_segments(
+    grid: np.ndarray,
+    x0: np.ndarray,
+    y0: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray,
+    layer: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Whether each segment from (x0, y0) to (x1, y1) enters a wall tile.
+
+    The end tile is a plain lookup. Segments that cross more than one tile
+    boundary also walk the tiles in between with an Amanatides-Woo
+    traversal, run for all of them at once, one tile step per iteration.
+    grid and layer are as for lookup_tiles.
+    """
+    x0 = np.asarray(x0, dtype=np.float64)
+    y0 = np.asarray(y0, dtype=np.float64)
+    x1 = np.asarray(x1, dtype=np.float64)
+    y1 = np.asarray(y1, dtype=np.float64)
+
+    tile_x = np.floor(x0 / MAP_TILE_SIZE).astype(np.intp)
+    tile_y = np.floor(y0 / MAP_TILE_SIZE).astype(np.intp)
+    end_x = np.floor(x1 / MAP_TILE_SIZE).astype(np.intp)
+    end_y = np.floor(y1 / MAP_TILE_SIZE).astype(np.intp)
+    hits = lookup_tiles(grid, end_x, end_y, layer) == TILE_WALL
+
+    # Tiles strictly between start and end, for the segments that have any
+    between = np.abs(end_x - tile_x) + np.abs(end_y - tile_y) - 1
+    walking = np.flatnonzero((between > 0) & ~hits)
+    if not len(walking):
+        return hits
+
+    tile_x, tile_y, between = tile_x[walking], tile_y[walking], between[walking]
+    if layer is not None:
+        layer = layer[walking]
+    dx = x1[walking] - x0[walking]
+    dy = y1[walking] - y0[walking]
+    step_x = np.sign(dx).astype(np.intp)
+    step_y = np.sign(dy).astype(np.intp)
+
+    # Segment parameter t in [0, 1] at the next tile boundary on each axis
+    with np.errstate(divide="ignore", invalid="ignore"):
+        boundary_x = (tile_x + (step_x > 0)) * MAP_TILE_SIZE
+        boundary_y = (tile_y + (step_y > 0)) * MAP_TILE_SIZE
+        t_max_x = np.where(dx != 0, (boundary_x - x0[walking]) / dx, np.inf)
+        t_max_y = np.where(dy != 0, (boundary_y - y0[walking]) / dy, np.inf)
+        t_delta_x = np.where(dx != 0, MAP_TILE_SIZE / np.abs(dx), np.inf)
+        t_delta_y = np.where(dy != 0, MAP_TILE_SIZE / np.abs(dy), np.inf)
+
+    blocked = np.zeros(len(walking), dtype=bool)
+    active = np.arange(len(walking))
+    while len(active):
+        along_x = t_max_x[active] < t_max_y[active]
+        moved_x, moved_y = active[along_x], active[~along_x]
+        tile_x[moved_x] += step_x[moved_x]
+        t_max_x[moved_x] += t_delta_x[moved_x]
+        tile_y[moved_y] += step_y[moved_y]
+        t_max_y[moved_y] += t_delta_y[moved_y]
+
+        layer_active = layer[active] if layer is not None else None
+        blocked[active] = (
+            lookup_tiles(grid, tile_x[active], tile_y[active], layer_active) == TILE_WALL
+        )
+        between[active] -= 1
+        active = active[(between[active] > 0) & ~blocked[active]]
+
+    hits[walking] = blocked
+    return hits
+
+
 class MapGenerator:
-    def __init__(self, render: Render):
+    """Builds a map from a seed, so the same seed always gives the same map.
+
+    With a MapCache, maps already on disk are loaded instead of generated,
+    and newly generated ones are written back.
+    """
+
+    def __init__(self, render: Render, seed: Optional[int] = None, cache=None):
         self.render = render
+        self.cache = cache
+        self.seed: int = 0
+        self.rng = random.Random()
         self.rooms: List[Room] = []
-        self.tiles: List[List[str]] = []
         self.width = 32
         self.height = 18
-        self.generate_map()
-
-    def generate_map(self) -> None:
+        # grid[y, x] holds a tile id; tiles is the string view of the same data
+        self.grid = np.full((self.height, self.width), TILE_FLOOR, dtype=np.uint8)
+        self.tiles = TileView(self.grid)
+        # Centres of the floor tiles inside rooms, rebuilt by generate_map
+        self.floor_positions = np.empty((0, 2), dtype=np.intp)
+        self._eligible_key: Optional[Tuple[int, int, float]] = None
+        self._eligible_positions = self.floor_positions
+        # Bumped on every generate_map so the retained wall layer is rebuilt
+        self.layer_version = 0
+        self.generate_map(seed)
+
+    def generate_map(self, seed: Optional[int] = None) -> None:
+        """Switch to the map for seed, or for a random seed when None"""
+        if seed is None:
+            # A bounded seed space lets a pre-generated cache cover every map
+            seed = random.randrange(MAP_SEED_COUNT)
+        self.seed = seed
+
+        cached = self.cache.load(seed) if self.cache is not None else None
+        if cached is not None:
+            self.set_map(seed, *cached)
+            return
+
+        self.rng = random.Random(seed)
+        self._generate()
+        if self.cache is not None:
+            self.cache.store(seed, self.grid, self.rooms)
+
+        self._build_floor_index()
+        self.layer_version += 1
+
+    def set_map(self, seed: int, grid: np.ndarray, rooms: List[Room]) -> None:
+        """Switch to an already generated map, e.g. from the cache or a snapshot"""
+        self.seed = seed
+        self.grid[:] = grid
+        self.rooms = rooms
+        self._build_floor_index()
+        self.layer_version += 1
+
+    def _generate(self) -> None:
         self.rooms = []
-        num_rooms = random.randint(MAP_MIN_ROOMS, MAP_MAX_ROOMS)
+        num_rooms = self.rng.randint(MAP_MIN_ROOMS, MAP_MAX_ROOMS)
 
         # Initialize all tiles as FLOOR instead of WALL
-        self.tiles = [["FLOOR" for _ in range(self.width)] for _ in range(self.height)]
+        self.grid.fill(TILE_FLOOR)
 
         # Add border walls
-        for x in range(self.width):
-            self.tiles[0][x] = "WALL"
-            self.tiles[self.height - 1][x] = "WALL"
-        for y in range(self.height):
-            self.tiles[y][0] = "WALL"
-            self.tiles[y][self.width - 1] = "WALL"
+        self.grid[[0, -1], :] = TILE_WALL
+        self.grid[:, [0, -1]] = TILE_WALL
 
         # Generate rooms
         attempts = 0
         while len(self.rooms) < num_rooms and attempts < 100:
-            room_width = random.randint(MAP_MIN_ROOM_SIZE, MAP_MAX_ROOM_SIZE)
-            room_height = random.randint(MAP_MIN_ROOM_SIZE, MAP_MAX_ROOM_SIZE)
+            room_width = self.rng.randint(MAP_MIN_ROOM_SIZE, MAP_MAX_ROOM_SIZE)
+            room_height = self.rng.randint(MAP_MIN_ROOM_SIZE, MAP_MAX_ROOM_SIZE)
 
-            x = random.randint(2, self.width - room_width - 2)
-            y = random.randint(2, self.height - room_height - 2)
+            x = self.rng.randint(2, self.width - room_width - 2)
+            y = self.rng.randint(2, self.height - room_height - 2)
 
             new_room = Room(x, y, room_width, room_height)
 
@@ -78,11 +253,11 @@ class MapGenerator:
 
     def _add_strategic_walls(self, room: Room) -> None:
         # Add some pillars and partial walls for cover
-        piller_count = random.randint(1, 5)  # Add random pillars per room
+        piller_count = self.rng.randint(1, 5)  # Add random pillars per room
         for _ in range(piller_count):
-            px = random.randint(room.x + 1, room.x + room.width - 2)
-            py = random.randint(room.y + 1, room.y + room.height - 2)
-            self.tiles[py][px] = "WALL"
+            px = self.rng.randint(room.x + 1, room.x + room.width - 2)
+            py = self.rng.randint(room.y + 1, room.y + room.height - 2)
+            self.grid[py, px] = TILE_WALL
 
     def _connect_all_rooms(self) -> None:
         # Connect each room to its nearest neighbor
@@ -111,65 +286,131 @@ class MapGenerator:
         x2, y2 = room2.center
 
         # Create a wider corridor
-        for x in range(min(x1, x2) - 1, max(x1, x2) + 2):
-            for y in range(y1 - 1, y1 + 2):
-                if 0 < y < self.height - 1 and 0 < x < self.width - 1:
-                    self.tiles[y][x] = "FLOOR"
+        self._carve(min(x1, x2) - 1, max(x1, x2) + 2, y1 - 1, y1 + 2)
+        self._carve(x2 - 1, x2 + 2, min(y1, y2) - 1, max(y1, y2) + 2)
 
-        for y in range(min(y1, y2) - 1, max(y1, y2) + 2):
-            for x in range(x2 - 1, x2 + 2):
-                if 0 < y < self.height - 1 and 0 < x < self.width - 1:
-                    self.tiles[y][x] = "FLOOR"
+    def _carve(self, x_start: int, x_end: int, y_start: int, y_end: int) -> None:
+        """Set a half-open block of tiles to FLOOR, leaving the border intact"""
+        x_start, x_end = max(x_start, 1), min(x_end, self.width - 1)
+        y_start, y_end = max(y_start, 1), min(y_end, self.height - 1)
+        if x_start < x_end and y_start < y_end:
+            self.grid[y_start:y_end, x_start:x_end] = TILE_FLOOR
 
     def draw(self) -> None:
-        for y in range(self.height):
-            for x in range(self.width):
-                tile_type = self.tiles[y][x]
-                glColor3f(*MAP_COLORS[tile_type])
+        self.render.draw_layer("walls", self.layer_version, self._draw_walls)
 
-                if tile_type == "WALL":
-                    self._draw_tile(x * MAP_TILE_SIZE, y * MAP_TILE_SIZE)
+    def _draw_walls(self) -> None:
+        self.render.set_color(*MAP_COLORS["WALL"])
+        for y, x in np.argwhere(self.grid == TILE_WALL).tolist():
+            self._draw_tile(x * MAP_TILE_SIZE, y * MAP_TILE_SIZE)
 
     def _draw_tile(self, x: int, y: int) -> None:
-        self.render.draw_line(x, y, x + MAP_TILE_SIZE, y)
-        self.render.draw_line(
+        self.render.draw_shape(
+            ("tile", MAP_TILE_SIZE), x, y, self._rasterize_tile
+        )
+
+    def _rasterize_tile(self) -> List[Tuple[float, float]]:
+        x, y = 0, 0
+        points: List[Tuple[float, float]] = []
+
+        points += self.render.rasterize_line(x, y, x + MAP_TILE_SIZE, y)
+        points += self.render.rasterize_line(
             x + MAP_TILE_SIZE, y, x + MAP_TILE_SIZE, y + MAP_TILE_SIZE
         )
-        self.render.draw_line(
+        points += self.render.rasterize_line(
             x + MAP_TILE_SIZE, y + MAP_TILE_SIZE, x, y + MAP_TILE_SIZE
         )
-        self.render.draw_line(x, y + MAP_TILE_SIZE, x, y)
+        points += self.render.rasterize_line(x, y + MAP_TILE_SIZE, x, y)
+        return points
 
-    def _convert_pixel_to_tile(self, x: float, y: float) -> Tuple[int, int]:
+    def pixel_to_tile(self, x: float, y: float) -> Tuple[int, int]:
         return int(x / MAP_TILE_SIZE), int(y / MAP_TILE_SIZE)
 
-    def _is_out_of_bounds(self, x: float, y: float) -> bool:
-        tile_x, tile_y = self._convert_pixel_to_tile(x, y)
-        return tile_x < 0 or tile_x >= self.width or tile_y < 0 or tile_y >= self.height
+    def _tile_at(self, x: float, y: float) -> int:
+        tile_x, tile_y = self.pixel_to_tile(x, y)
+        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
+            return self.grid.item(tile_y, tile_x)
+        return TILE_WALL
 
     def is_wall(self, x: float, y: float) -> bool:
-        tile_x, tile_y = self._convert_pixel_to_tile(x, y)
-        if self._is_out_of_bounds(x, y):
-            return True
-
-        is_wall = self.tiles[tile_y][tile_x] == "WALL"
-        return is_wall
-
-    def get_random_floor_position(self) -> Tuple[float, float]:
-        while True:
-            room = random.choice(self.rooms)
-            x = random.randint(room.x, room.x + room.width - 1)
-            y = random.randint(room.y, room.y + room.height - 1)
-            if self.tiles[y][x] == "FLOOR":
-                return (
-                    x * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
-                    y * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
-                )
+        return self._tile_at(x, y) == TILE_WALL
+
+    def segment_hits_wall(
+        self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray
+    ) -> np.ndarray:
+        """Whether each segment from (x0, y0) to (x1, y1) enters a wall tile"""
+        return trace_segments(self.grid, x0, y0, x1, y1)
+
+    def _build_floor_index(self) -> None:
+        in_room = np.zeros(self.grid.shape, dtype=bool)
+        for room in self.rooms:
+            in_room[room.y : room.y + room.height, room.x : room.x + room.width] = True
+
+        tile_y, tile_x = np.nonzero(in_room & (self.grid == TILE_FLOOR))
+        self.floor_positions = np.column_stack(
+            (
+                tile_x * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
+                tile_y * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
+            )
+        )
+        self._eligible_key = None
+        self._eligible_positions = self.floor_positions
+
+    def _floor_positions_outside(
+        self, exclude: Optional[Tuple[float, float]], radius: float
+    ) -> np.ndarray:
+        """Floor positions at least radius away from exclude. Tiles are
+        filtered against the centre of the tile containing exclude with the
+        radius padded by half a tile diagonal, which covers every point in
+        that tile. If no tile is that far, the farthest tiles are returned.
+        The last answer is cached, so repeated queries cost nothing until the
+        excluded point moves to another tile."""
+        if exclude is None or radius <= 0:
+            return self.floor_positions
+
+        tile_x, tile_y = self.pixel_to_tile(*exclude)
+        key = (tile_x, tile_y, radius)
+        if key != self._eligible_key:
+            center = (
+                tile_x * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
+                tile_y * MAP_TILE_SIZE + MAP_TILE_SIZE // 2,
+            )
+            padded = radius + math.hypot(MAP_TILE_SIZE / 2, MAP_TILE_SIZE / 2)
+            distance_sq = ((self.floor_positions - center) ** 2).sum(axis=1)
+            eligible = self.floor_positions[distance_sq >= padded * padded]
+            if not len(eligible):
+                # The radius covers every room; the farthest tiles are the
+                # best that can be done
+                eligible = self.floor_positions[distance_sq == distance_sq.max()]
+            self._eligible_positions = eligible
+            self._eligible_key = key
+        return self._eligible_positions
+
+    def get_random_floor_position(
+        self,
+        exclude: Optional[Tuple[float, float]] = None,
+        radius: float = 0.0,
+        rng: Optional[random.Random] = None,
+    ) -> Tuple[int, int]:
+        """Centre of a random floor tile inside a room, optionally not within
+        radius pixels of exclude"""
+        positions = self._floor_positions_outside(exclude, radius)
+        x, y = positions[(rng or random).randrange(len(positions))].tolist()
+        return x, y
+
+    def get_random_floor_positions(
+        self,
+        count: int,
+        exclude: Optional[Tuple[float, float]] = None,
+        radius: float = 0.0,
+        rng: Optional[random.Random] = None,
+    ) -> np.ndarray:
+        """count positions as an (count, 2) array, sampled with replacement"""
+        positions = self._floor_positions_outside(exclude, radius)
+        # One draw from rng seeds the NumPy generator, so the result still
+        # follows the caller's random stream
+        generator = np.random.default_rng((rng or random).getrandbits(64))
+        return positions[generator.integers(len(positions), size=count)]
 
     def get_tile_type(self, x: float, y: float) -> str:
-        tile_x, tile_y = self._convert_pixel_to_tile(x, y)
-
-        if self._is_out_of_bounds(x, y):
-            return "WALL"
-
-        return self.tiles[tile_y][tile_x]
+        return TILE_NAMES[self._tile_at(x, y)]
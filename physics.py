@@ -0,0 +1,202 @@
+from typing import Optional, Tuple, Union
+import math
+import numpy as np
+from constants import MAP_TILE_SIZE
+from map_generator import MapGenerator, TILE_WALL
+
+Extent = Union[float, np.ndarray]
+
+
+def wall_tables(grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Wall counts prefix-summed along each tile column and each tile row, so
+    "any wall in this run of tiles" is two lookups. column_walls[c, r] is the
+    number of walls in column c above row r; row_walls likewise."""
+    walls = (grid == TILE_WALL).astype(np.int32)
+    column_walls = np.zeros((walls.shape[1], walls.shape[0] + 1), dtype=np.int32)
+    np.cumsum(walls.T, axis=1, out=column_walls[:, 1:])
+    row_walls = np.zeros((walls.shape[0], walls.shape[1] + 1), dtype=np.int32)
+    np.cumsum(walls, axis=1, out=row_walls[:, 1:])
+    return column_walls, row_walls
+
+
+def move_boxes(
+    column_walls: np.ndarray,
+    row_walls: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    half_width: Extent,
+    half_height: Extent,
+    dx: np.ndarray,
+    dy: np.ndarray,
+    layer: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """TileCollider.move against wall_tables() output, or against stacks of
+    them for boxes spread over several maps, layer giving each box's map"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    half_width = np.broadcast_to(np.asarray(half_width, dtype=np.float64), x.shape)
+    half_height = np.broadcast_to(np.asarray(half_height, dtype=np.float64), x.shape)
+
+    new_x, blocked_x = sweep_axis(
+        x, half_width, np.asarray(dx, dtype=np.float64), y, half_height, column_walls, layer
+    )
+    new_y, blocked_y = sweep_axis(
+        y, half_height, np.asarray(dy, dtype=np.float64), new_x, half_width, row_walls, layer
+    )
+    return new_x, new_y, blocked_x, blocked_y
+
+
+class TileCollider:
+    """Moves axis-aligned boxes through the tile grid without tunneling.
+
+    Each axis is swept separately: every tile column (or row) the leading edge
+    crosses this tick is tested in order, and a box that meets a wall stops
+    flush against it. Boxes occupy the half-open span [x - half, x + half), so
+    a box resting against a wall does not overlap it. The grid edge blocks
+    like a wall. Any number of boxes are resolved in one batched call.
+    """
+
+    def __init__(self, map_generator: MapGenerator) -> None:
+        self.map_generator = map_generator
+        self._map_version: Optional[int] = None
+        # See wall_tables
+        self._column_walls = np.zeros((0, 0), dtype=np.int32)
+        self._row_walls = np.zeros((0, 0), dtype=np.int32)
+
+    def move(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        half_width: Extent,
+        half_height: Extent,
+        dx: np.ndarray,
+        dy: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """New centres and per-axis blocked flags after moving by (dx, dy)"""
+        self._refresh()
+        return move_boxes(
+            self._column_walls, self._row_walls, x, y, half_width, half_height, dx, dy
+        )
+
+    def move_one(
+        self,
+        x: float,
+        y: float,
+        half_width: float,
+        half_height: float,
+        dx: float,
+        dy: float,
+    ) -> Tuple[float, float]:
+        """move() for a single box in plain Python; for one body it is far
+        cheaper than a round trip through NumPy"""
+        self._refresh()
+        x = self._sweep_one(x, half_width, dx, y, half_height, self._column_walls)
+        y = self._sweep_one(y, half_height, dy, x, half_width, self._row_walls)
+        return x, y
+
+    def _sweep_one(
+        self,
+        position: float,
+        half: float,
+        delta: float,
+        cross_position: float,
+        cross_half: float,
+        lines: np.ndarray,
+    ) -> float:
+        if delta == 0:
+            return position
+        line_count, cross_count = lines.shape[0], lines.shape[1] - 1
+        tile = MAP_TILE_SIZE
+
+        cross_first = min(max(math.floor((cross_position - cross_half) / tile), 0), cross_count)
+        cross_end = min(max(math.ceil((cross_position + cross_half) / tile), 0), cross_count)
+
+        if delta > 0:
+            edge = position + half
+            lines_entered = range(math.ceil(edge / tile), math.ceil((edge + delta) / tile))
+        else:
+            edge = position - half
+            lines_entered = range(
+                math.floor(edge / tile) - 1, math.floor((edge + delta) / tile) - 1, -1
+            )
+
+        for line in lines_entered:
+            if (
+                line < 0
+                or line >= line_count
+                or lines.item(line, cross_end) - lines.item(line, cross_first) > 0
+            ):
+                return line * tile - half if delta > 0 else (line + 1) * tile + half
+        return position + delta
+
+    def _refresh(self) -> None:
+        if self._map_version == self.map_generator.layer_version:
+            return
+        self._column_walls, self._row_walls = wall_tables(self.map_generator.grid)
+        self._map_version = self.map_generator.layer_version
+
+
+def sweep_axis(
+    position: np.ndarray,
+    half: np.ndarray,
+    delta: np.ndarray,
+    cross_position: np.ndarray,
+    cross_half: np.ndarray,
+    lines: np.ndarray,
+    layer: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Move along one axis. lines[i] holds the prefix-summed walls of
+    tile line i across the other axis; with a stack of tables, layer picks
+    each box's."""
+    line_count, cross_count = lines.shape[-2], lines.shape[-1] - 1
+    tile = MAP_TILE_SIZE
+
+    # Tile span the box covers across the sweep, clipped to the grid
+    cross_first = np.clip(
+        np.floor((cross_position - cross_half) / tile), 0, cross_count
+    ).astype(np.intp)
+    cross_end = np.clip(
+        np.ceil((cross_position + cross_half) / tile), 0, cross_count
+    ).astype(np.intp)
+
+    forward = delta > 0
+    edge = np.where(forward, position + half, position - half)
+    target_edge = edge + delta
+    # First tile line the leading edge enters, and how many it enters
+    first = np.where(forward, np.ceil(edge / tile), np.floor(edge / tile) - 1).astype(np.intp)
+    last = np.where(
+        forward, np.ceil(target_edge / tile) - 1, np.floor(target_edge / tile)
+    ).astype(np.intp)
+    entered = np.where(forward, last - first + 1, first - last + 1)
+    entered[delta == 0] = 0
+    step = np.where(forward, 1, -1)
+
+    new_position = position + delta
+    blocked = np.zeros(position.shape, dtype=bool)
+    line = first
+    active = np.flatnonzero(entered > 0)
+    while len(active):
+        current = line[active]
+        outside = (current < 0) | (current >= line_count)
+        clipped = np.clip(current, 0, line_count - 1)
+        if layer is None:
+            end = lines[clipped, cross_end[active]]
+            start = lines[clipped, cross_first[active]]
+        else:
+            end = lines[layer[active], clipped, cross_end[active]]
+            start = lines[layer[active], clipped, cross_first[active]]
+        walls = (end - start) > 0
+        hit = active[outside | walls]
+        if len(hit):
+            # Stop flush against the near side of the blocking tile line
+            hit_line = line[hit]
+            new_position[hit] = np.where(
+                forward[hit], hit_line * tile - half[hit], (hit_line + 1) * tile + half[hit]
+            )
+            blocked[hit] = True
+
+        line[active] += step[active]
+        entered[active] -= 1
+        active = active[(entered[active] > 0) & ~blocked[active]]
+
+    return new_position, blocked
@@ -1,3 +1,4 @@
+from typing import List, Tuple
 from OpenGL.GL import *
 from render import Render
 from constants import PLAYER_COLOR, PLAYER_SIZE
@@ -9,32 +10,43 @@ class Player:
         self.size = PLAYER_SIZE
 
     def draw(self, x: float, y: float) -> None:
-        glColor3f(*PLAYER_COLOR)
-        
+        self.render.set_color(*PLAYER_COLOR)
+
+        # The figure is cached at the origin and snapped to the pixel grid
+        self.render.draw_shape(
+            ("player", self.size), int(x), int(y), self._rasterize_figure
+        )
+
+    def _rasterize_figure(self) -> List[Tuple[float, float]]:
+        x, y = 0, 0
+        points: List[Tuple[float, float]] = []
+
         # Head
         head_radius = self.size // 4
-        self.render.draw_circle(x, y + self.size - head_radius, head_radius)
-        
+        points += self.render.rasterize_circle(x, y + self.size - head_radius, head_radius)
+
         # Body
         body_start = y + self.size - (head_radius * 2)
         body_end = y + self.size // 2
-        self.render.draw_line(x, body_start, x, body_end)
-        
+        points += self.render.rasterize_line(x, body_start, x, body_end)
+
         # Arms
         arm_y = y + self.size - (head_radius * 2.5)
         arm_length = self.size // 3
         # Left arm
-        self.render.draw_line(x - arm_length, arm_y, x, arm_y)
+        points += self.render.rasterize_line(x - arm_length, arm_y, x, arm_y)
         # Right arm
-        self.render.draw_line(x, arm_y, x + arm_length, arm_y)
-        
+        points += self.render.rasterize_line(x, arm_y, x + arm_length, arm_y)
+
         # Legs
         leg_start = body_end
         leg_length = self.size // 2.5
         # Left leg
-        self.render.draw_line(x, leg_start, x - leg_length, y)
+        points += self.render.rasterize_line(x, leg_start, x - leg_length, y)
         # Right leg
-        self.render.draw_line(x, leg_start, x + leg_length, y)
+        points += self.render.rasterize_line(x, leg_start, x + leg_length, y)
+
+        return points
 
     def get_hitbox(self, x: float, y: float) -> dict:
         head_radius = self.size // 4
@@ -53,7 +65,7 @@ class Player:
         """Debug method to visualize the hitbox"""
         hitbox = self.get_hitbox(x, y)
         
-        glColor3f(1.0, 0.0, 0.0)  # Red color for hitbox
+        self.render.set_color(1.0, 0.0, 0.0)  # Red color for hitbox
         
         # Draw rectangular hitbox
         half_width = hitbox["width"] // 2
@@ -0,0 +1,90 @@
+import heapq
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from constants import POWERUP_TYPES
+from registry import POWERUPS
+
+
+class PowerupManager:
+    """Active power-ups keyed by effect, at most one per effect.
+
+    Activating a power-up stamps it with an absolute expiry time on the
+    manager's own clock and pushes that onto a min-heap, so update() only
+    advances the clock and pops what has run out. Replacing an effect leaves
+    its old heap entry behind; it is skipped when it reaches the top. The
+    combined modifiers are recomputed only when the active set changes.
+    """
+
+    def __init__(self) -> None:
+        self.time: float = 0.0
+        # Effect -> power-up dict, in activation order
+        self._active: Dict[str, Dict] = {}
+        # (expires_at, serial, effect); stale when the serial no longer matches
+        self._expiries: List[Tuple[float, int, str]] = []
+        self._serial: int = 0
+        self._refresh_modifiers()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._active.values()))
+
+    def get(self, effect: str) -> Optional[Dict]:
+        return self._active.get(effect)
+
+    def remaining(self, powerup: Dict) -> float:
+        return powerup["expires_at"] - self.time
+
+    def activate(self, type_id: int, expires_at: Optional[float] = None) -> Dict:
+        """Start power-up type_id, replacing any active one with the same effect"""
+        powerup_type = POWERUPS.names[type_id]
+        powerup = POWERUP_TYPES[powerup_type].copy()
+        powerup["type"] = powerup_type
+        powerup["type_id"] = type_id
+        if expires_at is None:
+            expires_at = self.time + powerup["duration"]
+        powerup["expires_at"] = expires_at
+        self._serial += 1
+        powerup["serial"] = self._serial
+
+        effect = powerup["effect"]
+        # Re-inserting moves the effect to the end of the activation order
+        self._active.pop(effect, None)
+        self._active[effect] = powerup
+        heapq.heappush(self._expiries, (expires_at, self._serial, effect))
+        self._refresh_modifiers()
+        return powerup
+
+    def update(self, delta_time: float) -> None:
+        self.time += delta_time
+        expiries = self._expiries
+        changed = False
+        while expiries and expiries[0][0] <= self.time:
+            _, serial, effect = heapq.heappop(expiries)
+            powerup = self._active.get(effect)
+            if powerup is not None and powerup["serial"] == serial:
+                del self._active[effect]
+                changed = True
+        if changed:
+            self._refresh_modifiers()
+
+    def restore(self, time: float, active: Iterable[Tuple[int, float]]) -> None:
+        """Replace the clock and the active set with (type id, expires_at)
+        pairs in activation order, as saved by a snapshot"""
+        self.time = time
+        self._active = {}
+        self._expiries = []
+        for type_id, expires_at in active:
+            self.activate(type_id, expires_at)
+        self._refresh_modifiers()
+
+    def _refresh_modifiers(self) -> None:
+        speed_boost = self._active.get("speed_boost")
+        self.movement_multiplier: float = speed_boost["multiplier"] if speed_boost else 1.0
+        bullet_speed = self._active.get("bullet_speed")
+        self.bullet_speed_multiplier: float = (
+            bullet_speed["multiplier"] if bullet_speed else 1.0
+        )
+        # Bullets per spread shot; 0 fires a single aimed bullet
+        spread_shot = self._active.get("spread_shot")
+        self.spread_bullets: int = spread_shot["bullets"] if spread_shot else 0
@@ -0,0 +1,137 @@
+import contextlib
+import json
+import time
+from typing import ContextManager, Dict, List
+import numpy as np
+from constants import PROFILER_CAPACITY, PROFILER_ENABLED
+
+# Shared no-op context so a disabled profiler allocates nothing per section
+_NULL_SECTION = contextlib.nullcontext()
+
+
+class _Section:
+    __slots__ = ("profiler", "phase_id", "start_ns")
+
+    def __init__(self, profiler: "FrameProfiler", phase_id: int) -> None:
+        self.profiler = profiler
+        self.phase_id = phase_id
+        self.start_ns = 0
+
+    def __enter__(self) -> None:
+        self.start_ns = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler._record(self.phase_id, self.start_ns, time.perf_counter_ns())
+
+
+class FrameProfiler:
+    """Times named phases with perf_counter_ns into a fixed-size ring buffer.
+
+    Once the buffer is full the oldest samples are overwritten, so it always
+    holds the most recent window of frames.
+    """
+
+    def __init__(
+        self, capacity: int = PROFILER_CAPACITY, enabled: bool = PROFILER_ENABLED
+    ) -> None:
+        self.enabled = enabled
+        self.capacity = capacity
+
+        self._phase_ids: Dict[str, int] = {}
+        self._phase_names: List[str] = []
+        self._sections: List[_Section] = []
+
+        self._phase = np.zeros(capacity, dtype=np.int32)
+        self._start = np.zeros(capacity, dtype=np.int64)
+        self._duration = np.zeros(capacity, dtype=np.int64)
+        self._cursor: int = 0
+        self._count: int = 0
+
+    def section(self, name: str) -> ContextManager:
+        if not self.enabled:
+            return _NULL_SECTION
+
+        phase_id = self._phase_ids.get(name)
+        if phase_id is None:
+            phase_id = len(self._phase_names)
+            self._phase_ids[name] = phase_id
+            self._phase_names.append(name)
+            self._sections.append(_Section(self, phase_id))
+
+        # Phases never nest inside themselves, so one reusable section each
+        return self._sections[phase_id]
+
+    def clear(self) -> None:
+        self._cursor = 0
+        self._count = 0
+
+    def _record(self, phase_id: int, start_ns: int, end_ns: int) -> None:
+        cursor = self._cursor
+        self._phase[cursor] = phase_id
+        self._start[cursor] = start_ns
+        self._duration[cursor] = end_ns - start_ns
+        self._cursor = (cursor + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _window(self) -> np.ndarray:
+        """Indices of the captured samples in recording order"""
+        if self._count < self.capacity:
+            return np.arange(self._count)
+        return (np.arange(self.capacity) + self._cursor) % self.capacity
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Sample count and p50/p95/p99/max duration in ms per phase"""
+        window = self._window()
+        phases = self._phase[window]
+        durations_ms = self._duration[window] / 1e6
+
+        result: Dict[str, Dict[str, float]] = {}
+        for phase_id, name in enumerate(self._phase_names):
+            samples = durations_ms[phases == phase_id]
+            if not len(samples):
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            result[name] = {
+                "count": int(len(samples)),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(samples.max()),
+            }
+        return result
+
+    def format_summary(self) -> str:
+        lines = [f"{'phase':<40}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name, stats in sorted(
+            self.summary().items(), key=lambda item: item[1]["p99_ms"], reverse=True
+        ):
+            lines.append(
+                f"{name:<40}{stats['count']:>8}{stats['p50_ms']:>10.3f}"
+                f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the captured window in Chrome trace event format"""
+        window = self._window()
+        origin = int(self._start[window].min()) if len(window) else 0
+
+        events = [
+            {
+                "name": self._phase_names[phase_id],
+                "ph": "X",
+                "ts": (start - origin) / 1e3,
+                "dur": duration / 1e3,
+                "pid": 0,
+                "tid": 0,
+            }
+            for phase_id, start, duration in zip(
+                self._phase[window].tolist(),
+                self._start[window].tolist(),
+                self._duration[window].tolist(),
+            )
+        ]
+
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
@@ -0,0 +1,210 @@
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from constants import ENEMY_TYPES, POWERUP_TYPES, WAVE_CONFIGS
+
+# Bullet directions fired by each attack_type; melee attacks are handled in
+# collision detection
+ATTACK_PATTERNS: Dict[str, Tuple[float, ...]] = {
+    "melee": (),
+    "single_shot": (0,),
+    "double_shot": (0, math.pi),
+    "quad_shot": tuple(i * math.pi / 2 for i in range(4)),
+    "burst_shot": tuple(i * math.pi / 4 for i in range(8)),
+}
+ATTACK_PATTERN_NAMES: Tuple[str, ...] = tuple(ATTACK_PATTERNS)
+MELEE = ATTACK_PATTERN_NAMES.index("melee")
+
+Color = Tuple[float, float, float]
+
+
+def _column(
+    table: str,
+    names: Tuple[str, ...],
+    rows: List[Dict],
+    key: str,
+    dtype,
+    default=None,
+) -> np.ndarray:
+    values = []
+    for name, row in zip(names, rows):
+        if key in row:
+            values.append(row[key])
+        elif default is not None:
+            values.append(default)
+        else:
+            raise ValueError(f"{table}[{name!r}] has no {key!r}")
+    return np.array(values, dtype=dtype)
+
+
+class EnemyTable:
+    """ENEMY_TYPES compiled into columns indexed by an integer type id, so
+    per-entity code reads ENEMIES.speed[type_ids] instead of chained dict
+    lookups. Entities store the type id, never the name."""
+
+    def __init__(self, types: Dict[str, Dict]) -> None:
+        self.names: Tuple[str, ...] = tuple(types)
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        rows = [types[name] for name in self.names]
+
+        def column(key: str, dtype, default=None) -> np.ndarray:
+            return _column("ENEMY_TYPES", self.names, rows, key, dtype, default)
+
+        self.speed = column("speed", np.float64)
+        self.size = column("size", np.int32)
+        # Wall-collision half extent
+        self.half_size = (self.size // 2).astype(np.float64)
+        self.hp = column("hp", np.int32)
+        self.points = column("points", np.int64)
+        self.colors: Tuple[Color, ...] = tuple(tuple(row["color"]) for row in rows)
+        self.attack_cooldown = column("attack_cooldown", np.float64)
+        self.bullet_speed = column("bullet_speed", np.float64, default=0.0)
+
+        unknown = [
+            row["attack_type"] for row in rows if row["attack_type"] not in ATTACK_PATTERNS
+        ]
+        if unknown:
+            raise ValueError(f"Unknown enemy attack_type {unknown[0]!r}")
+        self.attack_pattern = np.array(
+            [ATTACK_PATTERN_NAMES.index(row["attack_type"]) for row in rows], dtype=np.int16
+        )
+        # Non-melee types have a zero range and can never register a melee hit
+        self.melee_range = np.where(
+            self.attack_pattern == MELEE, column("attack_range", np.float64, default=0.0), 0.0
+        )
+
+        # The angles of every type back to back: type t fires
+        # attack_angles[attack_start[t] : attack_start[t] + attack_count[t]]
+        angles = [ATTACK_PATTERNS[row["attack_type"]] for row in rows]
+        self.attack_count = np.array([len(run) for run in angles], dtype=np.intp)
+        self.attack_start = np.cumsum(self.attack_count) - self.attack_count
+        self.attack_angles = np.array([a for run in angles for a in run], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def validate(self, types: Dict[str, Dict]) -> None:
+        """Check every compiled column against the source dicts"""
+        if self.names != tuple(types):
+            raise ValueError("Enemy type ids no longer match ENEMY_TYPES")
+        for type_id, name in enumerate(self.names):
+            row = types[name]
+            _expect(name, "speed", self.speed[type_id], row["speed"])
+            _expect(name, "size", self.size[type_id], row["size"])
+            _expect(name, "hp", self.hp[type_id], row["hp"])
+            _expect(name, "points", self.points[type_id], row["points"])
+            _expect(name, "color", self.colors[type_id], tuple(row["color"]))
+            _expect(name, "attack_cooldown", self.attack_cooldown[type_id], row["attack_cooldown"])
+            _expect(name, "bullet_speed", self.bullet_speed[type_id], row.get("bullet_speed", 0.0))
+            _expect(
+                name,
+                "attack_type",
+                ATTACK_PATTERN_NAMES[self.attack_pattern[type_id]],
+                row["attack_type"],
+            )
+            start = self.attack_start[type_id]
+            _expect(
+                name,
+                "attack angles",
+                tuple(self.attack_angles[start : start + self.attack_count[type_id]].tolist()),
+                ATTACK_PATTERNS[row["attack_type"]],
+            )
+
+
+class PowerupTable:
+    """POWERUP_TYPES compiled into columns indexed by an integer type id"""
+
+    def __init__(self, types: Dict[str, Dict]) -> None:
+        self.names: Tuple[str, ...] = tuple(types)
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        rows = [types[name] for name in self.names]
+
+        def column(key: str, dtype, default=None) -> np.ndarray:
+            return _column("POWERUP_TYPES", self.names, rows, key, dtype, default)
+
+        self.size = column("size", np.int32)
+        self.colors: Tuple[Color, ...] = tuple(tuple(row["color"]) for row in rows)
+        self.duration = column("duration", np.float64)
+        self.effect_names: Tuple[str, ...] = tuple(dict.fromkeys(row["effect"] for row in rows))
+        self.effect = np.array(
+            [self.effect_names.index(row["effect"]) for row in rows], dtype=np.int16
+        )
+        self.multiplier = column("multiplier", np.float64, default=1.0)
+        self.bullets = column("bullets", np.int32, default=1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def validate(self, types: Dict[str, Dict]) -> None:
+        if self.names != tuple(types):
+            raise ValueError("Power-up type ids no longer match POWERUP_TYPES")
+        for type_id, name in enumerate(self.names):
+            row = types[name]
+            _expect(name, "size", self.size[type_id], row["size"])
+            _expect(name, "color", self.colors[type_id], tuple(row["color"]))
+            _expect(name, "duration", self.duration[type_id], row["duration"])
+            _expect(name, "effect", self.effect_names[self.effect[type_id]], row["effect"])
+            _expect(name, "multiplier", self.multiplier[type_id], row.get("multiplier", 1.0))
+            _expect(name, "bullets", self.bullets[type_id], row.get("bullets", 1))
+
+
+class WaveTable:
+    """WAVE_CONFIGS indexed by wave number. Entry 0 and the entry after the
+    last wave repeat their neighbours, so a game that has just finished its
+    last wave can still be looked up."""
+
+    def __init__(self, waves: Dict[int, Dict], enemies: EnemyTable) -> None:
+        self.count = len(waves)
+        if sorted(waves) != list(range(1, self.count + 1)):
+            raise ValueError("WAVE_CONFIGS must be numbered 1 to N")
+        rows = [waves[min(max(wave, 1), self.count)] for wave in range(self.count + 2)]
+
+        self.speed_multiplier = np.array(
+            [row["speed_multiplier"] for row in rows], dtype=np.float64
+        )
+        self.spawn_rate = np.array([row["spawn_rate"] for row in rows], dtype=np.float64)
+        unknown = [name for row in rows for name in row["enemies"] if name not in enemies.ids]
+        if unknown:
+            raise ValueError(f"WAVE_CONFIGS names unknown enemy type {unknown[0]!r}")
+        # Enemy type ids each wave spawns from, in WAVE_CONFIGS order
+        self.enemy_ids: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(enemies.ids[name] for name in row["enemies"]) for row in rows
+        )
+
+    def validate(self, waves: Dict[int, Dict], enemies: EnemyTable) -> None:
+        if self.count != len(waves):
+            raise ValueError("Wave table no longer matches WAVE_CONFIGS")
+        for wave, row in waves.items():
+            name = f"wave {wave}"
+            _expect(name, "speed_multiplier", self.speed_multiplier[wave], row["speed_multiplier"])
+            _expect(name, "spawn_rate", self.spawn_rate[wave], row["spawn_rate"])
+            _expect(
+                name,
+                "enemies",
+                tuple(enemies.names[type_id] for type_id in self.enemy_ids[wave]),
+                tuple(row["enemies"]),
+            )
+
+
+def _expect(name: str, key: str, compiled, source) -> None:
+    if isinstance(compiled, np.generic):
+        compiled = compiled.item()
+    if compiled != source:
+        raise ValueError(f"Compiled {key} of {name} is {compiled!r}, expected {source!r}")
+
+
+def validate(
+    enemy_types: Optional[Dict[str, Dict]] = None,
+    powerup_types: Optional[Dict[str, Dict]] = None,
+    wave_configs: Optional[Dict[int, Dict]] = None,
+) -> None:
+    """Raise ValueError if the compiled tables disagree with constants.py"""
+    ENEMIES.validate(ENEMY_TYPES if enemy_types is None else enemy_types)
+    POWERUPS.validate(POWERUP_TYPES if powerup_types is None else powerup_types)
+    WAVES.validate(WAVE_CONFIGS if wave_configs is None else wave_configs, ENEMIES)
+
+
+ENEMIES = EnemyTable(ENEMY_TYPES)
+POWERUPS = PowerupTable(POWERUP_TYPES)
+WAVES = WaveTable(WAVE_CONFIGS, ENEMIES)
+validate()
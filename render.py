@@ -1,30 +1,127 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+import numpy as np
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+from constants import RENDER_BATCHED, WHITE
+from shape_cache import ShapeCache
+from render_target import GLRenderTarget
 
 
 class Render:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, batched: bool = RENDER_BATCHED, target=None) -> None:
+        # Batched mode queues points and submits them once per frame in flush();
+        # immediate mode issues glVertex2f per point as soon as a shape is drawn
+        self.batched = batched
+        self.color: Tuple[float, float, float] = WHITE
+
+        # GLRenderTarget or FramebufferTarget; all drawing goes through it
+        self.target = target if target is not None else GLRenderTarget()
+
+        self._vertex_chunks: List[np.ndarray] = []
+        self._chunk_colors: List[Tuple[float, float, float]] = []
+
+        # Rasterized point offsets for shapes that are redrawn every frame
+        self.shape_cache = ShapeCache()
+
+        # Retained layers: name -> version it was compiled at
+        self._layer_versions: Dict[str, Hashable] = {}
+
+    def clear(self) -> None:
+        self.target.clear()
+
+    def present(self) -> None:
+        self.target.present()
+
+    def set_color(self, r: float, g: float, b: float) -> None:
+        self.color = (r, g, b)
+        if not self.batched:
+            self.target.set_color(self.color)
 
     def draw_circle(self, x: float, y: float, radius: float) -> None:
         """Midpoint Circle Algorithm"""
+        self.draw_shape(
+            ("circle", radius), x, y, lambda: self.rasterize_circle(0, 0, radius)
+        )
+
+    def draw_line(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Midpoint Line Algorithm"""
+        self._plot(self.rasterize_line(x1, y1, x2, y2))
+
+    def draw_shape(
+        self,
+        key: Hashable,
+        x: float,
+        y: float,
+        build: Callable[[], Sequence[Tuple[float, float]]],
+    ) -> None:
+        """Draw cached point offsets for key translated to (x, y)"""
+        offsets = self.shape_cache.get(key, build)
+        self._plot(offsets + (x, y))
+
+    def flush(self) -> None:
+        """Submit all queued points with a single draw call"""
+        if not self._vertex_chunks:
+            return
+
+        counts = [len(chunk) for chunk in self._vertex_chunks]
+        vertices = np.concatenate(self._vertex_chunks)
+        colors = np.repeat(
+            np.array(self._chunk_colors, dtype=np.float32), counts, axis=0
+        )
+
+        self.target.draw_point_arrays(vertices, colors)
+
+        self._vertex_chunks = []
+        self._chunk_colors = []
+
+    def draw_layer(
+        self, name: str, version: Hashable, draw: Callable[[], None]
+    ) -> None:
+        """Replay a retained layer, recompiling it only when version changes"""
+        # Points queued before the layer must stay underneath it
+        self.flush()
+
+        if name not in self._layer_versions or self._layer_versions[name] != version:
+            self.target.begin_layer(name)
+            draw()
+            self.flush()
+            self.target.end_layer()
+            self._layer_versions[name] = version
+
+        self.target.call_layer(name)
+
+    def invalidate_layer(self, name: str) -> None:
+        if self._layer_versions.pop(name, None) is not None:
+            self.target.delete_layer(name)
+
+    def _plot(self, points: Sequence[Tuple[float, float]]) -> None:
+        if len(points) == 0:
+            return
+
+        if self.batched:
+            self._vertex_chunks.append(np.array(points, dtype=np.float32))
+            self._chunk_colors.append(self.color)
+            return
+
+        self.target.draw_points(points)
+
+    def rasterize_circle(
+        self, x: float, y: float, radius: float
+    ) -> List[Tuple[float, float]]:
         x0, y0 = x, y
+        points: List[Tuple[float, float]] = []
 
         def plot_circle_points(x: float, y: float) -> None:
-            glVertex2f(x0 + x, y0 + y)
-            glVertex2f(x0 - x, y0 + y)
-            glVertex2f(x0 + x, y0 - y)
-            glVertex2f(x0 - x, y0 - y)
-            glVertex2f(x0 + y, y0 + x)
-            glVertex2f(x0 - y, y0 + x)
-            glVertex2f(x0 + y, y0 - x)
-            glVertex2f(x0 - y, y0 - x)
+            points.append((x0 + x, y0 + y))
+            points.append((x0 - x, y0 + y))
+            points.append((x0 + x, y0 - y))
+            points.append((x0 - x, y0 - y))
+            points.append((x0 + y, y0 + x))
+            points.append((x0 - y, y0 + x))
+            points.append((x0 + y, y0 - x))
+            points.append((x0 - y, y0 - x))
 
         d = 1 - radius
         x, y = 0, radius
 
-        glBegin(GL_POINTS)
         while x <= y:
             plot_circle_points(x, y)
             if d < 0:
@@ -33,20 +130,18 @@ class Render:
                 d += 2 * (x - y) + 5
                 y -= 1
             x += 1
-        glEnd()
 
-    def draw_line(self, x1: float, y1: float, x2: float, y2: float) -> None:
-        """Midpoint Line Algorithm"""
+        return points
+
+    def rasterize_line(
+        self, x1: float, y1: float, x2: float, y2: float
+    ) -> List[Tuple[float, float]]:
         x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
 
         if x1 == x2:
             y_start = min(y1, y2)
             y_end = max(y1, y2)
-            glBegin(GL_POINTS)
-            for y in range(y_start, y_end + 1):
-                glVertex2f(x1, y)
-            glEnd()
-            return
+            return [(x1, y) for y in range(y_start, y_end + 1)]
 
         dx = abs(x2 - x1)
         dy = abs(y2 - y1)
@@ -55,14 +150,13 @@ class Render:
         y_inc = 1 if y2 > y1 else -1
 
         x, y = x1, y1
-
-        glBegin(GL_POINTS)
+        points: List[Tuple[float, float]] = []
 
         if dy > dx:
             dx, dy = dy, dx
             p = 2 * dx - dy
             for _ in range(dy):
-                glVertex2f(x, y)
+                points.append((x, y))
                 if p > 0:
                     x += x_inc
                     p += 2 * (dx - dy)
@@ -72,7 +166,7 @@ class Render:
         else:
             p = 2 * dy - dx
             for _ in range(dx):
-                glVertex2f(x, y)
+                points.append((x, y))
                 if p > 0:
                     y += y_inc
                     p += 2 * (dy - dx)
@@ -80,4 +174,4 @@ class Render:
                     p += 2 * dy
                 x += x_inc
 
-        glEnd()
+        return points
@@ -0,0 +1,170 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT, BLACK
+
+
+class GLRenderTarget:
+    """Draws into the current OpenGL context"""
+
+    def __init__(self) -> None:
+        # Retained layers: name -> display list id
+        self._display_lists: Dict[str, int] = {}
+
+    def clear(self) -> None:
+        glClear(GL_COLOR_BUFFER_BIT)
+
+    def present(self) -> None:
+        glutSwapBuffers()
+
+    def set_color(self, color: Tuple[float, float, float]) -> None:
+        glColor3f(*color)
+
+    def draw_points(self, points: Sequence[Tuple[float, float]]) -> None:
+        """Immediate mode: one glVertex2f per point in the current color"""
+        glBegin(GL_POINTS)
+        for px, py in points:
+            glVertex2f(px, py)
+        glEnd()
+
+    def draw_point_arrays(self, vertices: np.ndarray, colors: np.ndarray) -> None:
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_POINTS, 0, len(vertices))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def begin_layer(self, name: str) -> None:
+        list_id = self._display_lists.get(name)
+        if list_id is None:
+            list_id = glGenLists(1)
+            self._display_lists[name] = list_id
+        glNewList(list_id, GL_COMPILE)
+
+    def end_layer(self) -> None:
+        glEndList()
+
+    def call_layer(self, name: str) -> None:
+        glCallList(self._display_lists[name])
+
+    def delete_layer(self, name: str) -> None:
+        list_id = self._display_lists.pop(name, None)
+        if list_id is not None:
+            glDeleteLists(list_id, 1)
+
+
+class FramebufferTarget:
+    """Pure NumPy framebuffer accepting the same primitives as GLRenderTarget.
+
+    Row 0 is the bottom of the window, as in the glOrtho projection the game
+    uses. A point lights the pixel that contains it; points outside the
+    framebuffer are clipped.
+    """
+
+    def __init__(self, width: int = WINDOW_WIDTH, height: int = WINDOW_HEIGHT) -> None:
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.float32)
+
+        self.color: Tuple[float, float, float] = BLACK
+        self.points_drawn: int = 0
+        self.frames_presented: int = 0
+
+        self._layers: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._recording: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+
+    def clear(self) -> None:
+        self.pixels[:] = BLACK
+
+    def present(self) -> None:
+        self.frames_presented += 1
+
+    def set_color(self, color: Tuple[float, float, float]) -> None:
+        self.color = color
+
+    def draw_points(self, points: Sequence[Tuple[float, float]]) -> None:
+        vertices = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        colors = np.broadcast_to(np.asarray(self.color, dtype=np.float32), (len(vertices), 3))
+        self.draw_point_arrays(vertices, colors)
+
+    def draw_point_arrays(self, vertices: np.ndarray, colors: np.ndarray) -> None:
+        if self._recording is not None:
+            # Like GL_COMPILE: record now, draw when the layer is called
+            self._recording.append((vertices.copy(), np.array(colors, dtype=np.float32)))
+            return
+
+        px = np.floor(vertices[:, 0]).astype(np.intp)
+        py = np.floor(vertices[:, 1]).astype(np.intp)
+        visible = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+
+        px, py, colors = px[visible], py[visible], np.asarray(colors)[visible]
+
+        # Later points win, as in draw order; NumPy does not promise which
+        # duplicate index wins a fancy assignment, so keep the last explicitly
+        flat = py * self.width + px
+        _, last_reversed = np.unique(flat[::-1], return_index=True)
+        last = len(flat) - 1 - last_reversed
+        self.pixels[py[last], px[last]] = colors[last]
+        self.points_drawn += len(vertices)
+
+    def begin_layer(self, name: str) -> None:
+        self._recording = []
+        self._layers[name] = self._recording
+
+    def end_layer(self) -> None:
+        self._recording = None
+
+    def call_layer(self, name: str) -> None:
+        for vertices, colors in self._layers[name]:
+            self.draw_point_arrays(vertices, colors)
+
+    def delete_layer(self, name: str) -> None:
+        self._layers.pop(name, None)
+
+    def to_image(self) -> np.ndarray:
+        """8-bit RGB image with row 0 at the top"""
+        return np.round(self.pixels[::-1] * 255).astype(np.uint8)
+
+    def save_ppm(self, path: str) -> None:
+        image = self.to_image()
+        with open(path, "wb") as image_file:
+            image_file.write(f"P6\n{self.width} {self.height}\n255\n".encode("ascii"))
+            image_file.write(image.tobytes())
+
+    def diff(self, golden: np.ndarray) -> int:
+        """Number of pixels that differ from a golden image from load_ppm"""
+        image = self.to_image()
+        if golden.shape != image.shape:
+            raise ValueError(
+                f"Golden image is {golden.shape}, framebuffer is {image.shape}"
+            )
+        return int(np.any(image != golden, axis=2).sum())
+
+
+def load_ppm(path: str) -> np.ndarray:
+    """Read a binary PPM written by FramebufferTarget.save_ppm"""
+    with open(path, "rb") as image_file:
+        data = image_file.read()
+
+    fields = []
+    offset = 0
+    while len(fields) < 4:
+        end = offset
+        while data[end : end + 1].isspace():
+            end += 1
+        start = end
+        while not data[end : end + 1].isspace():
+            end += 1
+        fields.append(data[start:end])
+        offset = end
+    offset += 1  # Single whitespace byte before the pixel data
+
+    if fields[0] != b"P6" or int(fields[3]) != 255:
+        raise ValueError(f"{path} is not an 8-bit binary PPM")
+    width, height = int(fields[1]), int(fields[2])
+    return np.frombuffer(data, dtype=np.uint8, count=width * height * 3, offset=offset).reshape(
+        height, width, 3
+    )
@@ -0,0 +1,305 @@
+import argparse
+import hashlib
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from constants import REWIND_KEY
+from headless import HeadlessSimulation
+from profiler import FrameProfiler
+from registry import POWERUPS
+
+MAGIC = b"VREC"
+FORMAT_VERSION = 2
+# magic, format version, game seed, map seed, delta_time, per-tick hashes
+_HEADER = struct.Struct("<4sHQQd?")
+# kind, tick, key or button, button state, x, y
+_EVENT = struct.Struct("<BIBBhh")
+# kind, tick, state hash
+_HASH = struct.Struct("<BIQ")
+# kind, final tick
+_END = struct.Struct("<BI")
+
+KEY_DOWN, KEY_UP, MOUSE, STATE_HASH, END = range(5)
+
+# (tick, kind, key or button, state, x, y)
+Event = Tuple[int, int, int, int, int, int]
+
+
+def state_hash(game_state) -> int:
+    """64-bit digest of everything the simulation advances"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(
+        struct.pack(
+            "<qqqdd??d",
+            game_state.score,
+            game_state.lives,
+            game_state.current_wave,
+            game_state.player_x,
+            game_state.player_y,
+            game_state.game_over,
+            game_state.is_paused,
+            game_state.wave_timer,
+        )
+    )
+    for store in (game_state.player_bullets, game_state.enemies, game_state.enemy_bullets):
+        for name in store.FIELDS:
+            digest.update(store[name].tobytes())
+    active_powerups = game_state.active_powerups
+    for powerup in active_powerups:
+        digest.update(powerup["type"].encode())
+        digest.update(struct.pack("<d", active_powerups.remaining(powerup)))
+    for powerup in game_state.available_powerups:
+        digest.update(POWERUPS.names[powerup["type_id"]].encode())
+        digest.update(struct.pack("<dd", powerup["x"], powerup["y"]))
+    return int.from_bytes(digest.digest(), "little")
+
+
+def _clamp_coordinate(value: int) -> int:
+    return max(-32768, min(32767, int(value)))
+
+
+class InputRecorder:
+    """Writes the seeds and every input event, stamped with the number of
+    completed ticks, to a compact binary file for ReplayDriver"""
+
+    def __init__(
+        self,
+        path: str,
+        game_seed: int,
+        map_seed: int,
+        delta_time: float,
+        hash_every_tick: bool = True,
+    ) -> None:
+        self.path = path
+        self.hash_every_tick = hash_every_tick
+        self.game_loop = None
+        self.events: int = 0
+
+        self._file = open(path, "wb")
+        self._file.write(
+            _HEADER.pack(MAGIC, FORMAT_VERSION, game_seed, map_seed, delta_time, hash_every_tick)
+        )
+
+    def attach(self, game_loop) -> "InputRecorder":
+        self.game_loop = game_loop
+        game_loop.recorder = self
+        game_loop.controls.recorder = self
+        return self
+
+    def key_down(self, key: bytes, x: int, y: int) -> None:
+        self._event(KEY_DOWN, key[0], 0, x, y)
+
+    def key_up(self, key: bytes, x: int, y: int) -> None:
+        self._event(KEY_UP, key[0], 0, x, y)
+
+    def mouse(self, button: int, state: int, x: int, y: int) -> None:
+        self._event(MOUSE, button, state, x, y)
+
+    def on_tick(self, tick: int, game_state) -> None:
+        if self.hash_every_tick:
+            self._file.write(_HASH.pack(STATE_HASH, tick, state_hash(game_state)))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.write(_END.pack(END, self.game_loop.tick_count if self.game_loop else 0))
+        self._file.close()
+
+    def _event(self, kind: int, code: int, state: int, x: int, y: int) -> None:
+        self._file.write(
+            _EVENT.pack(
+                kind,
+                self.game_loop.tick_count,
+                code,
+                state,
+                _clamp_coordinate(x),
+                _clamp_coordinate(y),
+            )
+        )
+        self.events += 1
+
+
+class Recording:
+    def __init__(
+        self,
+        game_seed: int,
+        map_seed: int,
+        delta_time: float,
+        events: List[Event],
+        hashes: List[Tuple[int, int]],
+        end_tick: int,
+    ) -> None:
+        self.game_seed = game_seed
+        self.map_seed = map_seed
+        self.delta_time = delta_time
+        self.events = events
+        # (tick, state hash) in recording order; a rewind makes ticks repeat
+        self.hashes = hashes
+        self.end_tick = end_tick
+
+    def uses_rewind(self) -> bool:
+        return any(
+            kind == KEY_DOWN and chr(code).lower() == REWIND_KEY
+            for _, kind, code, *_ in self.events
+        )
+
+
+def load_recording(path: str) -> Recording:
+    with open(path, "rb") as record_file:
+        data = record_file.read()
+
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not a replay file")
+    magic, version, game_seed, map_seed, delta_time, _ = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a replay file of format version {FORMAT_VERSION}")
+
+    events: List[Event] = []
+    hashes: List[Tuple[int, int]] = []
+    end_tick: Optional[int] = None
+    offset = _HEADER.size
+    # A session that crashed has no END record; keep whatever was complete
+    while offset < len(data) and end_tick is None:
+        kind = data[offset]
+        if kind == STATE_HASH:
+            if offset + _HASH.size > len(data):
+                break
+            _, tick, value = _HASH.unpack_from(data, offset)
+            hashes.append((tick, value))
+            offset += _HASH.size
+        elif kind == END:
+            if offset + _END.size > len(data):
+                break
+            _, end_tick = _END.unpack_from(data, offset)
+            offset += _END.size
+        elif kind in (KEY_DOWN, KEY_UP, MOUSE):
+            if offset + _EVENT.size > len(data):
+                break
+            kind, tick, code, state, x, y = _EVENT.unpack_from(data, offset)
+            events.append((tick, kind, code, state, x, y))
+            offset += _EVENT.size
+        else:
+            raise ValueError(f"Unknown record kind {kind} at byte {offset} of {path}")
+
+    if end_tick is None:
+        end_tick = max([tick for tick, *_ in events] + [tick for tick, _ in hashes] + [0])
+    return Recording(game_seed, map_seed, delta_time, events, hashes, end_tick)
+
+
+class ReplayDriver:
+    """Feeds a recording into a headless simulation as fast as it will run"""
+
+    def __init__(
+        self,
+        recording: Recording,
+        verify: bool = True,
+        profiler: Optional[FrameProfiler] = None,
+    ) -> None:
+        self.recording = recording
+        self.verify = verify and bool(recording.hashes)
+        self.simulation = HeadlessSimulation(
+            recording.delta_time,
+            seed=recording.game_seed,
+            map_seed=recording.map_seed,
+            profiler=profiler,
+            rewind=recording.uses_rewind(),
+        )
+        self.simulation.controls.on_quit = self._quit
+        self.quit = False
+
+    def run(self) -> Dict:
+        events = self.recording.events
+        hashes = self.recording.hashes
+        simulation = self.simulation
+        next_event = 0
+        next_hash = 0
+        checked = 0
+        first_mismatch: Optional[int] = None
+
+        start = time.perf_counter()
+        with simulation.output():
+            while True:
+                # Re-read the tick per event: a rewind sends it back
+                while (
+                    next_event < len(events)
+                    and events[next_event][0] <= simulation.game_loop.tick_count
+                ):
+                    self._apply(events[next_event])
+                    next_event += 1
+                tick = simulation.game_loop.tick_count
+                # Ticks repeat after a rewind, so the recorded end only
+                # counts once every event has been applied
+                if next_event >= len(events) and tick >= self.recording.end_tick:
+                    break
+
+                simulation.tick()
+
+                tick = simulation.game_loop.tick_count
+                while next_hash < len(hashes) and hashes[next_hash][0] < tick:
+                    next_hash += 1
+                if self.verify and next_hash < len(hashes) and hashes[next_hash][0] == tick:
+                    checked += 1
+                    if state_hash(simulation.game_state) != hashes[next_hash][1]:
+                        first_mismatch = tick
+                        break
+                    next_hash += 1
+        elapsed = time.perf_counter() - start
+
+        ticks = simulation.game_loop.tick_count
+        return {
+            "ticks": ticks,
+            "events": next_event,
+            "wall_seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+            "hashes_checked": checked,
+            "first_mismatch": first_mismatch,
+            "quit": self.quit,
+        }
+
+    def _apply(self, event: Event) -> None:
+        _, kind, code, state, x, y = event
+        controls = self.simulation.controls
+        if kind == KEY_DOWN:
+            controls.handle_keyboard(bytes([code]), x, y)
+        elif kind == KEY_UP:
+            controls.handle_keyboard_up(bytes([code]), x, y)
+        else:
+            controls.handle_mouse(code, state, x, y)
+
+    def _quit(self) -> None:
+        self.quit = True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded session at full speed")
+    parser.add_argument("recording")
+    parser.add_argument("--no-verify", action="store_true", help="skip state hash checks")
+    parser.add_argument(
+        "--trace", default=None, help="write a per-phase Chrome trace to this path"
+    )
+    args = parser.parse_args(argv)
+
+    recording = load_recording(args.recording)
+    profiler = FrameProfiler(enabled=args.trace is not None)
+    result = ReplayDriver(recording, verify=not args.no_verify, profiler=profiler).run()
+
+    print(
+        f"Replayed {result['ticks']} ticks and {result['events']} events "
+        f"in {result['wall_seconds']:.3f}s: {result['ticks_per_second']:.0f} ticks/s"
+    )
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        print(profiler.format_summary())
+
+    if result["first_mismatch"] is not None:
+        print(f"State diverged from the recording at tick {result['first_mismatch']}")
+        return 1
+    if result["hashes_checked"]:
+        print(f"State matched the recording at all {result['hashes_checked']} checked ticks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
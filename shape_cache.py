@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+import numpy as np
+from constants import SHAPE_CACHE_SIZE
+
+
+class ShapeCache:
+    def __init__(self, max_entries: int = SHAPE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Hashable, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return the point offsets for key, rasterizing them on a miss"""
+        offsets = self._entries.get(key)
+        if offsets is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return offsets
+
+        self.misses += 1
+        offsets = np.asarray(build(), dtype=np.float64).reshape(-1, 2)
+        offsets.setflags(write=False)
+        self._entries[key] = offsets
+
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return offsets
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,351 @@
+import struct
+import zlib
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+from map_cache import decode_map, encode_map
+
+MAGIC = b"VSNP"
+FORMAT_VERSION = 2
+# magic, format version, section count
+_HEADER = struct.Struct("<4sHB")
+# section id, payload length
+_SECTION = struct.Struct("<BI")
+
+# Section ids, also their order in the file
+SCALARS, RNG, MAP, PLAYER_BULLETS, ENEMIES, ENEMY_BULLETS, POWERUPS = range(7)
+SECTION_NAMES = (
+    "scalars",
+    "rng",
+    "map",
+    "player_bullets",
+    "enemies",
+    "enemy_bullets",
+    "powerups",
+)
+
+# score, lives, wave, is_paused, game_over, wave_timer, player x/y,
+# previous player x/y, player speed, enemy/powerup spawn timers,
+# movement up/down/left/right
+_SCALARS = struct.Struct("<qqq??dddddddd????")
+_MOVEMENT_KEYS = ("up", "down", "left", "right")
+
+# random.Random state: version, 625 words, optional gauss_next
+_RNG = struct.Struct("<B625I?d")
+
+# power-up clock, active count, available count
+_POWERUP_COUNTS = struct.Struct("<dHH")
+# type id, expiry time on the power-up clock
+_ACTIVE_POWERUP = struct.Struct("<Hd")
+# type id, x, y
+_AVAILABLE_POWERUP = struct.Struct("<Hdd")
+
+Sections = List[bytes]
+
+
+class GameStateSerializer:
+    """Packs a GameState into versioned binary sections and back.
+
+    Sections are kept separate so RewindBuffer can tell which ones changed
+    between two snapshots. The map section is only re-encoded when the map
+    itself changes.
+    """
+
+    def __init__(self, game_state) -> None:
+        self.game_state = game_state
+        self._map_key: Optional[Tuple[int, int]] = None
+        self._map_section = b""
+
+    def capture(self) -> Sections:
+        game_state = self.game_state
+        return [
+            self._pack_scalars(),
+            self._pack_rng(),
+            self._pack_map(),
+            game_state.player_bullets.pack(),
+            game_state.enemies.pack(),
+            game_state.enemy_bullets.pack(),
+            self._pack_powerups(),
+        ]
+
+    def restore(self, sections: Sections) -> None:
+        game_state = self.game_state
+        self._unpack_scalars(sections[SCALARS])
+        self._unpack_rng(sections[RNG])
+        self._unpack_map(sections[MAP])
+        game_state.player_bullets.unpack(sections[PLAYER_BULLETS])
+        game_state.enemies.unpack(sections[ENEMIES])
+        game_state.enemy_bullets.unpack(sections[ENEMY_BULLETS])
+        self._unpack_powerups(sections[POWERUPS])
+
+    def dumps(self, sections: Optional[Sections] = None) -> bytes:
+        if sections is None:
+            sections = self.capture()
+        parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections))]
+        for section_id, payload in enumerate(sections):
+            parts.append(_SECTION.pack(section_id, len(payload)))
+            parts.append(payload)
+        return b"".join(parts)
+
+    def loads(self, data: bytes) -> None:
+        self.restore(self.split(data))
+
+    @staticmethod
+    def split(data: bytes) -> Sections:
+        magic, version, count = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} game state snapshot")
+        if count != len(SECTION_NAMES):
+            raise ValueError(f"Snapshot has {count} sections, expected {len(SECTION_NAMES)}")
+
+        sections = []
+        offset = _HEADER.size
+        for expected_id in range(count):
+            section_id, length = _SECTION.unpack_from(data, offset)
+            offset += _SECTION.size
+            if section_id != expected_id or offset + length > len(data):
+                raise ValueError(f"Corrupt snapshot section {SECTION_NAMES[expected_id]}")
+            sections.append(data[offset : offset + length])
+            offset += length
+        return sections
+
+    def _pack_scalars(self) -> bytes:
+        game_state = self.game_state
+        return _SCALARS.pack(
+            game_state.score,
+            game_state.lives,
+            game_state.current_wave,
+            game_state.is_paused,
+            game_state.game_over,
+            game_state.wave_timer,
+            game_state.player_x,
+            game_state.player_y,
+            game_state.prev_player_x,
+            game_state.prev_player_y,
+            game_state.player_speed,
+            game_state.enemy_spawn_timer,
+            game_state.powerup_spawn_timer,
+            *(game_state.movement[key] for key in _MOVEMENT_KEYS),
+        )
+
+    def _unpack_scalars(self, payload: bytes) -> None:
+        game_state = self.game_state
+        (
+            game_state.score,
+            game_state.lives,
+            game_state.current_wave,
+            game_state.is_paused,
+            game_state.game_over,
+            game_state.wave_timer,
+            game_state.player_x,
+            game_state.player_y,
+            game_state.prev_player_x,
+            game_state.prev_player_y,
+            game_state.player_speed,
+            game_state.enemy_spawn_timer,
+            game_state.powerup_spawn_timer,
+            *movement,
+        ) = _SCALARS.unpack(payload)
+        game_state.movement = dict(zip(_MOVEMENT_KEYS, movement))
+
+    def _pack_rng(self) -> bytes:
+        version, words, gauss_next = self.game_state.rng.getstate()
+        return _RNG.pack(
+            version, *words, gauss_next is not None, gauss_next if gauss_next is not None else 0.0
+        )
+
+    def _unpack_rng(self, payload: bytes) -> None:
+        values = _RNG.unpack(payload)
+        has_gauss, gauss_next = values[-2:]
+        self.game_state.rng.setstate(
+            (values[0], tuple(values[1:-2]), gauss_next if has_gauss else None)
+        )
+
+    def _pack_map(self) -> bytes:
+        map_generator = self.game_state.map_generator
+        key = (map_generator.seed, map_generator.layer_version)
+        if key != self._map_key:
+            self._map_section = encode_map(
+                map_generator.seed, map_generator.grid, map_generator.rooms
+            )
+            self._map_key = key
+        return self._map_section
+
+    def _unpack_map(self, payload: bytes) -> None:
+        if payload == self._pack_map():
+            # Already on this map; keep the retained wall layer and caches
+            return
+        map_generator = self.game_state.map_generator
+        seed, grid, rooms = decode_map(payload)
+        map_generator.set_map(seed, grid, rooms)
+
+    def _pack_powerups(self) -> bytes:
+        game_state = self.game_state
+        active_powerups = game_state.active_powerups
+        parts = [
+            _POWERUP_COUNTS.pack(
+                active_powerups.time, len(active_powerups), len(game_state.available_powerups)
+            )
+        ]
+        parts.extend(
+            _ACTIVE_POWERUP.pack(powerup["type_id"], powerup["expires_at"])
+            for powerup in active_powerups
+        )
+        parts.extend(
+            _AVAILABLE_POWERUP.pack(powerup["type_id"], powerup["x"], powerup["y"])
+            for powerup in game_state.available_powerups
+        )
+        return b"".join(parts)
+
+    def _unpack_powerups(self, payload: bytes) -> None:
+        clock, active_count, available_count = _POWERUP_COUNTS.unpack_from(payload)
+        offset = _POWERUP_COUNTS.size
+
+        active = []
+        for _ in range(active_count):
+            active.append(_ACTIVE_POWERUP.unpack_from(payload, offset))
+            offset += _ACTIVE_POWERUP.size
+
+        available = []
+        for _ in range(available_count):
+            type_id, x, y = _AVAILABLE_POWERUP.unpack_from(payload, offset)
+            offset += _AVAILABLE_POWERUP.size
+            available.append({"type_id": type_id, "x": x, "y": y})
+
+        self.game_state.active_powerups.restore(clock, active)
+        self.game_state.available_powerups = available
+
+
+def save_snapshot(game_state, path: str) -> None:
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(GameStateSerializer(game_state).dumps())
+
+
+def load_snapshot(game_state, path: str) -> None:
+    with open(path, "rb") as snapshot_file:
+        GameStateSerializer(game_state).loads(snapshot_file.read())
+
+
+class RewindBuffer:
+    """Snapshots every interval ticks into a ring of capacity slots.
+
+    Every keyframe_interval-th slot stores the full sections. The others store
+    each section as None when it is unchanged since the previous snapshot and
+    otherwise as the compressed XOR against it, so a few changed rows cost a
+    few bytes. Restoring applies the deltas forward from the last keyframe at
+    or before the slot. The oldest slot is always a keyframe: evicting it
+    turns the next oldest into one.
+    """
+
+    def __init__(
+        self,
+        game_state,
+        capacity: int,
+        interval: int = 1,
+        keyframe_interval: int = 30,
+    ) -> None:
+        self.serializer = GameStateSerializer(game_state)
+        self.capacity = capacity
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+
+        # (tick, is keyframe, full sections or deltas with None for unchanged)
+        self._slots: Deque[Tuple[int, bool, List[Optional[bytes]]]] = deque(maxlen=capacity)
+        self._previous: Optional[Sections] = None
+        self._since_keyframe = 0
+        self.bytes_stored: int = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def on_tick(self, tick: int) -> None:
+        if tick % self.interval == 0:
+            self.capture(tick)
+
+    def capture(self, tick: int) -> None:
+        sections = self.serializer.capture()
+        previous = self._previous
+        keyframe = previous is None or self._since_keyframe >= self.keyframe_interval
+        if keyframe:
+            stored: List[Optional[bytes]] = list(sections)
+            self._since_keyframe = 0
+        else:
+            stored = [
+                None if section == before else _encode_delta(before, section)
+                for section, before in zip(sections, previous)
+            ]
+        self._since_keyframe += 1
+        self._previous = sections
+
+        if len(self._slots) >= self.capacity:
+            self._evict_oldest()
+        self._slots.append((tick, keyframe, stored))
+        self.bytes_stored += _stored_size(stored)
+
+    def oldest_tick(self) -> Optional[int]:
+        return self._slots[0][0] if self._slots else None
+
+    def rewind(self, tick: int) -> Optional[int]:
+        """Restore the latest snapshot taken at or before tick and drop the
+        ones after it; returns the restored tick, or None if none is old enough"""
+        index = len(self._slots) - 1
+        while index >= 0 and self._slots[index][0] > tick:
+            index -= 1
+        if index < 0:
+            return None
+
+        sections, keyframe_index = self._resolve(index)
+        self.serializer.restore(sections)
+
+        while len(self._slots) > index + 1:
+            self.bytes_stored -= _stored_size(self._slots.pop()[2])
+        self._previous = sections
+        self._since_keyframe = index - keyframe_index + 1
+        return self._slots[index][0]
+
+    def _resolve(self, index: int) -> Tuple[Sections, int]:
+        """Sections of slot index and the index of the keyframe they build on"""
+        keyframe_index = index
+        while not self._slots[keyframe_index][1]:
+            keyframe_index -= 1
+        sections = list(self._slots[keyframe_index][2])
+        for position in range(keyframe_index + 1, index + 1):
+            for i, delta in enumerate(self._slots[position][2]):
+                if delta is not None:
+                    sections[i] = _apply_delta(sections[i], delta)
+        return sections, keyframe_index
+
+    def _evict_oldest(self) -> None:
+        _, _, evicted = self._slots.popleft()
+        self.bytes_stored -= _stored_size(evicted)
+        if self._slots and not self._slots[0][1]:
+            tick, _, deltas = self._slots[0]
+            full = [
+                section if delta is None else _apply_delta(section, delta)
+                for section, delta in zip(evicted, deltas)
+            ]
+            self._slots[0] = (tick, True, full)
+            self.bytes_stored += _stored_size(full) - _stored_size(deltas)
+
+
+def _stored_size(stored: List[Optional[bytes]]) -> int:
+    return sum(len(section) for section in stored if section is not None)
+
+
+def _xor_padded(payload: bytes, other: bytes) -> bytes:
+    """payload XOR other, with other truncated or zero-padded to payload's length"""
+    result = np.frombuffer(payload, dtype=np.uint8).copy()
+    shared = min(len(payload), len(other))
+    result[:shared] ^= np.frombuffer(other, dtype=np.uint8, count=shared)
+    return result.tobytes()
+
+
+def _encode_delta(before: bytes, after: bytes) -> bytes:
+    # Unchanged bytes XOR to zero runs, which compress to almost nothing
+    return zlib.compress(_xor_padded(after, before), 1)
+
+
+def _apply_delta(before: bytes, delta: bytes) -> bytes:
+    return _xor_padded(zlib.decompress(delta), before)
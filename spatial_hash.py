@@ -0,0 +1,74 @@
+import math
+from typing import Tuple
+import numpy as np
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT
+
+
+class SpatialHash:
+    """Uniform grid over the window, rebuilt from entity positions each tick.
+
+    cell_size must be at least the largest interaction distance so that every
+    overlapping pair lies in the same or a neighbouring cell. Positions outside
+    the window are clamped into the border cells, which keeps queries exact.
+    """
+
+    def __init__(
+        self,
+        cell_size: float,
+        width: float = WINDOW_WIDTH,
+        height: float = WINDOW_HEIGHT,
+    ) -> None:
+        self.cell_size = cell_size
+        self.cols = int(math.ceil(width / cell_size))
+        self.rows = int(math.ceil(height / cell_size))
+
+        self._order = np.empty(0, dtype=np.intp)
+        self._cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+
+    def build(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        # Counting sort: entities of cell k are _order[start[k]:start[k + 1]]
+        cx, cy = self._cells(xs, ys)
+        keys = cy * self.cols + cx
+        self._order = np.argsort(keys, kind="stable")
+        counts = np.bincount(keys, minlength=self.cols * self.rows)
+        self._cell_start[0] = 0
+        np.cumsum(counts, out=self._cell_start[1:])
+
+    def query_pairs(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate (query index, entity index) pairs from the 3x3 cells
+        around each query point"""
+        cx, cy = self._cells(xs, ys)
+        query_parts = []
+        entity_parts = []
+
+        for offset_y in (-1, 0, 1):
+            for offset_x in (-1, 0, 1):
+                nx = cx + offset_x
+                ny = cy + offset_y
+                queries = np.flatnonzero(
+                    (nx >= 0) & (nx < self.cols) & (ny >= 0) & (ny < self.rows)
+                )
+                keys = ny[queries] * self.cols + nx[queries]
+
+                start = self._cell_start[keys]
+                counts = self._cell_start[keys + 1] - start
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+
+                # Expand each (query, cell) into one row per entity in the cell
+                run_offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                query_parts.append(np.repeat(queries, counts))
+                entity_parts.append(self._order[np.repeat(start, counts) + run_offsets])
+
+        if not query_parts:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        return np.concatenate(query_parts), np.concatenate(entity_parts)
+
+    def _cells(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cx = np.clip(np.floor(xs / self.cell_size), 0, self.cols - 1).astype(np.intp)
+        cy = np.clip(np.floor(ys / self.cell_size), 0, self.rows - 1).astype(np.intp)
+        return cx, cy
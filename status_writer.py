@@ -0,0 +1,159 @@
+import io
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Deque, List, Optional, TextIO
+from constants import STATUS_EVENT_LINES, STATUS_MAX_RATE
+
+
+class StatusWriter:
+    """Writes the terminal status panel from a background thread.
+
+    submit() never blocks: the queue holds a single pending status and a newer
+    one replaces it, so bursts of updates coalesce. The writer thread writes at
+    most max_rate times per second and only rewrites lines that changed.
+
+    Anything else written to the terminal would scroll it under the panel, so
+    game messages go through log() (or the events stream, which print() can be
+    redirected to) and are drawn in a region of the last event_lines messages
+    below the panel.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        max_rate: float = STATUS_MAX_RATE,
+        event_lines: int = STATUS_EVENT_LINES,
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+        self.min_interval = 1.0 / max_rate
+        self.events = _EventStream(self)
+
+        self._events: Deque[str] = deque(maxlen=event_lines)
+        self._events_lock = threading.Lock()
+        self._last_status: Optional[str] = None
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=1)
+        self._stopping = threading.Event()
+        self._previous_lines: Optional[List[str]] = None
+        self._thread = threading.Thread(
+            target=self._run, name="status-writer", daemon=True
+        )
+
+        self.submitted: int = 0
+        self.written: int = 0
+
+    def start(self) -> "StatusWriter":
+        self._thread.start()
+        return self
+
+    def submit(self, status: str) -> None:
+        self.submitted += 1
+        self._last_status = status
+        self._put_latest(status)
+
+    def log(self, message: str) -> None:
+        """Add message to the event region and redraw the last status"""
+        with self._events_lock:
+            self._events.extend(line for line in message.split("\n") if line)
+        if self._last_status is not None:
+            self._put_latest(self._last_status)
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Write the last pending status, then end the thread"""
+        self._stopping.set()
+        try:
+            # Only needed to wake an idle thread; a pending status wakes it too
+            self._queue.put_nowait(self._STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _put_latest(self, status: str) -> None:
+        while True:
+            try:
+                self._queue.put_nowait(status)
+                return
+            except queue.Full:
+                pass
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+
+            self._write(item)
+
+            # Rate limit; anything submitted meanwhile coalesces in the queue
+            if self._stopping.is_set() or self._stopping.wait(self.min_interval):
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not self._STOP:
+                    self._write(item)
+                return
+
+    def _write(self, status: str) -> None:
+        lines = status.rstrip("\n").split("\n")
+        with self._events_lock:
+            events = list(self._events)
+        if events:
+            lines += ["", "Recent events:"] + events
+        output = self._render_diff(lines)
+        self._previous_lines = lines
+        if not output:
+            return
+
+        try:
+            self.stream.write(output)
+            self.stream.flush()
+        except (OSError, ValueError):
+            # A closed or broken terminal must not take the game down
+            return
+        self.written += 1
+
+    def _render_diff(self, lines: List[str]) -> str:
+        previous = self._previous_lines
+        if previous is None:
+            # Clear screen and move cursor to top on the first write
+            return "\033[2J\033[H" + "\n".join(lines) + "\n"
+
+        output = []
+        for row in range(max(len(lines), len(previous))):
+            line = lines[row] if row < len(lines) else ""
+            if row < len(previous) and previous[row] == line:
+                continue
+            # Move to the row, rewrite it and clear whatever was left over
+            output.append(f"\033[{row + 1};1H{line}\033[K")
+
+        if output:
+            output.append(f"\033[{len(lines) + 1};1H")
+        return "".join(output)
+
+
+class _EventStream(io.TextIOBase):
+    """Write-only text stream that hands each complete line to StatusWriter.log"""
+
+    def __init__(self, writer: StatusWriter) -> None:
+        super().__init__()
+        self._writer = writer
+        self._partial = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if lines:
+            self._writer.log("\n".join(lines))
+        return len(text)
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from entity_store import BulletStore, EnemyStore
+
+
+def make_bullets(n: int, capacity: int = 8, overflow_policy: str = "drop_oldest") -> BulletStore:
+    bullets = BulletStore(capacity, overflow_policy)
+    for i in range(n):
+        bullets.add(x=float(i), y=float(10 * i), vx=1.0, vy=-1.0, type_id=i)
+    return bullets
+
+
+def test_release_moves_last_row_into_hole():
+    bullets = make_bullets(4)
+    bullets.release(1)
+    assert len(bullets) == 3
+    assert bullets["x"].tolist() == [0.0, 3.0, 2.0]
+    assert bullets["type_id"].tolist() == [0, 3, 2]
+
+
+def test_release_last_row():
+    bullets = make_bullets(3)
+    bullets.release(2)
+    assert bullets["x"].tolist() == [0.0, 1.0]
+
+
+def test_remove_fills_holes_from_tail():
+    bullets = make_bullets(6)
+    removed = bullets.remove(np.array([True, False, True, False, False, False]))
+    assert removed == 2
+    assert bullets["x"].tolist() == [4.0, 1.0, 5.0, 3.0]
+    # Every column moves with its row
+    assert bullets["y"].tolist() == [40.0, 10.0, 50.0, 30.0]
+    assert bullets["spawn_serial"].tolist() == [4, 1, 5, 3]
+
+
+def test_remove_tail_only_moves_nothing():
+    bullets = make_bullets(5)
+    assert bullets.remove(np.array([False, False, False, True, True])) == 2
+    assert bullets["x"].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_remove_nothing():
+    bullets = make_bullets(3)
+    assert bullets.remove(np.zeros(3, dtype=bool)) == 0
+    assert len(bullets) == 3
+
+
+def test_drop_oldest_overwrites_lowest_serial():
+    bullets = make_bullets(3, capacity=3)
+    bullets.release(0)
+    bullets.add(x=7.0)
+    index = bullets.add(x=8.0)
+    # Row 1 held bullet 1, the oldest left after bullet 0 was released
+    assert index == 1
+    assert sorted(bullets["spawn_serial"].tolist()) == [2, 3, 4]
+    assert bullets.get_stats()["dropped"] == 1
+
+
+def test_refuse_keeps_pool_and_counts():
+    bullets = make_bullets(2, capacity=2, overflow_policy="refuse")
+    assert bullets.add(x=9.0) == -1
+    bullets.add_many(3, x=np.arange(3.0))
+    assert bullets["x"].tolist() == [0.0, 1.0]
+    assert bullets.get_stats()["refused"] == 4
+
+
+def test_add_many_drop_oldest_evicts_oldest_rows():
+    bullets = make_bullets(3, capacity=4)
+    bullets.add_many(3, x=np.array([10.0, 11.0, 12.0]))
+    assert len(bullets) == 4
+    assert sorted(bullets["spawn_serial"].tolist()) == [2, 3, 4, 5]
+    assert sorted(bullets["x"].tolist()) == [2.0, 10.0, 11.0, 12.0]
+    assert bullets.get_stats()["dropped"] == 2
+
+
+def test_add_many_larger_than_pool_keeps_newest():
+    bullets = make_bullets(1, capacity=2)
+    bullets.add_many(3, x=np.array([10.0, 11.0, 12.0]))
+    assert sorted(bullets["x"].tolist()) == [11.0, 12.0]
+    assert bullets.get_stats()["dropped"] == 2
+
+
+def test_add_many_mirrors_previous_positions():
+    bullets = BulletStore(4)
+    bullets.add_many(2, x=np.array([1.0, 2.0]), y=5.0)
+    assert bullets["prev_x"].tolist() == [1.0, 2.0]
+    assert bullets["prev_y"].tolist() == [5.0, 5.0]
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        BulletStore(4, "grow")
+
+
+def test_bullet_pack_round_trip():
+    bullets = make_bullets(5)
+    bullets.release(2)
+    data = bullets.pack()
+
+    restored = BulletStore(8)
+    assert restored.unpack(data) == len(data)
+    assert len(restored) == len(bullets)
+    for name in BulletStore.FIELDS:
+        np.testing.assert_array_equal(restored[name], bullets[name])
+    # The serial counter carries over, so later spawns line up
+    assert restored.add() == bullets.add()
+    assert restored["spawn_serial"][-1] == bullets["spawn_serial"][-1] == 5
+
+
+def test_unpack_at_offset():
+    bullets = make_bullets(3)
+    data = b"header" + bullets.pack() + b"trailer"
+    restored = BulletStore(8)
+    end = restored.unpack(data, offset=6)
+    assert data[end:] == b"trailer"
+    np.testing.assert_array_equal(restored["x"], bullets["x"])
+
+
+def test_enemy_unpack_grows_store():
+    enemies = EnemyStore(capacity=8)
+    enemies.add_many(5, x=np.arange(5.0), y=1.0, hp=3, type_id=1)
+    enemies.remove(np.array([False, True, False, False, False]))
+    # EntityStore.remove keeps the order of the survivors
+    assert enemies["x"].tolist() == [0.0, 2.0, 3.0, 4.0]
+
+    restored = EnemyStore(capacity=2)
+    restored.unpack(enemies.pack())
+    assert restored.capacity >= 4
+    for name in EnemyStore.FIELDS:
+        np.testing.assert_array_equal(restored[name], enemies[name])
@@ -0,0 +1,122 @@
+import numpy as np
+
+from constants import MAP_TILE_SIZE
+from map_generator import TILE_FLOOR, TILE_WALL
+from physics import move_boxes, wall_tables
+
+T = MAP_TILE_SIZE
+HALF = 10.0
+
+
+def open_grid(rows: int = 8, columns: int = 10) -> np.ndarray:
+    return np.full((rows, columns), TILE_FLOOR, dtype=np.uint8)
+
+
+def move(grid, x, y, dx, dy, half_width=HALF, half_height=HALF):
+    column_walls, row_walls = wall_tables(grid)
+    new_x, new_y, blocked_x, blocked_y = move_boxes(
+        column_walls,
+        row_walls,
+        np.array([x], dtype=np.float64),
+        np.array([y], dtype=np.float64),
+        half_width,
+        half_height,
+        np.array([dx], dtype=np.float64),
+        np.array([dy], dtype=np.float64),
+    )
+    return new_x[0], new_y[0], bool(blocked_x[0]), bool(blocked_y[0])
+
+
+def test_free_move():
+    assert move(open_grid(), 100.0, 100.0, 15.0, -7.0) == (115.0, 93.0, False, False)
+
+
+def test_zero_delta():
+    grid = open_grid()
+    grid[2, 3] = TILE_WALL
+    # Flush against the wall on the right and not moving
+    assert move(grid, 3 * T - HALF, 2.5 * T, 0.0, 0.0) == (3 * T - HALF, 2.5 * T, False, False)
+
+
+def test_stops_flush_against_wall_each_direction():
+    grid = open_grid()
+    grid[3, 5] = TILE_WALL
+    centre_x, centre_y = 5.5 * T, 3.5 * T
+
+    assert move(grid, 3 * T, centre_y, 3 * T, 0.0)[0::2] == (5 * T - HALF, True)
+    assert move(grid, 8 * T, centre_y, -3 * T, 0.0)[0::2] == (6 * T + HALF, True)
+    assert move(grid, centre_x, 1 * T, 0.0, 3 * T)[1::2] == (3 * T - HALF, True)
+    assert move(grid, centre_x, 6 * T, 0.0, -3 * T)[1::2] == (4 * T + HALF, True)
+
+
+def test_no_tunnelling_through_thin_wall():
+    grid = open_grid()
+    grid[:, 4] = TILE_WALL
+    # Far more than a tile in one step, and the target is open floor
+    new_x, _, blocked_x, _ = move(grid, 1.5 * T, 2.5 * T, 5 * T, 0.0)
+    assert blocked_x
+    assert new_x == 4 * T - HALF
+
+
+def test_flush_box_cannot_enter_but_can_leave():
+    grid = open_grid()
+    grid[2, 4] = TILE_WALL
+    x = 4 * T - HALF
+    assert move(grid, x, 2.5 * T, 0.001, 0.0)[0::2] == (x, True)
+    assert move(grid, x, 2.5 * T, -5.0, 0.0)[0::2] == (x - 5.0, False)
+
+
+def test_edge_aligned_box_passes_beside_wall():
+    grid = open_grid()
+    grid[2, 4] = TILE_WALL
+    # The box's top edge lies exactly on the wall's bottom edge
+    y = 2 * T - HALF
+    assert move(grid, 1.5 * T, y, 5 * T, 0.0)[0::2] == (6.5 * T, False)
+
+
+def test_slides_along_wall():
+    grid = open_grid()
+    grid[:, 5] = TILE_WALL
+    new_x, new_y, blocked_x, blocked_y = move(grid, 4.5 * T, 2.5 * T, 30.0, 12.0)
+    assert (new_x, blocked_x) == (5 * T - HALF, True)
+    assert (new_y, blocked_y) == (2.5 * T + 12.0, False)
+
+
+def test_corner_moves_x_first():
+    grid = open_grid()
+    grid[3, 3] = TILE_WALL
+    # Diagonal into the wall's corner: x moves clear first, then y hits it
+    assert move(grid, 2.5 * T, 2 * T, 30.0, 50.0) == (2.5 * T + 30.0, 3 * T - HALF, False, True)
+
+
+def test_map_edge_blocks():
+    grid = open_grid(rows=4, columns=5)
+    assert move(grid, 2 * T, 2 * T, -10 * T, 0.0)[0::2] == (HALF, True)
+    assert move(grid, 2 * T, 2 * T, 10 * T, 0.0)[0::2] == (5 * T - HALF, True)
+    assert move(grid, 2 * T, 2 * T, 0.0, 10 * T)[1::2] == (4 * T - HALF, True)
+
+
+def test_boxes_are_independent_and_layered():
+    first = open_grid()
+    second = open_grid()
+    second[:, 4] = TILE_WALL
+    column_walls = np.stack([wall_tables(first)[0], wall_tables(second)[0]])
+    row_walls = np.stack([wall_tables(first)[1], wall_tables(second)[1]])
+
+    x = np.array([1.5 * T, 1.5 * T, 6.5 * T])
+    y = np.full(3, 2.5 * T)
+    new_x, new_y, blocked_x, blocked_y = move_boxes(
+        column_walls,
+        row_walls,
+        x,
+        y,
+        np.array([HALF, HALF, 5.0]),
+        HALF,
+        np.array([4 * T, 4 * T, -4 * T]),
+        np.zeros(3),
+        layer=np.array([0, 1, 1]),
+    )
+    assert new_x.tolist() == [5.5 * T, 4 * T - HALF, 5 * T + 5.0]
+    assert blocked_x.tolist() == [False, True, True]
+    assert new_y.tolist() == y.tolist()
+    assert not blocked_y.any()
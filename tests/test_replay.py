@@ -0,0 +1,63 @@
+import pytest
+
+from headless import HeadlessSimulation
+from replay import InputRecorder, ReplayDriver, load_recording
+
+
+def record_session(path, rewind: bool = False, ticks: int = 900) -> int:
+    """Play scripted input into a recorded headless game; returns its end tick"""
+    simulation = HeadlessSimulation(seed=7, map_seed=3, rewind=rewind)
+    recorder = InputRecorder(
+        str(path), simulation.game_state.seed, simulation.map_generator.seed, simulation.delta_time
+    ).attach(simulation.game_loop)
+    controls = simulation.controls
+    with simulation.output():
+        for i in range(ticks):
+            if i % 120 == 0:
+                controls.handle_keyboard_up(b"a" if i % 240 else b"d", 0, 0)
+                controls.handle_keyboard(b"d" if i % 240 else b"a", 0, 0)
+            if i % 25 == 0:
+                controls.handle_mouse(0, 0, 200 + i % 800, 150 + i % 400)
+            if rewind and i % 300 == 299:
+                controls.handle_keyboard(b"r", 0, 0)
+                controls.handle_keyboard_up(b"r", 0, 0)
+            simulation.tick()
+    recorder.close()
+    return simulation.game_loop.tick_count
+
+
+@pytest.mark.parametrize("rewind", [False, True])
+def test_replay_reproduces_recorded_hashes(tmp_path, rewind):
+    path = tmp_path / "session.rec"
+    end_tick = record_session(path, rewind=rewind)
+
+    recording = load_recording(str(path))
+    assert recording.uses_rewind() == rewind
+    result = ReplayDriver(recording).run()
+    assert result["first_mismatch"] is None
+    assert result["hashes_checked"] == len(recording.hashes)
+    assert result["events"] == len(recording.events)
+    assert result["ticks"] == end_tick
+
+
+def test_replay_reports_divergence(tmp_path):
+    path = tmp_path / "session.rec"
+    record_session(path, ticks=300)
+
+    recording = load_recording(str(path))
+    tick, value = recording.hashes[150]
+    recording.hashes[150] = (tick, value ^ 1)
+    result = ReplayDriver(recording).run()
+    assert result["first_mismatch"] == tick
+    assert result["hashes_checked"] == 151
+
+
+def test_truncated_recording_keeps_complete_records(tmp_path):
+    path = tmp_path / "session.rec"
+    record_session(path, ticks=200)
+    data = path.read_bytes()
+    path.write_bytes(data[:-7])
+
+    recording = load_recording(str(path))
+    assert 0 < len(recording.hashes) < 200
+    assert ReplayDriver(recording).run()["first_mismatch"] is None
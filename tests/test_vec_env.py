@@ -0,0 +1,85 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from constants import WINDOW_HEIGHT
+from headless import HeadlessSimulation
+from vec_env import ACTION_SIZE, ANGLE, MOVE_X, OBSERVATION_SIZE, SHOOT, VecEnv
+
+
+def aligned_pair(seed: int):
+    """A headless game and a one-game VecEnv set up with the same seed and map"""
+    simulation = HeadlessSimulation(seed=seed)
+    env = VecEnv(1, seed=0)
+    env.map_generators[0].generate_map(simulation.map_generator.seed)
+    env._reset_envs(np.arange(1), new_episode=False)
+    env.rngs[0] = random.Random(seed)
+    # Neither game ends, so every tick can be compared
+    simulation.game_state.lives = 1000
+    env.lives[:] = 1000
+    return simulation, env
+
+
+def assert_same_state(simulation: HeadlessSimulation, env: VecEnv, info, tick: int) -> None:
+    game_state = simulation.game_state
+    context = f"tick {tick}"
+    assert game_state.score == info["score"][0], context
+    assert game_state.lives == info["lives"][0], context
+    assert game_state.current_wave == info["wave"][0], context
+    assert game_state.player_x == pytest.approx(env.player_x[0], abs=1e-9), context
+    assert game_state.player_y == pytest.approx(env.player_y[0], abs=1e-9), context
+    assert len(game_state.enemies) == len(env.enemies), context
+    assert len(game_state.player_bullets) == len(env.player_bullets), context
+    assert len(game_state.enemy_bullets) == len(env.enemy_bullets), context
+    assert len(game_state.available_powerups) == len(env.available_powerups), context
+    assert len(game_state.active_powerups) == int((env.powerup_types[0] >= 0).sum()), context
+    if len(game_state.enemies):
+        np.testing.assert_allclose(game_state.enemies["x"], env.enemies["x"], err_msg=context)
+        np.testing.assert_allclose(game_state.enemies["y"], env.enemies["y"], err_msg=context)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_headless_simulation(seed):
+    simulation, env = aligned_pair(seed)
+    game_state = simulation.game_state
+    actions = np.zeros((1, ACTION_SIZE))
+    for tick in range(1200):
+        actions[:] = 0
+        # Walk left and right a second at a time, firing up and to the right
+        actions[0, MOVE_X] = 1 if (tick // 60) % 2 == 0 else -1
+        if tick % 10 == 0:
+            target_x = int(game_state.player_x + 100 * math.cos(0.7))
+            target_y = int(game_state.player_y + 100 * math.sin(0.7))
+            actions[0, SHOOT] = 1
+            actions[0, ANGLE] = math.atan2(
+                target_y - game_state.player_y, target_x - game_state.player_x
+            )
+            with simulation.output():
+                simulation.controls.handle_mouse(0, 0, target_x, WINDOW_HEIGHT - target_y)
+        game_state.movement.update(right=actions[0, MOVE_X] > 0, left=actions[0, MOVE_X] < 0)
+
+        with simulation.output():
+            simulation.tick()
+        _, _, dones, info = env.step(actions)
+        assert not dones[0]
+        assert_same_state(simulation, env, info, tick)
+
+
+def test_step_shapes_and_reset_on_done():
+    env = VecEnv(4, seed=3)
+    observations = env.reset()
+    assert observations.shape == (4, OBSERVATION_SIZE)
+
+    env.lives[2] = 0
+    seed_before = env.episode_seeds[2]
+    observations, rewards, dones, info = env.step(np.zeros((4, ACTION_SIZE)))
+    assert observations.shape == (4, OBSERVATION_SIZE)
+    assert rewards.shape == dones.shape == (4,)
+    assert dones.tolist() == [False, False, True, False]
+    assert info["lives"][2] <= 0
+    # The finished game starts over with a fresh seed
+    assert env.episode_seeds[2] != seed_before
+    assert env.lives[2] > 0
+    assert env.episode_steps[2] == 0
@@ -1,6 +1,7 @@
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
+from typing import List, Optional, Tuple
 from render import Render
 from constants import (
     RESTART_BUTTON_COLOR,
@@ -10,41 +11,74 @@ from constants import (
 
 
 class UI:
-    def __init__(self) -> None:
-        self.render: Render = Render()
+    def __init__(self, render: Optional[Render] = None) -> None:
+        # Share the game's renderer so button points land in the same batch
+        self.render: Render = render if render is not None else Render()
 
     def draw_restart_button(self, x: float, y: float) -> None:
         size: int = 20
-        glColor3f(*RESTART_BUTTON_COLOR)
+        self.render.set_color(*RESTART_BUTTON_COLOR)
+        self.render.draw_shape(
+            ("restart", size), x, y, lambda: self._rasterize_restart_icon(size)
+        )
+
+    def draw_pause_play_button(self, x: float, y: float, is_paused: bool) -> None:
+        size: int = 20
+        self.render.set_color(*PAUSE_PLAY_BUTTON_COLOR)
+        self.render.draw_shape(
+            ("pause_play", size, is_paused),
+            x,
+            y,
+            lambda: self._rasterize_pause_play_icon(size, is_paused),
+        )
 
-        self.render.draw_line(x, y, x + size // 2, y + size // 2)
-        self.render.draw_line(x, y, x + size // 2, y - size // 2)
-        self.render.draw_line(
+    def draw_cross_button(self, x: float, y: float) -> None:
+        size: int = 20
+        self.render.set_color(*CROSS_BUTTON_COLOR)
+        self.render.draw_shape(
+            ("cross", size), x, y, lambda: self._rasterize_cross_icon(size)
+        )
+
+    # Icons are rasterized once at the origin and translated by draw_shape
+    def _rasterize_restart_icon(self, size: int) -> List[Tuple[float, float]]:
+        x, y = 0, 0
+        points: List[Tuple[float, float]] = []
+
+        points += self.render.rasterize_line(x, y, x + size // 2, y + size // 2)
+        points += self.render.rasterize_line(x, y, x + size // 2, y - size // 2)
+        points += self.render.rasterize_line(
             x + size // 2, y + size // 2, x + size // 2, y - size // 2
         )
 
-        self.render.draw_line(x + size // 2 - 1, y, x + size, y)
+        points += self.render.rasterize_line(x + size // 2 - 1, y, x + size, y)
+        return points
+
+    def _rasterize_pause_play_icon(
+        self, size: int, is_paused: bool
+    ) -> List[Tuple[float, float]]:
+        x, y = 0, 0
+        points: List[Tuple[float, float]] = []
 
-    def draw_pause_play_button(self, x: float, y: float, is_paused: bool) -> None:
-        size: int = 20
-        glColor3f(*PAUSE_PLAY_BUTTON_COLOR)
-        
         if is_paused:
             # Play Icon
-            self.render.draw_line(x, y - size // 2, x + size, y)
-            self.render.draw_line(x + size, y, x, y + size // 2)
-            self.render.draw_line(x, y + size // 2, x, y - size // 2)
+            points += self.render.rasterize_line(x, y - size // 2, x + size, y)
+            points += self.render.rasterize_line(x + size, y, x, y + size // 2)
+            points += self.render.rasterize_line(x, y + size // 2, x, y - size // 2)
         else:
             # Pause Icon
-            self.render.draw_line(x, y - size // 2, x, y + size // 2)
-            self.render.draw_line(x + size // 2, y - size // 2, x + size // 2, y + size // 2)
+            points += self.render.rasterize_line(x, y - size // 2, x, y + size // 2)
+            points += self.render.rasterize_line(
+                x + size // 2, y - size // 2, x + size // 2, y + size // 2
+            )
+        return points
 
-    def draw_cross_button(self, x: float, y: float) -> None:
-        size: int = 20
-        glColor3f(*CROSS_BUTTON_COLOR)
+    def _rasterize_cross_icon(self, size: int) -> List[Tuple[float, float]]:
+        x, y = 0, 0
+        points: List[Tuple[float, float]] = []
 
-        self.render.draw_line(x, y - size // 2, x + size, y + size // 2)
-        self.render.draw_line(x, y + size // 2, x + size, y - size // 2)
+        points += self.render.rasterize_line(x, y - size // 2, x + size, y + size // 2)
+        points += self.render.rasterize_line(x, y + size // 2, x + size, y - size // 2)
+        return points
 
     def check_button_click(
         self,
@@ -0,0 +1,632 @@
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from constants import (
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+    SIMULATION_TICK_RATE,
+    MAP_TILE_SIZE,
+    MAP_SEED_COUNT,
+    PLAYER_SPEED,
+    PLAYER_BULLET_SPEED,
+    INITIAL_LIVES,
+    WAVE_DURATION,
+    SPAWN_EXCLUSION_RADIUS,
+    MAX_PLAYER_BULLETS,
+    MAX_ENEMY_BULLETS,
+    BULLET_OVERFLOW_POLICY,
+)
+from collision_manager import broadphase_cell_size, circles_rect_hits, resolve_player_bullet_hits
+from entity_store import BulletStore, EnemyStore, EntityStore
+from flow_field import flow_steps, search_stacked
+from game_loop import MAX_AVAILABLE_POWERUPS, POWERUP_SPAWN_INTERVAL, update_enemy_attacks
+from map_generator import MapGenerator, TILE_WALL, trace_segments
+from physics import move_boxes, wall_tables
+from player import Player
+from registry import ENEMIES, POWERUPS, WAVES
+from render import Render
+from spatial_hash import SpatialHash
+
+# Action columns: movement in [-1, 1] per axis (1 is a held key), fire when
+# shoot > 0.5, and the shot's angle in radians
+MOVE_X, MOVE_Y, SHOOT, ANGLE = range(4)
+ACTION_SIZE = 4
+
+# Observation layout: the player, then the nearest enemies, enemy bullets and
+# power-ups relative to the player, zero-padded with a present flag per slot
+OBSERVED_ENEMIES = 8
+OBSERVED_BULLETS = 16
+OBSERVED_POWERUPS = MAX_AVAILABLE_POWERUPS
+# x, y, lives, wave, wave time left, then the time left on each power-up
+# effect as a fraction of its longest duration
+PLAYER_FEATURES = 5 + len(POWERUPS.effect_names)
+# dx, dy, hp, type_id, present
+ENEMY_FEATURES = 5
+# dx, dy, vx, vy, present
+BULLET_FEATURES = 5
+# dx, dy, type_id, present
+POWERUP_FEATURES = 4
+OBSERVATION_SIZE = (
+    PLAYER_FEATURES
+    + OBSERVED_ENEMIES * ENEMY_FEATURES
+    + OBSERVED_BULLETS * BULLET_FEATURES
+    + OBSERVED_POWERUPS * POWERUP_FEATURES
+)
+
+# Effects the rules read, as columns of VecEnv.powerup_types
+SPEED_BOOST = POWERUPS.effect_names.index("speed_boost")
+SPREAD_SHOT = POWERUPS.effect_names.index("spread_shot")
+BULLET_SPEED = POWERUPS.effect_names.index("bullet_speed")
+
+
+class VecEnemyStore(EnemyStore):
+    """EnemyStore whose rows carry the index of the game they belong to"""
+
+    FIELDS = {**EnemyStore.FIELDS, "env": np.int32}
+
+
+class VecPowerupStore(EntityStore):
+    """Power-ups waiting to be picked up, in spawn order within each game"""
+
+    FIELDS = {"x": np.float64, "y": np.float64, "type_id": np.int16, "env": np.int32}
+    MIRRORED_FIELDS: Dict[str, str] = {}
+
+
+class VecBulletStore(BulletStore):
+    """BulletStore shared by num_envs games, each with its own cap.
+
+    The overflow policy is applied per game, so a busy game only ever drops or
+    refuses its own bullets; the rows themselves grow as needed. Rows are
+    added with add_many, which needs an env value for each.
+    """
+
+    FIELDS = {**BulletStore.FIELDS, "env": np.int32}
+
+    def __init__(
+        self, num_envs: int, capacity_per_env: int, overflow_policy: str = BULLET_OVERFLOW_POLICY
+    ) -> None:
+        super().__init__(capacity_per_env, overflow_policy)
+        self.num_envs = num_envs
+        self.capacity_per_env = capacity_per_env
+
+    def add_many(self, n: int, **values) -> None:
+        if n <= 0:
+            return
+        env = np.broadcast_to(np.asarray(values["env"], dtype=np.intp), (n,))
+        cap = self.capacity_per_env
+        live = np.bincount(self["env"], minlength=self.num_envs)
+        new = np.bincount(env, minlength=self.num_envs)
+        overflow = live + new - cap
+        if (overflow > 0).any():
+            # Rank of each new row among the new rows of its game
+            order = np.argsort(env, kind="stable")
+            rank = np.empty(n, dtype=np.intp)
+            rank[order] = np.arange(n) - np.searchsorted(env[order], env[order])
+
+            if self.overflow_policy == "refuse":
+                keep = rank < np.maximum(cap - live, 0)[env]
+                self.refused += n - int(keep.sum())
+            else:
+                # Each game evicts its oldest live bullets, and drops its
+                # earliest new ones if they alone exceed the cap
+                evicted = np.clip(overflow, 0, live)
+                if evicted.any():
+                    live_env = self["env"]
+                    by_age = np.lexsort((self["spawn_serial"], live_env))
+                    sorted_env = live_env[by_age]
+                    age_rank = np.arange(len(by_age)) - np.searchsorted(sorted_env, sorted_env)
+                    mask = np.zeros(self.count, dtype=bool)
+                    mask[by_age[age_rank < evicted[sorted_env]]] = True
+                    self.remove(mask)
+                keep = rank >= np.maximum(new - cap, 0)[env]
+                self.dropped += int(evicted.sum()) + n - int(keep.sum())
+
+            n = int(keep.sum())
+            values = {
+                name: value[keep] if np.ndim(value) else value for name, value in values.items()
+            }
+            if n <= 0:
+                return
+        self._append(n, values)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        # Grows like any EntityStore; the caps are enforced per game above
+        EntityStore._ensure_capacity(self, needed)
+
+
+class VecEnv:
+    """num_envs independent games advanced in lockstep for agent training.
+
+    Players are arrays with one entry per game; enemies, bullets and power-ups
+    of every game share one store each, tagged with an env column, so each
+    step is a single batched pass over all of them. The rules are
+    GameLoop.step, Controls, CollisionManager and PowerupManager applied per
+    game. Games that end are reset to a fresh seed and map at the end of the
+    step.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        seed: Optional[int] = None,
+        delta_time: float = 1.0 / SIMULATION_TICK_RATE,
+        life_penalty: float = 10.0,
+        map_cache=None,
+        player_bullets_per_env: int = MAX_PLAYER_BULLETS,
+        enemy_bullets_per_env: int = MAX_ENEMY_BULLETS,
+    ) -> None:
+        self.num_envs = num_envs
+        self.delta_time = delta_time
+        # Reward is points scored minus this per life lost
+        self.life_penalty = life_penalty
+        self._seeds = random.Random(seed)
+
+        # Player state, one entry per game
+        self.player_x = np.zeros(num_envs, dtype=np.float64)
+        self.player_y = np.zeros(num_envs, dtype=np.float64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.lives = np.zeros(num_envs, dtype=np.int64)
+        self.wave = np.zeros(num_envs, dtype=np.int64)
+        self.wave_timer = np.zeros(num_envs, dtype=np.float64)
+        self.enemy_spawn_timer = np.zeros(num_envs, dtype=np.float64)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.episode_seeds = np.zeros(num_envs, dtype=np.int64)
+
+        # Power-ups, as PowerupManager keeps them: one active type per effect
+        # (-1 for none), expiring once its game's power-up clock reaches it
+        self.powerup_clock = np.zeros(num_envs, dtype=np.float64)
+        self.powerup_types = np.full((num_envs, len(POWERUPS.effect_names)), -1, dtype=np.int16)
+        self.powerup_expires = np.zeros((num_envs, len(POWERUPS.effect_names)), dtype=np.float64)
+        self.powerup_spawn_timer = np.zeros(num_envs, dtype=np.float64)
+        self.available_powerups = VecPowerupStore()
+        # Longest duration of each effect, to scale observations
+        self._effect_durations = np.zeros(len(POWERUPS.effect_names), dtype=np.float64)
+        np.maximum.at(self._effect_durations, POWERUPS.effect, POWERUPS.duration)
+
+        self.player_bullets = VecBulletStore(num_envs, player_bullets_per_env)
+        self.enemies = VecEnemyStore()
+        self.enemy_bullets = VecBulletStore(num_envs, enemy_bullets_per_env)
+
+        # Every game has its own map; the batched passes read stacked copies
+        # of its arrays, indexed by env first
+        render = Render()
+        self.rngs: List[random.Random] = []
+        self.map_generators: List[MapGenerator] = []
+        for env in range(num_envs):
+            map_seed = self._draw_episode_seed(env)
+            self.map_generators.append(MapGenerator(render, seed=map_seed, cache=map_cache))
+
+        height, width = self.map_generators[0].grid.shape
+        self.grids = np.zeros((num_envs, height, width), dtype=np.uint8)
+        self.walkable = np.zeros((num_envs, height, width), dtype=bool)
+        self.column_walls = np.zeros((num_envs, width, height + 1), dtype=np.int32)
+        self.row_walls = np.zeros((num_envs, height, width + 1), dtype=np.int32)
+        self.next_x = np.zeros((num_envs, height, width), dtype=np.float64)
+        self.next_y = np.zeros((num_envs, height, width), dtype=np.float64)
+        self.direct = np.ones((num_envs, height, width), dtype=bool)
+        # Player tile each game's flow field was built for; -1 when stale
+        self.flow_targets = np.full((num_envs, 2), -1, dtype=np.intp)
+        self.flow_recomputes: int = 0
+
+        hitbox = Player(render).get_hitbox(0, 0)
+        self.player_half_width = hitbox["width"] // 2
+        self.player_half_height = hitbox["height"] // 2
+        self.player_rect_offset_y = hitbox["y"] - hitbox["height"] // 2
+        self.player_rect_size = (hitbox["width"], hitbox["height"])
+        self._max_bullet_speed = max(float(ENEMIES.bullet_speed.max()), 1.0)
+
+        # Games sit side by side in one broadphase grid, two cells apart so
+        # no neighbourhood spans two games
+        cell_size = broadphase_cell_size()
+        self._env_stride = WINDOW_WIDTH + 2 * cell_size
+        self.broadphase = SpatialHash(cell_size, num_envs * self._env_stride, WINDOW_HEIGHT)
+
+        self.reset()
+
+    def _draw_episode_seed(self, env: int) -> int:
+        """Seed a new game in slot env; returns its map seed"""
+        episode_seed = self._seeds.randrange(2**32)
+        self.episode_seeds[env] = episode_seed
+        rng = random.Random(episode_seed)
+        if env < len(self.rngs):
+            self.rngs[env] = rng
+        else:
+            self.rngs.append(rng)
+        return rng.randrange(MAP_SEED_COUNT)
+
+    def reset(self) -> np.ndarray:
+        """Start every game over; returns the first observations"""
+        self._reset_envs(np.arange(self.num_envs), new_episode=False)
+        return self.observe()
+
+    def _reset_envs(self, envs: np.ndarray, new_episode: bool = True) -> None:
+        for store in (
+            self.player_bullets,
+            self.enemies,
+            self.enemy_bullets,
+            self.available_powerups,
+        ):
+            store.remove(np.isin(store["env"], envs))
+
+        for env in envs.tolist():
+            map_generator = self.map_generators[env]
+            if new_episode:
+                map_generator.generate_map(self._draw_episode_seed(env))
+            self.grids[env] = map_generator.grid
+            self.walkable[env] = map_generator.grid != TILE_WALL
+            self.column_walls[env], self.row_walls[env] = wall_tables(map_generator.grid)
+
+        self.player_x[envs] = WINDOW_WIDTH // 2
+        self.player_y[envs] = WINDOW_HEIGHT // 2
+        self.score[envs] = 0
+        self.lives[envs] = INITIAL_LIVES
+        self.wave[envs] = 1
+        self.wave_timer[envs] = WAVE_DURATION
+        self.enemy_spawn_timer[envs] = 0
+        self.episode_steps[envs] = 0
+        self.flow_targets[envs] = -1
+        self.powerup_clock[envs] = 0.0
+        self.powerup_types[envs] = -1
+        self.powerup_spawn_timer[envs] = 0
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Apply one (num_envs, ACTION_SIZE) action array and advance every
+        game one tick. Returns observations, rewards, done flags and the
+        final score, lives, wave, length and seed of each game this step."""
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, ACTION_SIZE)
+        delta_time = self.delta_time
+        score_before = self.score.copy()
+        lives_before = self.lives.copy()
+
+        # Input lands between ticks, as Controls.handle_mouse does
+        self._shoot(actions)
+
+        self.wave_timer -= delta_time
+        wave_ended = self.wave_timer <= 0
+        self.wave[wave_ended] += 1
+        self.wave_timer[wave_ended] = WAVE_DURATION
+
+        self._move_players(actions, delta_time)
+        self._update_bullets(delta_time)
+        self._update_enemies(delta_time)
+        self._spawn_enemies(delta_time)
+        self._update_powerups(delta_time)
+        self._check_player_bullet_collisions()
+        self._check_player_hits()
+        self._check_powerup_pickups()
+        self.episode_steps += 1
+
+        rewards = (self.score - score_before) - self.life_penalty * (lives_before - self.lives)
+        completed = self.wave > WAVES.count
+        dones = completed | (self.lives <= 0)
+        infos = {
+            "score": self.score.copy(),
+            "lives": self.lives.copy(),
+            "wave": np.minimum(self.wave, WAVES.count),
+            "completed": completed,
+            "length": self.episode_steps.copy(),
+            "episode_seed": self.episode_seeds.copy(),
+        }
+
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            self._reset_envs(finished)
+        return self.observe(), rewards.astype(np.float32), dones, infos
+
+    def _shoot(self, actions: np.ndarray) -> None:
+        firing = np.flatnonzero(actions[:, SHOOT] > 0.5)
+        if not len(firing):
+            return
+        angle = actions[firing, ANGLE]
+
+        # A spread shot fans its bullets over 45 degrees around the aim, as
+        # Controls._create_spread_shot does
+        spread_type = self.powerup_types[firing, SPREAD_SHOT]
+        counts = np.where(spread_type >= 0, POWERUPS.bullets[spread_type], 1)
+        spread = np.where(spread_type >= 0, math.pi / 4, 0.0)
+        angle_step = np.where(counts > 1, spread / np.maximum(counts - 1, 1), 0.0)
+        shooters = np.repeat(np.arange(len(firing)), counts)
+        run_offsets = np.arange(len(shooters)) - np.repeat(np.cumsum(counts) - counts, counts)
+        angle = (angle - spread / 2)[shooters] + run_offsets * angle_step[shooters]
+
+        speed_type = self.powerup_types[firing, BULLET_SPEED]
+        speed = PLAYER_BULLET_SPEED * np.where(
+            speed_type >= 0, POWERUPS.multiplier[speed_type], 1.0
+        )[shooters]
+        envs = firing[shooters]
+        self.player_bullets.add_many(
+            len(shooters),
+            x=self.player_x[envs],
+            y=self.player_y[envs],
+            vx=np.cos(angle) * speed,
+            vy=np.sin(angle) * speed,
+            env=envs,
+        )
+
+    def _move_players(self, actions: np.ndarray, delta_time: float) -> None:
+        step = PLAYER_SPEED * delta_time
+        boost_type = self.powerup_types[:, SPEED_BOOST]
+        multiplier = np.where(boost_type >= 0, POWERUPS.multiplier[boost_type], 1.0)
+        half_width, half_height = self.player_half_width, self.player_half_height
+        new_x, new_y, _, _ = move_boxes(
+            self.column_walls,
+            self.row_walls,
+            self.player_x,
+            self.player_y,
+            half_width,
+            half_height,
+            np.clip(actions[:, MOVE_X], -1.0, 1.0) * step * multiplier,
+            np.clip(actions[:, MOVE_Y], -1.0, 1.0) * step * multiplier,
+            layer=np.arange(self.num_envs),
+        )
+        np.clip(new_x, half_width, WINDOW_WIDTH - half_width, out=self.player_x)
+        np.clip(new_y, half_height, WINDOW_HEIGHT - half_height, out=self.player_y)
+
+    def _update_bullets(self, delta_time: float) -> None:
+        for bullets in (self.player_bullets, self.enemy_bullets):
+            start_x = bullets["x"].copy()
+            start_y = bullets["y"].copy()
+            bullets.integrate(delta_time)
+
+            blocked = trace_segments(
+                self.grids, start_x, start_y, bullets["x"], bullets["y"], bullets["env"]
+            )
+            bullets.remove(blocked | bullets.out_of_bounds(WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    def _update_enemies(self, delta_time: float) -> None:
+        enemies = self.enemies
+        if not len(enemies):
+            return
+
+        env = enemies["env"]
+        self._update_flow_fields(np.unique(env))
+        height, width = self.grids.shape[1:]
+        tile_x = np.clip((enemies["x"] / MAP_TILE_SIZE).astype(np.intp), 0, width - 1)
+        tile_y = np.clip((enemies["y"] / MAP_TILE_SIZE).astype(np.intp), 0, height - 1)
+        direct = self.direct[env, tile_y, tile_x]
+        goal_x = np.where(direct, self.player_x[env], self.next_x[env, tile_y, tile_x])
+        goal_y = np.where(direct, self.player_y[env], self.next_y[env, tile_y, tile_x])
+
+        dx = goal_x - enemies["x"]
+        dy = goal_y - enemies["y"]
+        distance = np.sqrt(dx * dx + dy * dy)
+        type_ids = enemies["type_id"]
+        speed = ENEMIES.speed[type_ids] * WAVES.speed_multiplier[self.wave[env]]
+
+        moving = distance > 0
+        distance[~moving] = 1.0
+        half_sizes = ENEMIES.half_size[type_ids]
+        enemies["x"], enemies["y"], _, _ = move_boxes(
+            self.column_walls,
+            self.row_walls,
+            enemies["x"],
+            enemies["y"],
+            half_sizes,
+            half_sizes,
+            np.where(moving, (dx / distance) * speed * delta_time, 0.0),
+            np.where(moving, (dy / distance) * speed * delta_time, 0.0),
+            layer=env,
+        )
+
+        update_enemy_attacks(enemies, self.enemy_bullets, delta_time, columns=("env",))
+
+    def _update_flow_fields(self, envs: np.ndarray) -> None:
+        """Rebuild, in one stacked search, the flow fields of the games in
+        envs whose player moved to another tile (see FlowField)"""
+        height, width = self.grids.shape[1:]
+        target_x = np.clip((self.player_x[envs] / MAP_TILE_SIZE).astype(np.intp), 0, width - 1)
+        target_y = np.clip((self.player_y[envs] / MAP_TILE_SIZE).astype(np.intp), 0, height - 1)
+        stale = (self.flow_targets[envs, 0] != target_x) | (self.flow_targets[envs, 1] != target_y)
+        if not stale.any():
+            return
+
+        envs, target_x, target_y = envs[stale], target_x[stale], target_y[stale]
+        walkable = self.walkable[envs]
+        distance = search_stacked(walkable, target_x, target_y)
+        self.next_x[envs], self.next_y[envs], self.direct[envs] = flow_steps(walkable, distance)
+        self.flow_targets[envs, 0] = target_x
+        self.flow_targets[envs, 1] = target_y
+        self.flow_recomputes += len(envs)
+
+    def _spawn_enemies(self, delta_time: float) -> None:
+        self.enemy_spawn_timer -= delta_time
+        due = np.flatnonzero(self.enemy_spawn_timer <= 0)
+        if not len(due):
+            return
+        waves = np.minimum(self.wave[due], WAVES.count)
+        self.enemy_spawn_timer[due] = WAVES.spawn_rate[waves]
+
+        # Drawn per game from its own generator, as GameLoop does
+        type_ids = np.zeros(len(due), dtype=np.int16)
+        positions = np.zeros((len(due), 2), dtype=np.float64)
+        for i, (env, wave) in enumerate(zip(due.tolist(), waves.tolist())):
+            rng = self.rngs[env]
+            type_ids[i] = rng.choice(WAVES.enemy_ids[wave])
+            positions[i] = self.map_generators[env].get_random_floor_position(
+                exclude=(self.player_x[env], self.player_y[env]),
+                radius=SPAWN_EXCLUSION_RADIUS,
+                rng=rng,
+            )
+
+        self.enemies.add_many(
+            len(due),
+            type_id=type_ids,
+            x=positions[:, 0],
+            y=positions[:, 1],
+            hp=ENEMIES.hp[type_ids],
+            attack_cooldown=0,
+            env=due,
+        )
+
+    def _update_powerups(self, delta_time: float) -> None:
+        self.powerup_clock += delta_time
+        expired = (self.powerup_types >= 0) & (self.powerup_expires <= self.powerup_clock[:, None])
+        self.powerup_types[expired] = -1
+
+        self.powerup_spawn_timer -= delta_time
+        due = np.flatnonzero(self.powerup_spawn_timer <= 0)
+        if not len(due):
+            return
+        waiting = np.bincount(self.available_powerups["env"], minlength=self.num_envs)
+
+        # Drawn per game from its own generator, as GameLoop does
+        spawned = []
+        for env in due.tolist():
+            rng = self.rngs[env]
+            self.powerup_spawn_timer[env] = rng.uniform(*POWERUP_SPAWN_INTERVAL)
+            if waiting[env] < MAX_AVAILABLE_POWERUPS:
+                type_id = rng.randrange(len(POWERUPS))
+                x, y = self.map_generators[env].get_random_floor_position(rng=rng)
+                spawned.append((x, y, type_id, env))
+        if spawned:
+            x, y, type_ids, envs = zip(*spawned)
+            self.available_powerups.add_many(
+                len(spawned), x=np.array(x), y=np.array(y), type_id=type_ids, env=envs
+            )
+
+    def _check_player_bullet_collisions(self) -> None:
+        bullets = self.player_bullets
+        enemies = self.enemies
+        if not len(bullets) or not len(enemies):
+            return
+
+        bullet_hit, kills, _, _ = resolve_player_bullet_hits(
+            self.broadphase,
+            bullets,
+            enemies,
+            bullet_offset=bullets["env"] * self._env_stride,
+            enemy_offset=enemies["env"] * self._env_stride,
+        )
+        np.add.at(
+            self.score, enemies["env"][kills], ENEMIES.points[enemies["type_id"][kills]]
+        )
+        killed = np.zeros(len(enemies), dtype=bool)
+        killed[kills] = True
+        bullets.remove(bullet_hit)
+        enemies.remove(killed)
+
+    def _check_player_hits(self) -> None:
+        """Enemy bullets and melee range against each game's player hitbox"""
+        rect_x = self.player_x - self.player_rect_size[0] // 2
+        rect_y = self.player_y + self.player_rect_offset_y
+        width, height = self.player_rect_size
+
+        bullets = self.enemy_bullets
+        if len(bullets):
+            env = bullets["env"]
+            hits = circles_rect_hits(
+                bullets["x"], bullets["y"], 2, rect_x[env], rect_y[env], width, height
+            )
+            self.lives -= np.bincount(env[hits], minlength=self.num_envs)
+            bullets.remove(hits)
+
+        enemies = self.enemies
+        if len(enemies):
+            env = enemies["env"]
+            hits = circles_rect_hits(
+                enemies["x"],
+                enemies["y"],
+                ENEMIES.melee_range[enemies["type_id"]],
+                rect_x[env],
+                rect_y[env],
+                width,
+                height,
+            )
+            self.lives -= np.bincount(env[hits], minlength=self.num_envs)
+
+    def _check_powerup_pickups(self) -> None:
+        powerups = self.available_powerups
+        if not len(powerups):
+            return
+        env = powerups["env"]
+        type_ids = powerups["type_id"]
+        hits = circles_rect_hits(
+            powerups["x"],
+            powerups["y"],
+            POWERUPS.size[type_ids],
+            (self.player_x - self.player_rect_size[0] // 2)[env],
+            (self.player_y + self.player_rect_offset_y)[env],
+            *self.player_rect_size,
+        )
+        # In spawn order, so a later pick-up replaces an earlier one with the
+        # same effect
+        for row in np.flatnonzero(hits).tolist():
+            type_id = type_ids[row]
+            effect = POWERUPS.effect[type_id]
+            self.powerup_types[env[row], effect] = type_id
+            self.powerup_expires[env[row], effect] = (
+                self.powerup_clock[env[row]] + POWERUPS.duration[type_id]
+            )
+        powerups.remove(hits)
+
+    def observe(self) -> np.ndarray:
+        """(num_envs, OBSERVATION_SIZE) float32 observations, scaled to
+        roughly [-1, 1]"""
+        observations = np.zeros((self.num_envs, OBSERVATION_SIZE), dtype=np.float32)
+        observations[:, 0] = self.player_x / WINDOW_WIDTH
+        observations[:, 1] = self.player_y / WINDOW_HEIGHT
+        observations[:, 2] = self.lives / INITIAL_LIVES
+        observations[:, 3] = self.wave / WAVES.count
+        observations[:, 4] = self.wave_timer / WAVE_DURATION
+        remaining = np.where(
+            self.powerup_types >= 0, self.powerup_expires - self.powerup_clock[:, None], 0.0
+        )
+        observations[:, 5:PLAYER_FEATURES] = remaining / self._effect_durations
+
+        enemies = self.enemies
+        if len(enemies):
+            env = enemies["env"]
+            dx = enemies["x"] - self.player_x[env]
+            dy = enemies["y"] - self.player_y[env]
+            env, rank, index = _nearest(env, dx, dy, OBSERVED_ENEMIES)
+            base = PLAYER_FEATURES + rank * ENEMY_FEATURES
+            observations[env, base] = dx[index] / WINDOW_WIDTH
+            observations[env, base + 1] = dy[index] / WINDOW_HEIGHT
+            observations[env, base + 2] = enemies["hp"][index] / ENEMIES.hp.max()
+            observations[env, base + 3] = enemies["type_id"][index] / max(len(ENEMIES) - 1, 1)
+            observations[env, base + 4] = 1.0
+
+        bullets = self.enemy_bullets
+        if len(bullets):
+            env = bullets["env"]
+            dx = bullets["x"] - self.player_x[env]
+            dy = bullets["y"] - self.player_y[env]
+            env, rank, index = _nearest(env, dx, dy, OBSERVED_BULLETS)
+            base = PLAYER_FEATURES + OBSERVED_ENEMIES * ENEMY_FEATURES + rank * BULLET_FEATURES
+            observations[env, base] = dx[index] / WINDOW_WIDTH
+            observations[env, base + 1] = dy[index] / WINDOW_HEIGHT
+            observations[env, base + 2] = bullets["vx"][index] / self._max_bullet_speed
+            observations[env, base + 3] = bullets["vy"][index] / self._max_bullet_speed
+            observations[env, base + 4] = 1.0
+
+        powerups = self.available_powerups
+        if len(powerups):
+            env = powerups["env"]
+            dx = powerups["x"] - self.player_x[env]
+            dy = powerups["y"] - self.player_y[env]
+            env, rank, index = _nearest(env, dx, dy, OBSERVED_POWERUPS)
+            base = (
+                PLAYER_FEATURES
+                + OBSERVED_ENEMIES * ENEMY_FEATURES
+                + OBSERVED_BULLETS * BULLET_FEATURES
+                + rank * POWERUP_FEATURES
+            )
+            observations[env, base] = dx[index] / WINDOW_WIDTH
+            observations[env, base + 1] = dy[index] / WINDOW_HEIGHT
+            observations[env, base + 2] = powerups["type_id"][index] / max(len(POWERUPS) - 1, 1)
+            observations[env, base + 3] = 1.0
+        return observations
+
+
+def _nearest(
+    env: np.ndarray, dx: np.ndarray, dy: np.ndarray, count: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """For the count closest rows of each game: (env, rank by distance, row)"""
+    order = np.lexsort((dx * dx + dy * dy, env))
+    sorted_env = env[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_env, sorted_env)
+    keep = rank < count
+    return sorted_env[keep], rank[keep], order[keep]